@@ -1,3 +1,33 @@
+"""
+Análises automáticas em texto.
+
+`generate_analysis` produz a narrativa do ecossistema. As narrativas por
+segmento (tipo de modelo) e por modelo são geradas em lote a partir do
+snapshot, com as diferenças para as médias do ecossistema calculadas de uma
+vez em NumPy. Tudo é gerado na sincronização e gravado na tabela `analises`,
+indexado pelo hash do snapshot: um snapshot igual a um já analisado reaproveita
+os textos, e a API só lê strings prontas.
+"""
+
+import hashlib
+import numpy as np
+from .indices import METRICAS
+
+# Mapeamento semântico das competências
+COMPETENCIAS = {
+    "IFEval": "Obediência (seguir instruções)",
+    "BBH": "Raciocínio (lógica)",
+    "MATH": "Cálculo (matemática)",
+    "GPQA": "Ciência (nível acadêmico)",
+    "MUSR": "Diálogo (interação complexa)",
+    "MMLU-PRO": "Conhecimento (profissional)"
+}
+
+ESCOPO_ECOSSISTEMA = "ecossistema"
+ESCOPO_SEGMENTO = "segmento"
+ESCOPO_MODELO = "modelo"
+
+
 def generate_analysis(data: dict) -> str:
     """
     Gera uma análise qualitativa detalhada sobre o progresso dos modelos de IA
@@ -10,15 +40,7 @@ def generate_analysis(data: dict) -> str:
     if not modelos or not metricas:
         return "Dados insuficientes para gerar a análise qualitativa do ecossistema."
 
-    # Mapeamento semântico das competências
-    competencias = {
-        "IFEval": "Obediência (seguir instruções)",
-        "BBH": "Raciocínio (lógica)",
-        "MATH": "Cálculo (matemática)",
-        "GPQA": "Ciência (nível acadêmico)",
-        "MUSR": "Diálogo (interação complexa)",
-        "MMLU-PRO": "Conhecimento (profissional)"
-    }
+    competencias = COMPETENCIAS
 
     # Encontrar métricas de maior e menor performance média
     metricas_ordenadas = []
@@ -56,4 +78,158 @@ def generate_analysis(data: dict) -> str:
         f"representando o estado da arte na aproximação das capacidades cognitivas humanas."
     )
     
-    return texto
\ No newline at end of file
+    return texto
+
+
+def snapshot_hash(snapshot) -> str:
+    """Hash do conteúdo do snapshot (nomes, segmentos, métricas e ESHMIA)."""
+    h = hashlib.sha256()
+    h.update("\0".join(snapshot.nomes).encode())
+    h.update("\0".join(str(t) for t in snapshot.tipos).encode())
+    h.update(np.ascontiguousarray(snapshot.matriz, dtype=np.float64).tobytes())
+    h.update(np.ascontiguousarray(snapshot.eshmia, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+def _extremos(diferencas: np.ndarray) -> tuple:
+    """Coluna de maior e de menor diferença de cada linha, ignorando NaN."""
+    validos = ~np.isnan(diferencas)
+    melhor = np.where(validos, diferencas, -np.inf).argmax(axis=1)
+    pior = np.where(validos, diferencas, np.inf).argmin(axis=1)
+    return melhor, pior
+
+
+def generate_model_narratives(snapshot) -> dict:
+    """{nome do modelo: texto} com pontos fortes e fracos em relação às médias do ecossistema."""
+    from .snapshot import COLUNA_ESHMIA
+
+    metricas = METRICAS
+    medias = np.array([snapshot.mean(m) for m in metricas])
+    diferencas = (snapshot.matriz - medias) * 100
+    melhor, pior = _extremos(diferencas)
+    linhas = np.arange(len(snapshot.nomes))
+    dif_melhor = diferencas[linhas, melhor].tolist()
+    dif_pior = diferencas[linhas, pior].tolist()
+    dif_eshmia = ((snapshot.eshmia - snapshot.mean(COLUNA_ESHMIA)) * 100).tolist()
+    nomes_metricas = [COMPETENCIAS.get(m, m) for m in metricas]
+
+    narrativas = {}
+    for i, nome in enumerate(snapshot.nomes):
+        eshmia = snapshot.eshmia[i]
+        if np.isnan(eshmia):
+            abertura = f"**{nome}**: ESHMIA não calculado (métricas incompletas)."
+        else:
+            abertura = (f"**{nome}**: ESHMIA de {eshmia:.4f} "
+                        f"({dif_eshmia[i]:+.1f} p.p. em relação à média do ecossistema).")
+        narrativas[nome] = (
+            f"{abertura} Ponto forte relativo: {nomes_metricas[melhor[i]]} ({dif_melhor[i]:+.1f} p.p.); "
+            f"ponto fraco relativo: {nomes_metricas[pior[i]]} ({dif_pior[i]:+.1f} p.p.)."
+        )
+    return narrativas
+
+
+def generate_segment_narratives(snapshot) -> dict:
+    """{tipo de modelo: texto}, a partir das células do cubo de segmentos."""
+    from .cube import TODOS, build_cube
+    from .snapshot import COLUNA_ESHMIA
+
+    celulas = snapshot.cached("cubo", build_cube)
+    metricas = METRICAS
+    por_tipo = {}
+    for c in celulas:
+        if c["fonte"] == TODOS and (c["metrica"] in metricas or c["metrica"] == COLUNA_ESHMIA):
+            por_tipo.setdefault(c["tipo"], {})[c["metrica"]] = c
+    ecossistema = por_tipo.pop(TODOS, {})
+    if not por_tipo or not ecossistema:
+        return {}
+
+    tipos = sorted(por_tipo)
+    medias = np.array([[por_tipo[t].get(m, {}).get("media", np.nan) for m in metricas] for t in tipos])
+    referencia = np.array([ecossistema.get(m, {}).get("media", np.nan) for m in metricas])
+    diferencas = (medias - referencia) * 100
+    melhor, pior = _extremos(diferencas)
+
+    narrativas = {}
+    for k, tipo in enumerate(tipos):
+        eshmia = por_tipo[tipo].get(COLUNA_ESHMIA)
+        if eshmia is None:
+            continue
+        dif = (eshmia["media"] - ecossistema[COLUNA_ESHMIA]["media"]) * 100
+        narrativas[tipo] = (
+            f"Modelos do tipo **{tipo}** ({eshmia['contagem']} com ESHMIA): eficiência média de "
+            f"{eshmia['media'] * 100:.1f}% do nível humano ({dif:+.1f} p.p. em relação ao ecossistema), "
+            f"liderados por **{eshmia['melhor_modelo']}**. "
+            f"Ponto forte relativo: {COMPETENCIAS.get(metricas[melhor[k]], metricas[melhor[k]])} "
+            f"({diferencas[k, melhor[k]]:+.1f} p.p.); ponto fraco relativo: "
+            f"{COMPETENCIAS.get(metricas[pior[k]], metricas[pior[k]])} ({diferencas[k, pior[k]]:+.1f} p.p.)."
+        )
+    return narrativas
+
+
+def build_analyses(snapshot) -> dict:
+    """Todas as narrativas de um snapshot: ecossistema, segmentos e modelos."""
+    from .snapshot import COLUNA_ESHMIA
+
+    # O líder é o primeiro da coluna ESHMIA ordenada; não é preciso varrer os modelos
+    lider = snapshot.top(COLUNA_ESHMIA, 1)
+    ecossistema = generate_analysis({
+        "modelos": [{"nome_normalizado": m["nome_normalizado"], "valor_eshmia": m["valor"]} for m in lider],
+        "eshmia_medio": snapshot.mean(COLUNA_ESHMIA),
+        "metricas_agregadas": snapshot.aggregate_metrics()
+    })
+    return {
+        ESCOPO_ECOSSISTEMA: ecossistema,
+        ESCOPO_SEGMENTO: generate_segment_narratives(snapshot),
+        ESCOPO_MODELO: generate_model_narratives(snapshot)
+    }
+
+
+def load_analyses(db_session, hash_snapshot: str):
+    """Narrativas gravadas para o hash, no formato de build_analyses, ou None."""
+    from . import database as db
+
+    linhas = db_session.query(db.Analise.escopo, db.Analise.chave, db.Analise.texto).filter(
+        db.Analise.hash_snapshot == hash_snapshot
+    ).all()
+    if not linhas:
+        return None
+    analises = {ESCOPO_ECOSSISTEMA: None, ESCOPO_SEGMENTO: {}, ESCOPO_MODELO: {}}
+    for escopo, chave, texto in linhas:
+        if escopo == ESCOPO_ECOSSISTEMA:
+            analises[escopo] = texto
+        else:
+            analises[escopo][chave] = texto
+    return analises
+
+
+def ensure_analyses(db_session, snapshot) -> dict:
+    """
+    Narrativas do snapshot: lidas do banco se o hash já foi analisado,
+    senão geradas em lote e gravadas.
+    """
+    from . import database as db
+
+    hash_snapshot = snapshot.cached("hash", snapshot_hash)
+    analises = load_analyses(db_session, hash_snapshot)
+    if analises is not None:
+        return analises
+
+    analises = build_analyses(snapshot)
+    linhas = [{"escopo": ESCOPO_ECOSSISTEMA, "chave": None, "texto": analises[ESCOPO_ECOSSISTEMA]}]
+    for escopo in (ESCOPO_SEGMENTO, ESCOPO_MODELO):
+        linhas.extend({"escopo": escopo, "chave": chave, "texto": texto} for chave, texto in analises[escopo].items())
+    db_session.bulk_insert_mappings(db.Analise, [
+        {"hash_snapshot": hash_snapshot, "lote_id": snapshot.batch_id, **linha} for linha in linhas
+    ])
+    db_session.commit()
+    return analises
+
+
+def generate_and_store_analyses(db_session, lote) -> dict:
+    """Etapa da sincronização após o cálculo: gera (ou reaproveita) as narrativas do lote."""
+    from .snapshot import load_snapshot
+
+    if lote is None:
+        return {}
+    print("📝 Gerando análises automáticas do lote...")
+    return ensure_analyses(db_session, load_snapshot(db_session, lote.id))
@@ -1,118 +1,685 @@
 
-from flask import Flask, jsonify, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory
 from flask_cors import CORS
-from sqlalchemy.orm import joinedload
-from sqlalchemy import func
 from sqlalchemy import func
 from datetime import datetime, timezone
 import os
+import re
+import mimetypes
+import numpy as np
 
 from . import database as db
-from .analysis import generate_analysis # Placeholder for now
+from . import events
+from . import history
+from . import indices
+from . import columnar
+from . import rankings
+from . import warmstart
+from . import instrumentation
+from . import sync_runs
+from .instrumentation import stage
+from .snapshot import get_snapshot, COLUNA_ESHMIA
+from .cube import build_cube, query_cube
+from .skyline import dominance_depths, pareto_frontier
+from .similarity import METODOS, SimilarityIndex, similarity_value
+from .analysis import ensure_analyses, ESCOPO_ECOSSISTEMA, ESCOPO_MODELO, ESCOPO_SEGMENTO
+
+# Pasta servida: frontend/ no desenvolvimento; ESHMIA_STATIC_DIR=dist para
+# servir os assets versionados e pré-comprimidos de build_assets.py
+# (a rota estática padrão do Flask fica desligada: tudo passa por _send_static)
+app = Flask(__name__, static_folder=None)
+STATIC_DIR = os.path.join(app.root_path, '..', os.getenv('ESHMIA_STATIC_DIR') or 'frontend')
 
-app = Flask(__name__, static_folder='../frontend', static_url_path='')
+# Arquivos com o hash do conteúdo no nome (assets/ e data/): a URL nunca muda de conteúdo
+CACHE_IMUTAVEL = 'public, max-age=31536000, immutable'
+_NOME_COM_HASH = re.compile(r'\.[0-9a-f]{16}\.[A-Za-z0-9]+$')
 
 # Enable CORS for API access
 CORS(app)
 
+# Server-Timing e histogramas por rota (ver instrumentation.py e /api/metrics)
+instrumentation.install(app)
+
 # --- Rota para servir o frontend ---
+def _send_static(path):
+    """
+    Envia um arquivo do frontend, usando a versão pré-comprimida (<arquivo>.gz)
+    quando existir e o cliente aceitar gzip. Arquivos com hash no nome ficam
+    em cache indefinidamente; os demais são sempre revalidados.
+    """
+    comprimido = path + '.gz'
+    if 'gzip' in request.accept_encodings and os.path.isfile(os.path.join(STATIC_DIR, comprimido)):
+        resposta = send_from_directory(STATIC_DIR, comprimido,
+                                       mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream')
+        resposta.headers['Content-Encoding'] = 'gzip'
+    else:
+        resposta = send_from_directory(STATIC_DIR, path)
+    resposta.vary.add('Accept-Encoding')
+    if _NOME_COM_HASH.search(path):
+        resposta.headers['Cache-Control'] = CACHE_IMUTAVEL
+    else:
+        resposta.headers['Cache-Control'] = 'no-cache'
+    return resposta
+
 @app.route('/')
 def serve_frontend():
     """Serve the main HTML file"""
-    return send_from_directory(app.static_folder, 'index.html')
+    return _send_static('index.html')
 
 @app.route('/<path:path>')
 def serve_static(path):
     """Serve static files (CSS, JS, etc.)"""
-    return send_from_directory(app.static_folder, path)
+    return _send_static(path)
 
 # --- Rota da API (Item 6) ---
 
+def _build_models_list(snapshot, modelo_ids=None):
+    """
+    Modelos com ESHMIA calculado (todos ou apenas os ids indicados), lidos do
+    snapshot do lote: o ESHMIA mais recente e as métricas normalizadas de
+    cada modelo, sem carregar o histórico de cálculos.
+    """
+    filtro = set(modelo_ids) if modelo_ids is not None else None
+    modelos_list = []
+    for i, nome in enumerate(snapshot.nomes):
+        if np.isnan(snapshot.eshmia[i]):  # Apenas inclui modelos com ESHMIA calculado
+            continue
+        if filtro is not None and snapshot.ids[i] not in filtro:
+            continue
+        modelos_list.append({
+            "nome_normalizado": nome,
+            "valor_eshmia": float(snapshot.eshmia[i]),
+            "valores_normalizados": {
+                metrica: float(valor)
+                for metrica, valor in zip(indices.METRICAS, snapshot.matriz[i].tolist()) if not np.isnan(valor)
+            }
+        })
+    return modelos_list
+
+def _resolve_index(snapshot):
+    """Coluna do snapshot para `?index=` (padrão: ESHMIA), ou None se o índice não existir."""
+    return snapshot.index_column(request.args.get('index', indices.INDICE_PADRAO).lower())
+
+def _apply_index(modelos_list, snapshot, coluna):
+    """Troca `valor_eshmia` pelo valor da variante escolhida (lida do snapshot)."""
+    if coluna == COLUNA_ESHMIA:
+        return modelos_list
+    valores = snapshot.colunas[coluna]
+    for model_info in modelos_list:
+        i = snapshot.index_of(model_info["nome_normalizado"])
+        valor = valores[i] if i is not None else np.nan
+        model_info["valor_eshmia"] = None if np.isnan(valor) else float(valor)
+    return modelos_list
+
+def _index_error():
+    return jsonify({
+        "erro": "Índice desconhecido.",
+        "indices": list(indices.INDICES)
+    }), 400
+
+def _analyses(db_session, snapshot):
+    """Narrativas do snapshot, carregadas (ou geradas) uma vez por lote."""
+    return snapshot.cached("analises", lambda s: ensure_analyses(db_session, s))
+
+def _parse_timestamp(valor):
+    """Timestamp ISO 8601 -> datetime UTC sem tzinfo (como gravado no banco)."""
+    instante = datetime.fromisoformat(valor.replace('Z', '+00:00'))
+    if instante.tzinfo is not None:
+        instante = instante.astimezone(timezone.utc).replace(tzinfo=None)
+    return instante
+
+def _parse_since(db_session, since):
+    """
+    Converte o parâmetro `since` (batch id ou timestamp ISO) no id do último
+    lote que o cliente já possui. Retorna None se o valor for inválido.
+    """
+    try:
+        return int(since)
+    except ValueError:
+        pass
+    try:
+        instante = _parse_timestamp(since)
+    except ValueError:
+        return None
+    ultimo = db_session.query(func.max(db.Lote.id)).filter(db.Lote.data_calculo <= instante).scalar()
+    return ultimo or 0
+
+def _status_payload(db_session, snapshot, coluna_indice, indice):
+    """Corpo do /api/status (sem o timestamp da requisição) para o índice escolhido."""
+    # --- Consulta de Dados ---
+
+    with stage("aggregate"):
+        # Modelos com ESHMIA e resultados normalizados, do snapshot do lote
+        modelos_list = _apply_index(_build_models_list(snapshot), snapshot, coluna_indice)
+        eshmia_medio = snapshot.mean(coluna_indice)  # Item 4.4
+        metricas_agregadas = snapshot.aggregate_metrics()
+
+    # --- Análise (Item 8): gerada na sincronização, lida pronta ---
+    with stage("analysis"):
+        analise_texto = _analyses(db_session, snapshot)[ESCOPO_ECOSSISTEMA]
+
+    # --- Montagem da Resposta JSON (Item 6.2) ---
+    return {
+        "batch_id": snapshot.batch_id,
+        "indice": indice,
+        "lista_modelos": modelos_list,
+        "eshmia_medio": eshmia_medio,
+        "metricas_agregadas": metricas_agregadas,
+        "analise_automatica": analise_texto
+    }
+
+def _default_status(db_session, snapshot):
+    """
+    Status do índice padrão, montado uma vez por lote e salvo em disco para a
+    partida a quente (ver warmstart.py).
+    """
+    def montar(s):
+        payload = _status_payload(db_session, s, COLUNA_ESHMIA, indices.INDICE_PADRAO)
+        warmstart.save(payload)
+        return payload
+    return snapshot.cached("status", montar)
+
+def prepare_status():
+    """Monta o status do lote atual (e o salva em disco) fora de uma requisição."""
+    db_session = next(db.get_db())
+    try:
+        return _default_status(db_session, get_snapshot(db_session))
+    finally:
+        db_session.close()
+
 @app.route('/api/status')
 def get_status():
     """
     Endpoint principal que retorna o estado consolidado do sistema.
+    Com `?since=<batch_id ou timestamp>` retorna apenas o delta (ver /api/delta).
+    Com `?index=<nome>` os valores e a média usam uma variante do índice
+    (ver /api/indices) em vez do ESHMIA.
+    Durante a partida a quente, responde com o último status salvo em disco.
     """
+    if request.args.get('since'):
+        return get_delta()
+
+    indice = request.args.get('index', indices.INDICE_PADRAO).lower()
     db_session = next(db.get_db())
     try:
-        # --- Consulta de Dados ---
-        
-        # Busca modelos com seus ESHMIA e resultados normalizados
-        models_data = db_session.query(db.Modelo).options(
-            joinedload(db.Modelo.eshmias),
-            joinedload(db.Modelo.resultados).joinedload(db.Resultado.metrica)
-        ).all()
-
-        # Calcula o ESHMIA médio do ecossistema (Item 4.4)
-        eshmia_medio_result = db_session.query(func.avg(db.Eshmia.valor_eshmia)).scalar()
-        eshmia_medio = eshmia_medio_result if eshmia_medio_result is not None else 0
-
-        # Prepara a lista de modelos para o JSON
-        modelos_list = []
-        for m in models_data:
-            if not m.eshmias:  # Apenas inclui modelos com ESHMIA calculado
-                continue
-            
-            model_info = {
-                "nome_normalizado": m.nome_normalizado,
-                "valor_eshmia": m.eshmias[0].valor_eshmia if m.eshmias else None,
-                "valores_normalizados": {
-                    res.metrica.nome: res.valor_normalizado 
-                    for res in m.resultados if res.valor_normalizado is not None
-                }
-            }
-            modelos_list.append(model_info)
-
-        # --- Métricas Agregadas (para os cards do frontend) ---
-        metricas_agregadas = {}
-        for metrica_nome in ["IFEval", "BBH", "MATH", "GPQA", "MUSR", "MMLU-PRO"]:
-            # Usando subqueries para encontrar o modelo correspondente ao max/min
-            
-            # Subquery para valor máximo
-            max_subquery = db_session.query(func.max(db.Resultado.valor_normalizado)).join(db.Metrica).filter(db.Metrica.nome == metrica_nome).scalar_subquery()
-            max_model_query = db_session.query(db.Modelo.nome_normalizado).join(db.Resultado).join(db.Metrica).filter(
-                db.Metrica.nome == metrica_nome,
-                db.Resultado.valor_normalizado == max_subquery
-            ).first()
-
-            # Subquery para valor mínimo
-            min_subquery = db_session.query(func.min(db.Resultado.valor_normalizado)).join(db.Metrica).filter(db.Metrica.nome == metrica_nome).scalar_subquery()
-            min_model_query = db_session.query(db.Modelo.nome_normalizado).join(db.Resultado).join(db.Metrica).filter(
-                db.Metrica.nome == metrica_nome,
-                db.Resultado.valor_normalizado == min_subquery
-            ).first()
-
-            # Cálculo da média da métrica
-            avg_val = db_session.query(func.avg(db.Resultado.valor_normalizado)).join(db.Metrica).filter(db.Metrica.nome == metrica_nome).scalar()
-
-            metricas_agregadas[metrica_nome] = {
-                "maximo": {"modelo": max_model_query[0] if max_model_query else "N/A"},
-                "minimo": {"modelo": min_model_query[0] if min_model_query else "N/A"},
-                "media": avg_val if avg_val is not None else 0
-            }
+        if indice == indices.INDICE_PADRAO and warmstart.current() is not None:
+            # Só enquanto nenhum lote mais novo que o salvo chegou ao banco
+            with stage("query"):
+                ultimo_lote = db_session.query(func.max(db.Lote.id)).scalar()
+            salvo = warmstart.current(ultimo_lote)
+            if salvo is not None:
+                return jsonify(salvo)
 
-        # --- Geração da Análise (Item 8) ---
-        # Por enquanto, usamos a função de placeholder
-        analise_texto = generate_analysis({
-            "modelos": modelos_list,
-            "eshmia_medio": eshmia_medio,
-            "metricas_agregadas": metricas_agregadas
-        })
+        # Agregados lidos do snapshot do lote (colunas ordenadas, sem subqueries)
+        with stage("query"):
+            snapshot = get_snapshot(db_session)
+        coluna_indice = _resolve_index(snapshot)
+        if coluna_indice is None:
+            return _index_error()
+
+        if coluna_indice == COLUNA_ESHMIA:
+            response_data = _default_status(db_session, snapshot)
+        else:
+            response_data = _status_payload(db_session, snapshot, coluna_indice, indice)
+        return jsonify({"timestamp": datetime.now(timezone.utc).isoformat(), **response_data})
+
+    finally:
+        db_session.close()
+
+@app.route('/api/delta')
+def get_delta():
+    """
+    Retorna apenas os modelos alterados (resultados ou ESHMIA) nos lotes
+    posteriores a `since`, mais os agregados atualizados. Usa os registros
+    de alteração gravados pelo calculador a cada lote.
+    """
+    since = request.args.get('since', '')
+    db_session = next(db.get_db())
+    try:
+        desde_lote = _parse_since(db_session, since)
+        if desde_lote is None:
+            return jsonify({"erro": "Parâmetro 'since' deve ser um batch id ou timestamp ISO 8601."}), 400
+        with stage("query"):
+            snapshot = get_snapshot(db_session)
+        coluna_indice = _resolve_index(snapshot)
+        if coluna_indice is None:
+            return _index_error()
+
+        with stage("query"):
+            modelo_ids = [
+                row[0] for row in db_session.query(db.Alteracao.modelo_id)
+                .filter(db.Alteracao.lote_id > desde_lote)
+                .distinct()
+            ]
+        with stage("aggregate"):
+            modelos_list = _build_models_list(snapshot, modelo_ids) if modelo_ids else []
+            modelos_list = _apply_index(modelos_list, snapshot, coluna_indice)
+            eshmia_medio = snapshot.mean(coluna_indice)
+            metricas_agregadas = snapshot.aggregate_metrics()
 
-        # --- Montagem da Resposta JSON (Item 6.2) ---
-        response_data = {
+        return jsonify({
             "timestamp": datetime.now(timezone.utc).isoformat(),
+            "batch_id": snapshot.batch_id,
+            "since": desde_lote,
+            "indice": request.args.get('index', indices.INDICE_PADRAO).lower(),
             "lista_modelos": modelos_list,
             "eshmia_medio": eshmia_medio,
-            "metricas_agregadas": metricas_agregadas,
-            "analise_automatica": analise_texto
-        }
-        
-        return jsonify(response_data)
+            "metricas_agregadas": metricas_agregadas
+        })
+
+    finally:
+        db_session.close()
+
+@app.route('/api/indices')
+def get_indices():
+    """Índices disponíveis (pesos normalizados) para `?index=` e /api/distribution."""
+    return jsonify({"indices": indices.describe()})
+
+@app.route('/api/columnar')
+def get_columnar():
+    """
+    Nomes, métricas normalizadas e ESHMIA do lote em formato colunar binário
+    (ver columnar.py), para os gráficos. A serialização é feita uma vez por
+    lote; o ETag é o batch id, então revalidações respondem 304 sem corpo.
+    """
+    db_session = next(db.get_db())
+    try:
+        snapshot = get_snapshot(db_session)
+    finally:
+        db_session.close()
+
+    conteudo = snapshot.cached("colunar", lambda s: columnar.encode_columns(s, s.batch_id))
+    resposta = Response(conteudo, mimetype=columnar.CONTENT_TYPE, headers={'Cache-Control': 'no-cache'})
+    resposta.set_etag(f"lote-{snapshot.batch_id}")
+    return resposta.make_conditional(request)
+
+@app.route('/api/analysis')
+def get_analysis():
+    """
+    Análises automáticas pré-geradas: do ecossistema, por tipo de modelo
+    (segment) e por modelo (model, repetível). Sem parâmetros, retorna a do
+    ecossistema e as de todos os segmentos.
+    """
+    db_session = next(db.get_db())
+    try:
+        with stage("query"):
+            snapshot = get_snapshot(db_session)
+        with stage("analysis"):
+            analises = _analyses(db_session, snapshot)
+    finally:
+        db_session.close()
+
+    resposta = {"batch_id": snapshot.batch_id, "ecossistema": analises[ESCOPO_ECOSSISTEMA]}
+    segmento = request.args.get('segment')
+    if segmento is not None:
+        resposta["segmentos"] = {segmento: analises[ESCOPO_SEGMENTO].get(segmento)}
+    else:
+        resposta["segmentos"] = analises[ESCOPO_SEGMENTO]
+    nomes = request.args.getlist('model')
+    if nomes:
+        resposta["modelos"] = {nome: analises[ESCOPO_MODELO].get(nome) for nome in nomes}
+    return jsonify(resposta)
+
+@app.route('/api/distribution/<metric>')
+def get_distribution(metric):
+    """
+    Distribuição de uma métrica normalizada (ou ESHMIA) no lote atual:
+    top-k/bottom-k modelos, percentis, histograma de largura fixa e,
+    opcionalmente, o percentil de um valor. Parâmetros: k (padrão 5),
+    p (lista separada por vírgulas, padrão 25,50,75,90), bins (padrão 10), value.
+    """
+    try:
+        k = int(request.args.get('k', 5))
+        bins = int(request.args.get('bins', 10))
+        percentis = [float(p) for p in request.args.get('p', '25,50,75,90').split(',') if p.strip()]
+        valor = float(request.args['value']) if request.args.get('value') else None
+    except ValueError:
+        return jsonify({"erro": "Parâmetros k, bins, p e value devem ser numéricos."}), 400
+    if k < 0 or not 1 <= bins <= 1000 or any(not 0 <= p <= 100 for p in percentis):
+        return jsonify({"erro": "Use k >= 0, 1 <= bins <= 1000 e percentis entre 0 e 100."}), 400
 
+    db_session = next(db.get_db())
+    try:
+        snapshot = get_snapshot(db_session)
     finally:
         db_session.close()
 
+    coluna = snapshot.resolve_column(metric)
+    if coluna is None:
+        return jsonify({"erro": f"Métrica '{metric}' desconhecida. Use uma de: {', '.join(snapshot.colunas)}."}), 404
+
+    resposta = {
+        "metrica": coluna,
+        "batch_id": snapshot.batch_id,
+        "modelos": snapshot.count(coluna),
+        "media": snapshot.mean(coluna),
+        "top": snapshot.top(coluna, k),
+        "bottom": snapshot.bottom(coluna, k),
+        "percentis": {f"{p:g}": v for p, v in snapshot.percentiles(coluna, percentis).items()},
+        "histograma": snapshot.histogram(coluna, bins)
+    }
+    if valor is not None:
+        resposta["percentil_do_valor"] = snapshot.percentile_of(coluna, valor)
+    return jsonify(resposta)
+
+@app.route('/api/cube')
+def get_cube():
+    """
+    Cubo de agregação por tipo × fonte × métrica (contagem, média, mínimo,
+    máximo e melhor modelo), montado uma vez por lote. Parâmetros opcionais
+    type, source e metric filtram as células; '*' seleciona os totais.
+    """
+    db_session = next(db.get_db())
+    try:
+        snapshot = get_snapshot(db_session)
+    finally:
+        db_session.close()
+
+    metrica = request.args.get('metric')
+    if metrica is not None and snapshot.resolve_column(metrica) is None:
+        return jsonify({"erro": f"Métrica '{metrica}' desconhecida. Use uma de: {', '.join(snapshot.colunas)}."}), 404
+
+    celulas = snapshot.cached("cubo", build_cube)
+    return jsonify({
+        "batch_id": snapshot.batch_id,
+        "celulas": query_cube(celulas, request.args.get('type'), request.args.get('source'), metrica)
+    })
+
+@app.route('/api/movers')
+def get_movers():
+    """
+    Maiores altas e quedas de posição, novos no ranking e modelos que saíram.
+    Parâmetros: since (batch id ou timestamp ISO; padrão: o lote anterior ao
+    atual), criterion (ESHMIA ou uma métrica; padrão ESHMIA), limit (padrão 10).
+    """
+    try:
+        limite = int(request.args.get('limit', 10))
+    except ValueError:
+        return jsonify({"erro": "Parâmetro limit deve ser inteiro."}), 400
+
+    db_session = next(db.get_db())
+    try:
+        atual = db_session.query(func.max(db.Lote.id)).scalar() or 0
+        if request.args.get('since'):
+            desde_lote = _parse_since(db_session, request.args['since'])
+            if desde_lote is None:
+                return jsonify({"erro": "Parâmetro 'since' deve ser um batch id ou timestamp ISO 8601."}), 400
+        else:
+            desde_lote = db_session.query(func.max(db.Lote.id)).filter(db.Lote.id < atual).scalar() or 0
+
+        criterio = request.args.get('criterion', rankings.CRITERIO_GERAL)
+        criterios = [rankings.CRITERIO_GERAL] + indices.METRICAS
+        criterio = next((c for c in criterios if c.lower() == criterio.lower()), None)
+        if criterio is None:
+            return jsonify({"erro": f"Critério desconhecido. Use um de: {', '.join(criterios)}."}), 400
+
+        return jsonify({
+            "batch_id": atual,
+            "since": desde_lote,
+            "criterio": criterio,
+            **rankings.query_movers(db_session, desde_lote, criterio, limite)
+        })
+
+    finally:
+        db_session.close()
+
+@app.route('/api/pareto')
+def get_pareto():
+    """
+    Fronteira de Pareto nas seis métricas: modelos que nenhum outro supera em
+    todas. Com `depth=k` lista a k-ésima camada de dominância; com `model=<nome>`
+    informa a profundidade desse modelo. Calculado uma vez por lote.
+    """
+    nome = request.args.get('model')
+    try:
+        profundidade = int(request.args.get('depth', 0))
+    except ValueError:
+        return jsonify({"erro": "depth deve ser um inteiro."}), 400
+
+    db_session = next(db.get_db())
+    try:
+        snapshot = get_snapshot(db_session)
+    finally:
+        db_session.close()
+
+    completos = snapshot.complete_rows()
+    resposta = {"batch_id": snapshot.batch_id, "modelos_avaliados": len(completos)}
+
+    if nome is None and profundidade == 0:
+        # Caso comum: só a fronteira, pelo caminho mais barato
+        fronteira = snapshot.cached(
+            "pareto_fronteira", lambda s: completos[pareto_frontier(s.matriz[completos])]
+        )
+        resposta["profundidade"] = 0
+        resposta["modelos"] = [snapshot.model_info(i) for i in fronteira]
+        return jsonify(resposta)
+
+    profundidades = snapshot.cached(
+        "pareto_profundidades", lambda s: dominance_depths(s.matriz[completos])
+    )
+    resposta["camadas"] = np.bincount(profundidades).tolist()
+
+    if nome is not None:
+        posicao = snapshot.complete_position(nome)
+        if posicao is None:
+            return jsonify({"erro": f"Modelo '{nome}' não encontrado ou sem as seis métricas."}), 404
+        resposta["modelo"] = snapshot.model_info(completos[posicao])
+        resposta["profundidade"] = int(profundidades[posicao])
+        return jsonify(resposta)
+
+    resposta["profundidade"] = profundidade
+    resposta["modelos"] = [snapshot.model_info(i) for i in completos[profundidades == profundidade]]
+    return jsonify(resposta)
+
+@app.route('/api/similar')
+def get_similar():
+    """
+    Modelos com perfil de competências mais parecido com o(s) modelo(s) indicado(s).
+    Parâmetros: model (repetível), k (padrão 10), method (cosine|euclidean).
+    """
+    nomes = request.args.getlist('model')
+    metodo = request.args.get('method', 'cosine')
+    try:
+        k = int(request.args.get('k', 10))
+    except ValueError:
+        return jsonify({"erro": "k deve ser um inteiro."}), 400
+    if not nomes:
+        return jsonify({"erro": "Informe ao menos um parâmetro 'model'."}), 400
+    if metodo not in METODOS:
+        return jsonify({"erro": f"method deve ser um de: {', '.join(METODOS)}."}), 400
+    if not 1 <= k <= 100:
+        return jsonify({"erro": "k deve estar entre 1 e 100."}), 400
+
+    db_session = next(db.get_db())
+    try:
+        snapshot = get_snapshot(db_session)
+    finally:
+        db_session.close()
+
+    completos = snapshot.complete_rows()
+    indice = snapshot.cached("similaridade", lambda s: SimilarityIndex(s.matriz[completos]))
+
+    resultados = []
+    for nome in nomes:
+        posicao = snapshot.complete_position(nome)
+        if posicao is None:
+            return jsonify({"erro": f"Modelo '{nome}' não encontrado ou sem as seis métricas."}), 404
+
+        vizinhos, pontuacoes = indice.query(posicao, k, metodo)
+        resultados.append({
+            "modelo": snapshot.model_info(completos[posicao]),
+            "similares": [
+                {**snapshot.model_info(completos[j]), **similarity_value(p, metodo)}
+                for j, p in zip(vizinhos, pontuacoes)
+            ]
+        })
+
+    return jsonify({"batch_id": snapshot.batch_id, "metodo": metodo, "resultados": resultados})
+
+@app.route('/api/uncertainty')
+def get_uncertainty():
+    """
+    Intervalos de confiança (bootstrap) do ESHMIA e estabilidade da posição de
+    cada modelo no lote mais recente que passou pela etapa estatística.
+    Parâmetros: model (opcional), limit (padrão 100, ordenado pela posição média).
+    """
+    nome = request.args.get('model')
+    try:
+        limite = int(request.args.get('limit', 100))
+    except ValueError:
+        return jsonify({"erro": "limit deve ser um inteiro."}), 400
+
+    db_session = next(db.get_db())
+    try:
+        lote_id = db_session.query(func.max(db.IntervaloEshmia.lote_id)).scalar()
+        query = db_session.query(db.IntervaloEshmia, db.Modelo.nome_normalizado).join(
+            db.Modelo, db.IntervaloEshmia.modelo_id == db.Modelo.id
+        ).filter(db.IntervaloEshmia.lote_id == lote_id)
+        if nome:
+            query = query.filter(db.Modelo.nome_normalizado == nome)
+        linhas = query.order_by(db.IntervaloEshmia.posicao_media).limit(limite).all()
+        if nome and not linhas:
+            return jsonify({"erro": f"Modelo '{nome}' sem intervalo calculado."}), 404
+
+        return jsonify({
+            "batch_id": lote_id,
+            "modelos": [
+                {
+                    "nome_normalizado": nome_normalizado,
+                    "ic_eshmia": [intervalo.ic_inferior, intervalo.ic_superior],
+                    "posicao_media": intervalo.posicao_media,
+                    "ic_posicao": [intervalo.posicao_ic_inferior, intervalo.posicao_ic_superior],
+                    "prob_primeiro": intervalo.prob_primeiro,
+                    "prob_top10": intervalo.prob_top10
+                }
+                for intervalo, nome_normalizado in linhas
+            ]
+        })
+
+    finally:
+        db_session.close()
+
+@app.route('/api/history')
+def get_history():
+    """
+    Série temporal do ESHMIA, já agregada no banco (mínimo/máximo/média por intervalo).
+    Parâmetros: model (nome normalizado; omitido = eshmia_medio do ecossistema),
+    bucket (hour|day|week|month, padrão day), start e end (timestamps ISO).
+    """
+    bucket = request.args.get('bucket', 'day')
+    if bucket not in history.BUCKETS:
+        return jsonify({"erro": f"bucket deve ser um de: {', '.join(history.BUCKETS)}."}), 400
+    try:
+        inicio = _parse_timestamp(request.args['start']) if request.args.get('start') else None
+        fim = _parse_timestamp(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        return jsonify({"erro": "start/end devem ser timestamps ISO 8601."}), 400
+
+    nome = request.args.get('model')
+    db_session = next(db.get_db())
+    try:
+        if nome:
+            modelo = db_session.query(db.Modelo).filter(db.Modelo.nome_normalizado == nome).first()
+            if modelo is None:
+                return jsonify({"erro": f"Modelo '{nome}' não encontrado."}), 404
+            serie = "valor_eshmia"
+            pontos = history.query_model_history(db_session, modelo.id, bucket, inicio, fim)
+        else:
+            serie = "eshmia_medio"
+            pontos = history.query_ecosystem_history(db_session, bucket, inicio, fim)
+
+        return jsonify({
+            "modelo": nome,
+            "serie": serie,
+            "bucket": bucket,
+            "pontos": pontos
+        })
+
+    finally:
+        db_session.close()
+
+@app.route('/api/sync/runs')
+def get_sync_runs():
+    """
+    Histórico das sincronizações (ver sync_runs.py): duração, status, tempos,
+    linhas, bytes lidos e memória por etapa, e alertas de etapas mais lentas
+    que a mediana. Parâmetros: origin (bridge_sync, run, updater), limit (padrão 20).
+    """
+    try:
+        limite = int(request.args.get('limit', 20))
+    except ValueError:
+        return jsonify({"erro": "Parâmetro limit deve ser inteiro."}), 400
+
+    db_session = next(db.get_db())
+    try:
+        return jsonify({"execucoes": sync_runs.list_runs(db_session, limite, request.args.get('origin'))})
+    finally:
+        db_session.close()
+
+@app.route('/api/sync/runs/<int:execucao_id>')
+def get_sync_run(execucao_id):
+    """Uma sincronização, com o perfil cProfile/tracemalloc quando capturado."""
+    db_session = next(db.get_db())
+    try:
+        execucao = sync_runs.get_run(db_session, execucao_id)
+    finally:
+        db_session.close()
+    if execucao is None:
+        return jsonify({"erro": "Execução não encontrada."}), 404
+    return jsonify(execucao)
+
+@app.route('/api/metrics')
+def get_metrics():
+    """
+    Histogramas cumulativos de duração, etapas e consultas SQL por rota, no
+    formato de texto do Prometheus (ver instrumentation.py).
+    """
+    return Response(instrumentation.render_metrics(), content_type=instrumentation.CONTENT_TYPE,
+                    headers={'Cache-Control': 'no-cache'})
+
+@app.route('/api/events')
+def stream_events():
+    """
+    Stream SSE com um evento por lote publicado (batch id + modelos alterados).
+    Substitui o polling de /api/status: o dashboard só busca dados quando
+    recebe um evento. Conexões ociosas apenas aguardam o broker, sem tocar no banco.
+
+    Cada conexão prende uma thread do servidor: acima de
+    ESHMIA_SSE_MAX_CONNECTIONS o stream só pede ao navegador que tente de
+    novo mais tarde (um 503 faria o EventSource desistir de vez).
+    """
+    events.broker.ensure_watcher()
+
+    if not events.broker.acquire():
+        return Response(f"retry: {events.RETRY_LOTADO_MS}\n: limite de conexões atingido\n\n",
+                        mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+    ultimo_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    try:
+        ultimo_id = int(ultimo_id)
+    except (TypeError, ValueError):
+        ultimo_id = events.broker.ultimo_id
+
+    def gerar(ultimo_id):
+        yield "retry: 5000\n\n"
+        while True:
+            pendentes = events.broker.wait_for(ultimo_id, timeout=15)
+            if not pendentes:
+                # Comentário SSE mantém proxies e a conexão vivos
+                yield ": keep-alive\n\n"
+                continue
+            for evento in pendentes:
+                ultimo_id = evento["id"]
+                yield events.format_sse(evento)
+
+    resposta = Response(gerar(ultimo_id), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # Chamado pelo servidor ao fechar a conexão, mesmo que o stream nem tenha começado
+    resposta.call_on_close(events.broker.release)
+    return resposta
+
 if __name__ == '__main__':
     # Este bloco permite executar o servidor Flask para teste
     # python -m backend.app
@@ -1,17 +1,12 @@
-from flask import Flask, jsonify, send_from_directory
-from flask_cors import CORS
-from sqlalchemy.orm import joinedload
-from sqlalchemy import func
-from datetime import datetime, timezone
 import os
 import threading
 
-from . import database as db
-from .analysis import generate_analysis
+from .app import app
 from .bridge_sync import run_sync
 
-app = Flask(__name__, static_folder='../frontend', static_url_path='')
-CORS(app)
+# Mesmo app/rotas de app.py; este módulo apenas dispara a sincronização
+# com o banco de origem ao iniciar. Ao terminar, o cálculo publica o novo
+# lote para os dashboards conectados em /api/events.
 
 # Executa a sincronização em uma thread separada ao iniciar
 def start_sync():
@@ -23,82 +18,6 @@ def start_sync():
 # Inicia a sincronização imediatamente
 threading.Thread(target=start_sync).start()
 
-@app.route('/')
-def serve_frontend():
-    return send_from_directory(app.static_folder, 'index.html')
-
-@app.route('/<path:path>')
-def serve_static(path):
-    return send_from_directory(app.static_folder, path)
-
-@app.route('/api/status')
-def get_status():
-    db_session = next(db.get_db())
-    try:
-        models_data = db_session.query(db.Modelo).options(
-            joinedload(db.Modelo.eshmias),
-            joinedload(db.Modelo.resultados).joinedload(db.Resultado.metrica)
-        ).all()
-
-        eshmia_medio_result = db_session.query(func.avg(db.Eshmia.valor_eshmia)).scalar()
-        eshmia_medio = eshmia_medio_result if eshmia_medio_result is not None else 0
-
-        modelos_list = []
-        for m in models_data:
-            if not m.eshmias:
-                continue
-            
-            model_info = {
-                "nome_normalizado": m.nome_normalizado,
-                "valor_eshmia": m.eshmias[0].valor_eshmia if m.eshmias else None,
-                "valores_normalizados": {
-                    res.metrica.nome: res.valor_normalizado 
-                    for res in m.resultados if res.valor_normalizado is not None
-                }
-            }
-            modelos_list.append(model_info)
-
-        metricas_agregadas = {}
-        for metrica_nome in ["IFEval", "BBH", "MATH", "GPQA", "MUSR", "MMLU-PRO"]:
-            max_subquery = db_session.query(func.max(db.Resultado.valor_normalizado)).join(db.Metrica).filter(db.Metrica.nome == metrica_nome).scalar_subquery()
-            max_model_query = db_session.query(db.Modelo.nome_normalizado).join(db.Resultado).join(db.Metrica).filter(
-                db.Metrica.nome == metrica_nome,
-                db.Resultado.valor_normalizado == max_subquery
-            ).first()
-
-            min_subquery = db_session.query(func.min(db.Resultado.valor_normalizado)).join(db.Metrica).filter(db.Metrica.nome == metrica_nome).scalar_subquery()
-            min_model_query = db_session.query(db.Modelo.nome_normalizado).join(db.Resultado).join(db.Metrica).filter(
-                db.Metrica.nome == metrica_nome,
-                db.Resultado.valor_normalizado == min_subquery
-            ).first()
-
-            avg_val = db_session.query(func.avg(db.Resultado.valor_normalizado)).join(db.Metrica).filter(db.Metrica.nome == metrica_nome).scalar()
-
-            metricas_agregadas[metrica_nome] = {
-                "maximo": {"modelo": max_model_query[0] if max_model_query else "N/A"},
-                "minimo": {"modelo": min_model_query[0] if min_model_query else "N/A"},
-                "media": avg_val if avg_val is not None else 0
-            }
-
-        analise_texto = generate_analysis({
-            "modelos": modelos_list,
-            "eshmia_medio": eshmia_medio,
-            "metricas_agregadas": metricas_agregadas
-        })
-
-        response_data = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "lista_modelos": modelos_list,
-            "eshmia_medio": eshmia_medio,
-            "metricas_agregadas": metricas_agregadas,
-            "analise_automatica": analise_texto
-        }
-        
-        return jsonify(response_data)
-
-    finally:
-        db_session.close()
-
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5001))
     app.run(debug=True, port=port)
@@ -1,36 +1,63 @@
 import os
 import sys
-from dotenv import load_dotenv
-
-# Carregar variáveis de ambiente
-load_dotenv()
 
 # Adicionar o diretório atual ao sys.path para importações locais
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from backend.database import engine, Base, SessionLocal
-from backend.collector import collect_and_store_data
-from backend.calculator import calculate_and_store_metrics
+def run_sync(capturar: bool = None, medir_pico: bool = False):
+    """
+    Coleta, cálculo, incerteza e análises, registrados em sync_runs (ver
+    backend/sync_runs.py). `capturar` liga cProfile/tracemalloc (padrão:
+    ESHMIA_SYNC_PROFILE); `medir_pico` mede o pico de memória por etapa,
+    zerando o do processo (só na linha de comando, fora do servidor).
+    """
+    # Importações feitas aqui: importar o módulo (ex.: app_with_sync) não
+    # carrega pandas, o driver do Postgres nem o engine do banco
+    from backend import database
+
+    # Carregar variáveis de ambiente (antes dos módulos que leem configurações ao importar)
+    database.load_environment()
+
+    from backend.collector import collect_and_store_data
+    from backend.calculator import calculate_and_store_metrics
+    from backend.uncertainty import calculate_and_store_intervals
+    from backend.analysis import generate_and_store_analyses, ESCOPO_MODELO
+    from backend.sync_runs import SyncRun, stage
 
-def run_sync():
     print("🔄 Iniciando sincronização do ESHMIA com o banco de dados Docker...")
     
-    # 1. Garantir que as tabelas existem no eshmia_db
+    # 1. Garantir que as tabelas (e as colunas novas) existem no eshmia_db
     print("📦 Inicializando tabelas no eshmia_db...")
-    Base.metadata.create_all(bind=engine)
+    mudancas = database.upgrade_db()
+    if mudancas:
+        print(f"🔧 Schema atualizado: {', '.join(mudancas)}")
     
     # Criar uma sessão do banco
-    db_session = SessionLocal()
+    db_session = database.SessionLocal()
     
     try:
-        # 2. Coletar dados do benchmark_db e salvar no eshmia_db
-        print("📥 Coletando dados do benchmark_db (Postgres Docker)...")
-        collect_and_store_data(db_session)
-        
-        # 3. Calcular o índice ESHMIA para os novos dados
-        print("🧮 Calculando índice ESHMIA...")
-        calculate_and_store_metrics(db_session)
-        
+        with SyncRun("bridge_sync", capturar, medir_pico):
+            # 2. Coletar dados do benchmark_db e salvar no eshmia_db
+            print("📥 Coletando dados do benchmark_db (Postgres Docker)...")
+            with stage("coleta") as etapa:
+                etapa["linhas"] = collect_and_store_data(db_session)["validos"]
+
+            # 3. Calcular o índice ESHMIA para os novos dados
+            print("🧮 Calculando índice ESHMIA...")
+            with stage("calculo") as etapa:
+                lote = calculate_and_store_metrics(db_session)
+                etapa["linhas"] = lote.modelos_calculados
+                etapa["lote_id"] = lote.id
+
+            # 4. Intervalos de confiança e estabilidade do ranking do novo lote
+            print("📈 Calculando intervalos de confiança (bootstrap)...")
+            with stage("incerteza") as etapa:
+                etapa["linhas"] = calculate_and_store_intervals(db_session, lote)
+
+            # 5. Análises automáticas do lote (ecossistema, segmentos e modelos)
+            with stage("analises") as etapa:
+                etapa["linhas"] = len(generate_and_store_analyses(db_session, lote).get(ESCOPO_MODELO, {}))
+
         print("✅ Sincronização e cálculo concluídos com sucesso.")
     except Exception as e:
         print(f"❌ Erro durante a sincronização: {e}")
@@ -42,4 +69,5 @@ def run_sync():
     print("✨ Processo de ponte concluído!")
 
 if __name__ == "__main__":
-    run_sync()
+    # --profile: captura cProfile/tracemalloc nesta execução
+    run_sync(capturar=True if '--profile' in sys.argv else None, medir_pico=True)
@@ -1,16 +1,38 @@
 
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func
+import numpy as np
 from . import database as db
+from . import events
+from . import history
+from . import indices
+from . import rankings
+from .indices import METRICAS, INDICE_PADRAO
 from datetime import datetime, timezone
 
+# Diferença mínima de ESHMIA para registrar alteração (ruído de ponto flutuante)
+TOLERANCIA_ALTERACAO = 1e-12
+
+def latest_eshmia_values(db_session: Session) -> dict:
+    """Retorna {modelo_id: valor_eshmia} do cálculo mais recente de cada modelo."""
+    ultimos = db_session.query(
+        func.max(db.Eshmia.id).label('eshmia_id')
+    ).group_by(db.Eshmia.modelo_id).subquery()
+    return dict(
+        db_session.query(db.Eshmia.modelo_id, db.Eshmia.valor_eshmia)
+        .join(ultimos, db.Eshmia.id == ultimos.c.eshmia_id)
+        .all()
+    )
+
 def calculate_and_store_metrics(db_session: Session):
     """
-    Calcula os valores normalizados e o ESHMIA para os modelos no banco.
+    Calcula os valores normalizados, o ESHMIA e as variantes do registro de
+    índices (indices.py) para os modelos no banco, gravando um novo lote.
     """
     print("Iniciando cálculo de métricas normalizadas e ESHMIA...")
 
-    # Não removemos mais tudo. Atualizamos conforme necessário.
-    # O ideal seria usar batch_id para manter histórico.
+    # Não removemos mais tudo: cada execução grava um novo lote (batch_id),
+    # mantendo o histórico de ESHMIA por modelo.
     print("Processando cálculos ESHMIA...")
 
     # Busca todos os modelos com seus resultados e métricas associadas
@@ -18,47 +40,110 @@ def calculate_and_store_metrics(db_session: Session):
         joinedload(db.Modelo.resultados).joinedload(db.Resultado.metrica)
     ).all()
 
-    for modelo in models:
-        if not modelo.resultados:
-            continue
+    # Cada execução é um lote; guardamos o valor anterior para registrar mudanças
+    valores_anteriores = latest_eshmia_values(db_session)
+    lote = db.Lote(data_calculo=datetime.now(timezone.utc), modelos_calculados=0, modelos_alterados=0)
+    db_session.add(lote)
+    db_session.flush()
+    alterados = []
+    valores_lote = []
 
-        # --- Normalização (Item 4.1) ---
-        normalized_scores = {}
-        raw_scores = {}
-        
+    # --- Normalização (Item 4.1): matriz modelos × métricas (NaN = ausente) ---
+    coluna_metrica = {nome: j for j, nome in enumerate(METRICAS)}
+    modelos_calculo = [m for m in models if m.resultados]
+    matriz = np.full((len(modelos_calculo), len(METRICAS)), np.nan)
+    alteracoes_metricas = []
+
+    for i, modelo in enumerate(modelos_calculo):
+        metricas_alteradas = []
         for resultado in modelo.resultados:
             if resultado.metrica.baseline_humano > 0:
                 # Normalizado é 0-1 (dado baseline=100 e cru=0-100)
                 valor_normalizado = resultado.valor_cru / resultado.metrica.baseline_humano
+                if resultado.valor_normalizado != valor_normalizado:
+                    metricas_alteradas.append(resultado.metrica.nome)
                 resultado.valor_normalizado = valor_normalizado
-                normalized_scores[resultado.metrica.nome] = valor_normalizado
-                raw_scores[resultado.metrica.nome] = resultado.valor_cru
+                j = coluna_metrica.get(resultado.metrica.nome)
+                if j is not None:
+                    matriz[i, j] = valor_normalizado
+        alteracoes_metricas.append(metricas_alteradas)
 
-        # --- Cálculo do ESHMIA (Item 4.3) ---
-        required_metrics = {"IFEval", "BBH", "MATH", "GPQA", "MUSR", "MMLU-PRO"}
-        
-        if required_metrics.issubset(normalized_scores.keys()):
-            # ESHMIA = média simples dos 6 indicadores NORMALIZADOS (0-1)
-            # Como o baseline é 100, e os dados são 0-100, isso resulta em 0-1.
-            # 1.0 = Nível Humano (100 pontos em todas as métricas)
-            eshmia_value = sum(normalized_scores[metrica] for metrica in required_metrics) / len(required_metrics)
-            
-            # --- Armazenamento do ESHMIA ---
-            # Verifica se já existe um cálculo recente para este modelo
-            # (Em um sistema real, usaríamos batch_id)
-            
+    # --- Cálculo do ESHMIA e das variantes (Item 4.3) ---
+    # Todos os índices do registro de uma vez: um produto matricial sobre os
+    # modelos com as seis métricas. O ESHMIA (pesos iguais) é a média simples
+    # dos indicadores normalizados; 1.0 = nível humano em todas as métricas.
+    completos = np.flatnonzero(~np.isnan(matriz).any(axis=1))
+    valores_indices = indices.evaluate(matriz[completos])
+    posicao_completo = {i: k for k, i in enumerate(completos)}
+    valores_variantes = []
+
+    for i, modelo in enumerate(modelos_calculo):
+        eshmia_value = None
+        k = posicao_completo.get(i)
+        if k is not None:
+            eshmia_value = float(valores_indices[INDICE_PADRAO][k])
+
+            # --- Armazenamento do ESHMIA e das variantes ---
             eshmia_entry = db.Eshmia(
                 modelo_id=modelo.id,
+                lote_id=lote.id,
                 valor_eshmia=eshmia_value,
-                data_calculo=datetime.now(timezone.utc)
+                data_calculo=lote.data_calculo
             )
             db_session.add(eshmia_entry)
+            for nome_indice, valores in valores_indices.items():
+                if nome_indice != INDICE_PADRAO:
+                    valores_variantes.append({
+                        "lote_id": lote.id,
+                        "modelo_id": modelo.id,
+                        "indice": nome_indice,
+                        "valor": float(valores[k])
+                    })
+            lote.modelos_calculados += 1
+            valores_lote.append(eshmia_value)
             print(f"ESHMIA para '{modelo.nome_normalizado}': {eshmia_value:.4f}")
         else:
             print(f"Não foi possível calcular ESHMIA para '{modelo.nome_normalizado}', métricas insuficientes.")
 
+        # --- Registro de alterações do lote (base do /api/delta e dos eventos) ---
+        metricas_alteradas = alteracoes_metricas[i]
+        valor_anterior = valores_anteriores.get(modelo.id)
+        eshmia_alterado = eshmia_value is not None and (
+            valor_anterior is None or abs(valor_anterior - eshmia_value) > TOLERANCIA_ALTERACAO
+        )
+        if metricas_alteradas or eshmia_alterado:
+            db_session.add(db.Alteracao(
+                lote_id=lote.id,
+                modelo_id=modelo.id,
+                valor_anterior=valor_anterior,
+                valor_novo=eshmia_value,
+                metricas_alteradas=",".join(metricas_alteradas) or None
+            ))
+            alterados.append(modelo.nome_normalizado)
+
+    db_session.bulk_insert_mappings(db.ValorIndice, valores_variantes)
+
+    # --- Posições no ranking (geral e por métrica): só as mudanças ---
+    eshmia_modelos = np.full(len(modelos_calculo), np.nan)
+    eshmia_modelos[completos] = valores_indices[INDICE_PADRAO]
+    rankings.store_rank_changes(
+        db_session, lote.id, [m.id for m in modelos_calculo],
+        [rankings.CRITERIO_GERAL] + METRICAS, np.column_stack([eshmia_modelos, matriz])
+    )
+    lote.modelos_alterados = len(alterados)
+    if valores_lote:
+        lote.eshmia_medio = sum(valores_lote) / len(valores_lote)
     db_session.commit()
-    print("Cálculos concluídos e armazenados.")
+    print(f"Cálculos concluídos e armazenados (lote {lote.id}, {len(alterados)} modelos alterados).")
+
+    # Notifica os dashboards conectados (SSE) apenas quando há dados novos
+    if alterados:
+        events.broker.publish(lote.id, alterados)
+
+    # Mantém o histórico limitado (política configurável em history.py)
+    history.compact_history(db_session)
+    history.prune_batches(db_session)
+    return lote
 
 
 if __name__ == '__main__':
@@ -4,10 +4,15 @@ Coletor de Dados - Carrega dados prioritariamente do PostgreSQL (Docker)
 """
 
 import os
+import json
+import math
 import datetime
-import pandas as pd
 from sqlalchemy.orm import Session
 from . import database as db
+from .indices import METRICAS
+from .resolution import EntityResolver, normalize_name
+from . import validation
+from .sync_runs import stage
 from .postgres_collector import PostgresCollector, convert_postgres_row_to_model_data
 
 def get_mock_data():
@@ -21,13 +26,19 @@ def get_mock_data():
         }
     ]
 
-def safe_float(value):
-    try:
-        return float(value)
-    except (ValueError, TypeError):
-        return 0.0
-
 CSV_FILE = "big_benchmarks_top100.csv"
+# Log de mudanças gravado pelo updater.py (uma linha JSON por modelo novo ou alterado)
+CHANGES_FILE = "big_benchmarks_changes.jsonl"
+
+# Coluna do CSV de cada métrica
+COLUNAS_CSV = {
+    "IFEval": "ifeval",
+    "BBH": "bbh",
+    "MATH": "math",
+    "GPQA": "gpqa",
+    "MUSR": "musr",
+    "MMLU-PRO": "mmlu_pro"
+}
 
 def load_csv_data(filepath: str = CSV_FILE) -> list:
     """
@@ -37,118 +48,252 @@ def load_csv_data(filepath: str = CSV_FILE) -> list:
         print(f"⚠️ Arquivo CSV {filepath} não encontrado.")
         return []
     
+    import pandas as pd  # só o caminho do CSV precisa do pandas
+
     try:
         print(f"📂 Carregando dados do CSV: {filepath}")
         df = pd.read_csv(filepath)
-        model_list = []
-        for _, row in df.iterrows():
-            model_list.append({
-                "nome": str(row.get("model", "Unknown")),
-                "fonte": "Open LLM Leaderboard (CSV)",
-                "metricas": {
-                    "IFEval": safe_float(row.get("ifeval", 0)),
-                    "BBH": safe_float(row.get("bbh", 0)),
-                    "MATH": safe_float(row.get("math", 0)),
-                    "GPQA": safe_float(row.get("gpqa", 0)),
-                    "MUSR": safe_float(row.get("musr", 0)),
-                    "MMLU-PRO": safe_float(row.get("mmlu_pro", 0))
-                },
-                "url_origem": "https://huggingface.co/spaces/open-llm-leaderboard"
-            })
+        df = df.astype(object).where(df.notna(), None)
+        # Valores brutos: a conversão e a validação são feitas por coluna em validation.py
+        colunas = {metrica: df[COLUNAS_CSV[metrica]].tolist() if COLUNAS_CSV[metrica] in df else [None] * len(df)
+                   for metrica in METRICAS}
+        atributos = {campo: df[campo].tolist() if campo in df else [None] * len(df)
+                     for campo in ("model", "type", "rank", "average", "co2_cost")}
+        registros = [
+            {**{campo: atributos[campo][i] for campo in atributos},
+             **{COLUNAS_CSV[metrica]: colunas[metrica][i] for metrica in METRICAS}}
+            for i in range(len(df))
+        ]
+        model_list = [_csv_model(registro) for registro in registros]
         return model_list
     except Exception as e:
         print(f"❌ Erro ao ler CSV: {e}")
         return []
 
-def collect_and_store_data(db_session: Session, use_real_data: bool = True, limit: int = 150):
+def _csv_model(registro: dict) -> dict:
+    """Linha no formato do CSV do leaderboard (model, type, ifeval...) como model_data do coletor."""
+    return {
+        "nome": registro.get("model"),
+        "fonte": "Open LLM Leaderboard (CSV)",
+        "tipo": registro.get("type"),
+        "rank": registro.get("rank"),
+        "average": registro.get("average"),
+        "co2_cost": registro.get("co2_cost"),
+        "metricas": {metrica: registro.get(COLUNAS_CSV[metrica]) for metrica in METRICAS},
+        "url_origem": "https://huggingface.co/spaces/open-llm-leaderboard"
+    }
+
+def load_change_log(filepath: str = CHANGES_FILE, desde: int = 0) -> tuple:
+    """
+    Modelos novos ou alterados registrados pelo updater.py depois da sequência
+    `desde`, no formato de load_csv_data. Retorna (model_list, último seq).
+    Um modelo alterado várias vezes entra uma só vez, com a linha mais recente.
+    """
+    if not os.path.exists(filepath):
+        return [], desde
+    linhas = {}
+    ultimo = desde
+    with open(filepath, encoding='utf-8') as f:
+        for linha in f:
+            if not linha.strip():
+                continue
+            mudanca = json.loads(linha)
+            if mudanca["seq"] <= desde:
+                continue
+            # Campos vazios do CSV são ausentes (None), como no pandas
+            linhas[normalize_name(mudanca["model"])] = {k: (v if v != "" else None) for k, v in mudanca["linha"].items()}
+            ultimo = mudanca["seq"]
+    return [_csv_model(registro) for registro in linhas.values()], ultimo
+
+def collect_changes(db_session: Session, filepath: str = CHANGES_FILE) -> int:
+    """
+    Coleta só as mudanças do log ainda não aplicadas neste banco. A posição
+    fica na tabela cursores_log, por caminho do log; aplicar de novo é
+    inofensivo (o coletor só grava valores diferentes). Retorna o número de
+    modelos aplicados.
+    """
+    arquivo = os.path.abspath(filepath)
+    cursor = db_session.get(db.CursorLog, arquivo)
+    desde = cursor.seq if cursor else 0
+
+    model_list, ultimo = load_change_log(filepath, desde)
+    if not model_list:
+        print(f"✅ Nenhuma mudança pendente em {filepath} (seq {desde}).")
+        return 0
+    print(f"📜 {len(model_list)} modelos alterados no log de mudanças (seq {desde + 1} a {ultimo})")
+    collect_and_store_data(db_session, model_list=model_list)
+    cursor = db_session.get(db.CursorLog, arquivo) or db.CursorLog(arquivo=arquivo)
+    cursor.seq = ultimo
+    db_session.add(cursor)
+    db_session.commit()
+    return len(model_list)
+
+def _model_attributes(model_data: dict) -> dict:
+    """Atributos descritivos do modelo (tipo, rank, average, co2_cost) prontos para o banco."""
+    def opcional(valor, conversor):
+        try:
+            if valor is None or (isinstance(valor, float) and math.isnan(valor)) or valor in ('-', 'N/A', ''):
+                return None
+            return conversor(valor)
+        except (ValueError, TypeError):
+            return None
+
+    return {
+        "tipo": opcional(model_data.get("tipo"), str),
+        "rank": opcional(model_data.get("rank"), lambda v: int(float(v))),
+        "average": opcional(model_data.get("average"), float),
+        "co2_cost": opcional(model_data.get("co2_cost"), float)
+    }
+
+def collect_and_store_data(db_session: Session, use_real_data: bool = True, limit: int = 150,
+                           model_list: list = None):
     """
     Carrega dados do PostgreSQL Docker, CSV ou Mock e armazena no eshmia_db local.
+    Com `model_list` (ex.: mudanças do log do updater), grava só esses modelos.
     """
-    print(f"\n🔍 Iniciando coleta de dados (Modo: {'Real' if use_real_data else 'Mock'})...")
-    
-    model_list = []
-    required_metrics = ["IFEval", "BBH", "MATH", "GPQA", "MUSR", "MMLU-PRO"]
+    incremental = model_list is not None
+    modo = 'Incremental' if incremental else 'Real' if use_real_data else 'Mock'
+    print(f"\n🔍 Iniciando coleta de dados (Modo: {modo})...")
+
+    model_list = list(model_list or [])
+    required_metrics = METRICAS
     
     # 1. Tenta Postgres se solicitado
-    if use_real_data:
+    if use_real_data and not incremental:
         pg_collector = PostgresCollector()
         if pg_collector.connect():
-            pg_data = pg_collector.get_latest_data(limit=limit)
+            with stage("consulta_fonte") as etapa:
+                pg_data = pg_collector.get_latest_data(limit=limit)
+                etapa["linhas"] = len(pg_data)
             for row in pg_data:
                 try:
-                    model_data = convert_postgres_row_to_model_data(row)
-                    if any(metric in model_data.get('metricas', {}) for metric in required_metrics):
-                        model_list.append(model_data)
+                    model_list.append(convert_postgres_row_to_model_data(row))
                 except Exception as e:
                     print(f"⚠️ Erro ao converter linha do Postgres: {e}")
                     continue
             pg_collector.disconnect()
     
     # 2. Tenta CSV como fallback secundário se model_list estiver vazio e use_real_data for True
-    if not model_list and use_real_data:
+    if not model_list and use_real_data and not incremental:
         print("⚠️ Falha na conexão com Postgres. Tentando carregar do CSV...")
-        model_list = load_csv_data()
+        with stage("leitura_csv") as etapa:
+            model_list = load_csv_data()
+            etapa["linhas"] = len(model_list)
         if model_list:
             model_list = model_list[:limit]
     
     # 3. Tenta Mock como último recurso
-    if not model_list:
+    if not model_list and not incremental:
         print(f"⚠️ {'Nenhum dado encontrado em Postgres/CSV' if use_real_data else 'Usando dados Mock por solicitação'}. Usando Mock...")
         model_list = get_mock_data()
 
-    print(f"📦 Processando {len(model_list)} modelos para o banco de dados ESHMIA...")
+    # Validação do lote (faixas, sentinelas, duplicados, métricas ausentes)
+    model_list, quarentena, estatisticas = validation.validate_models(model_list)
+    print(validation.format_report(estatisticas))
+    if quarentena:
+        db_session.bulk_insert_mappings(db.Quarentena, quarentena)
 
-    # Garante que as métricas existem no banco ESHMIA
-    for m_nome in required_metrics:
-        if not db_session.query(db.Metrica).filter(db.Metrica.nome == m_nome).first():
-            db_session.add(db.Metrica(nome=m_nome, baseline_humano=100.0, fonte_baseline='Human Baseline'))
-    db_session.commit()
+    print(f"📦 Processando {len(model_list)} modelos para o banco de dados ESHMIA...")
 
+    # Garante que as métricas existem no banco ESHMIA (uma consulta para todas)
     metricas_db = {m.nome: m for m in db_session.query(db.Metrica).all()}
+    faltantes = [m_nome for m_nome in required_metrics if m_nome not in metricas_db]
+    if faltantes:
+        for m_nome in faltantes:
+            metricas_db[m_nome] = db.Metrica(nome=m_nome, baseline_humano=100.0, fonte_baseline='Human Baseline')
+            db_session.add(metricas_db[m_nome])
+        db_session.commit()
     
+    # Resolução de duplicados: modelos e aliases já conhecidos, carregados uma vez
+    modelos_db = {m.id: m for m in db_session.query(db.Modelo).all()}
+    resolver = EntityResolver()
+    for modelo in modelos_db.values():
+        resolver.add(modelo.nome_normalizado, modelo.id)
+    # Nomes gravados (normalizados, com "/" trocada por "-"): casam antes das regras do resolvedor
+    ids_por_nome = {modelo.nome_normalizado: modelo.id for modelo in modelos_db.values()}
+    aliases_conhecidos = set()
+    for alias, modelo_id in db_session.query(db.AliasModelo.alias, db.AliasModelo.modelo_id):
+        resolver.add(alias, modelo_id)
+        aliases_conhecidos.add(alias)
+        ids_por_nome.setdefault(alias, modelo_id)
+
+    # Resultados já gravados, por (modelo, métrica): evita um SELECT por valor
+    resultados_db = {(r.modelo_id, r.metrica_id): r for r in db_session.query(db.Resultado).all()}
+
     models_added = 0
+    models_merged = 0
     results_added = 0
+    results_updated = 0
     
     for model_data in model_list:
         model_name = model_data.get("nome", "Unknown")
         model_metrics = model_data.get("metricas", {})
         
-        normalized_name = model_name.lower().replace(" ", "-").replace("/", "-")
-        existing = db_session.query(db.Modelo).filter(
-            db.Modelo.nome_normalizado == normalized_name
-        ).first()
+        normalized_name = normalize_name(model_name)
+        modelo_id, similaridade = ids_por_nome.get(normalized_name), 1.0
+        if modelo_id is None:
+            modelo_id, similaridade = resolver.resolve(model_name)
+        existing = modelos_db.get(modelo_id)
+
+        # Outra grafia de um modelo conhecido: registra o alias
+        if existing and existing.nome_normalizado != normalized_name and normalized_name not in aliases_conhecidos:
+            db_session.add(db.AliasModelo(
+                alias=normalized_name,
+                modelo_id=existing.id,
+                fonte=model_data.get("fonte"),
+                similaridade=similaridade
+            ))
+            aliases_conhecidos.add(normalized_name)
+            ids_por_nome[normalized_name] = existing.id
+            resolver.add(model_name, existing.id)
+            models_merged += 1
         
+        atributos = _model_attributes(model_data)
         if existing:
             modelo = existing
+            for campo, valor in atributos.items():
+                if valor is not None:
+                    setattr(modelo, campo, valor)
         else:
             modelo = db.Modelo(
                 nome_normalizado=normalized_name,
                 fonte=model_data.get("fonte", "Postgres Docker"),
-                url_origem=model_data.get("url_origem", "")
+                url_origem=model_data.get("url_origem", ""),
+                **atributos
             )
             db_session.add(modelo)
             db_session.flush()
+            modelos_db[modelo.id] = modelo
+            ids_por_nome[normalized_name] = modelo.id
+            resolver.add(model_name, modelo.id)
             models_added += 1
         
         for metrica_nome, valor in model_metrics.items():
             if metrica_nome in metricas_db:
-                res_existente = db_session.query(db.Resultado).filter(
-                    db.Resultado.modelo_id == modelo.id,
-                    db.Resultado.metrica_id == metricas_db[metrica_nome].id
-                ).first()
+                chave = (modelo.id, metricas_db[metrica_nome].id)
+                res_existente = resultados_db.get(chave)
                 
+                # valor_normalizado fica vazio até o cálculo: o calculador
+                # normaliza e registra a alteração no lote.
                 if not res_existente:
                     resultado = db.Resultado(
                         modelo_id=modelo.id,
                         metrica_id=metricas_db[metrica_nome].id,
                         valor_cru=valor, 
-                        valor_normalizado=valor / 100.0 
+                        valor_normalizado=None
                     )
                     db_session.add(resultado)
+                    resultados_db[chave] = resultado
                     results_added += 1
+                elif res_existente.valor_cru != valor:
+                    res_existente.valor_cru = valor
+                    res_existente.valor_normalizado = None
+                    res_existente.data_coleta = datetime.datetime.now(datetime.timezone.utc)
+                    results_updated += 1
     
     db_session.commit()
-    print(f"✅ Sincronização de dados finalizada: {models_added} novos modelos, {results_added} novos resultados.")
+    print(f"✅ Sincronização de dados finalizada: {models_added} novos modelos, {models_merged} grafias fundidas, {results_added} novos resultados, {results_updated} resultados atualizados.")
+    return estatisticas
 
 def get_real_data(limit: int = 100):
     pg_collector = PostgresCollector()
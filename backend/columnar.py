@@ -0,0 +1,61 @@
+"""
+Exportação colunar binária do snapshot, para os gráficos do dashboard.
+
+Os gráficos só precisam de vetores de números; no JSON cada modelo repete os
+nomes das seis métricas. Aqui cada coluna vai contígua, em float32
+little-endian, e o navegador monta um Float32Array direto sobre o buffer.
+
+Formato:
+- uint32 (little-endian): tamanho do cabeçalho em bytes;
+- cabeçalho JSON em UTF-8 (completado com espaços até múltiplo de 4): formato,
+  batch_id, número de modelos e, para a tabela de nomes e cada coluna, o
+  deslocamento e o tamanho em bytes contados a partir do fim do cabeçalho;
+- tabela de nomes: UTF-8, separados por '\\n' (completada com zeros);
+- uma coluna float32 por métrica e uma para o ESHMIA (NaN = ausente).
+
+Entram os modelos com ESHMIA, em ordem decrescente de ESHMIA. Todos os
+deslocamentos são múltiplos de 4 (exigência do Float32Array).
+"""
+
+import json
+import struct
+import numpy as np
+from .indices import METRICAS
+from .snapshot import COLUNA_ESHMIA
+
+FORMATO = 1
+CONTENT_TYPE = "application/octet-stream"
+
+
+def _alinhar(conteudo: bytes, preenchimento: bytes = b"\0") -> bytes:
+    """Completa o bloco até um múltiplo de 4 bytes."""
+    return conteudo + preenchimento * (-len(conteudo) % 4)
+
+
+def encode_columns(snapshot, batch_id=None) -> bytes:
+    """
+    Serializa nomes, métricas e ESHMIA do snapshot no formato colunar. O
+    build estático não informa o lote (o mesmo CSV gera os mesmos bytes).
+    """
+    ordem = snapshot.order(COLUNA_ESHMIA)
+    blocos = [("nomes", "\n".join(snapshot.nomes[i] for i in ordem).encode('utf-8'))]
+    for coluna in METRICAS + [COLUNA_ESHMIA]:
+        valores = np.ascontiguousarray(snapshot.colunas[coluna][ordem], dtype='<f4')
+        blocos.append((coluna, valores.tobytes()))
+
+    # Tamanho real de cada bloco; o próximo começa no múltiplo de 4 seguinte
+    deslocamento = 0
+    secoes = {}
+    for nome, conteudo in blocos:
+        secoes[nome] = {"offset": deslocamento, "bytes": len(conteudo)}
+        deslocamento += len(_alinhar(conteudo))
+
+    cabecalho = {
+        "formato": FORMATO,
+        "batch_id": batch_id,
+        "modelos": len(ordem),
+        "nomes": secoes.pop("nomes"),
+        "colunas": secoes
+    }
+    cabecalho = _alinhar(json.dumps(cabecalho, separators=(',', ':')).encode('utf-8'), b" ")
+    return struct.pack('<I', len(cabecalho)) + cabecalho + b"".join(_alinhar(conteudo) for _, conteudo in blocos)
@@ -0,0 +1,87 @@
+"""
+Cubo de agregação por segmento: tipo do modelo × fonte × métrica.
+
+Para cada célula guarda contagem, média, mínimo, máximo e o modelo com o
+maior valor (argmax), incluindo os totais ("*") por tipo, por fonte e geral.
+É montado uma vez por lote, a partir das colunas do snapshot, com operações
+agrupadas do NumPy (bincount / ufunc.at); as consultas só filtram células.
+"""
+
+import numpy as np
+
+TODOS = "*"  # valor da dimensão nas células de total
+SEM_SEGMENTO = "Unknown"
+
+
+def _agrupar(chaves: np.ndarray, valores: np.ndarray, n_grupos: int) -> dict:
+    """Estatísticas de `valores` (sem NaN) por grupo `chaves` (0..n_grupos-1)."""
+    contagem = np.bincount(chaves, minlength=n_grupos)
+    soma = np.bincount(chaves, weights=valores, minlength=n_grupos)
+    minimo = np.full(n_grupos, np.inf)
+    maximo = np.full(n_grupos, -np.inf)
+    np.minimum.at(minimo, chaves, valores)
+    np.maximum.at(maximo, chaves, valores)
+
+    # argmax por grupo: ordena por (grupo, valor) e pega o último de cada
+    # grupo; empates ficam com a primeira linha, como no resto da API.
+    linhas = np.arange(len(valores))
+    ordem = np.lexsort((-linhas, valores, chaves))
+    ultimos = np.flatnonzero(np.r_[chaves[ordem][1:] != chaves[ordem][:-1], True])
+    melhor = np.full(n_grupos, -1)
+    melhor[chaves[ordem][ultimos]] = ordem[ultimos]
+    return {"contagem": contagem, "soma": soma, "minimo": minimo, "maximo": maximo, "melhor": melhor}
+
+
+def build_cube(snapshot) -> list:
+    """Células do cubo para todas as colunas do snapshot (métricas, ESHMIA e variantes)."""
+    tipos = np.array([t or SEM_SEGMENTO for t in snapshot.tipos], dtype=object)
+    fontes = np.array([f or SEM_SEGMENTO for f in snapshot.fontes], dtype=object)
+    nomes_tipo, codigo_tipo = np.unique(tipos.astype(str), return_inverse=True)
+    nomes_fonte, codigo_fonte = np.unique(fontes.astype(str), return_inverse=True)
+    nomes_tipo = list(nomes_tipo) + [TODOS]
+    nomes_fonte = list(nomes_fonte) + [TODOS]
+    n_tipos, n_fontes = len(nomes_tipo), len(nomes_fonte)
+    total_tipo, total_fonte = n_tipos - 1, n_fontes - 1
+
+    # Cada linha entra em quatro células: (tipo, fonte), (tipo, *), (*, fonte), (*, *)
+    pares = [
+        (codigo_tipo, codigo_fonte),
+        (codigo_tipo, np.full_like(codigo_fonte, total_fonte)),
+        (np.full_like(codigo_tipo, total_tipo), codigo_fonte),
+        (np.full_like(codigo_tipo, total_tipo), np.full_like(codigo_fonte, total_fonte)),
+    ]
+    chaves_base = np.concatenate([t * n_fontes + f for t, f in pares]).ravel()
+    linhas_base = np.tile(np.arange(len(snapshot.nomes)), len(pares))
+
+    celulas = []
+    for coluna, valores in snapshot.colunas.items():
+        valores_base = valores[linhas_base]
+        validos = ~np.isnan(valores_base)
+        if not validos.any():
+            continue
+        chaves = chaves_base[validos]
+        estatisticas = _agrupar(chaves, valores_base[validos], n_tipos * n_fontes)
+        linhas = linhas_base[validos]
+        for chave in np.flatnonzero(estatisticas["contagem"]):
+            melhor = linhas[estatisticas["melhor"][chave]]
+            celulas.append({
+                "tipo": nomes_tipo[chave // n_fontes],
+                "fonte": nomes_fonte[chave % n_fontes],
+                "metrica": coluna,
+                "contagem": int(estatisticas["contagem"][chave]),
+                "media": float(estatisticas["soma"][chave] / estatisticas["contagem"][chave]),
+                "minimo": float(estatisticas["minimo"][chave]),
+                "maximo": float(estatisticas["maximo"][chave]),
+                "melhor_modelo": snapshot.nomes[melhor]
+            })
+    return celulas
+
+
+def query_cube(celulas: list, tipo: str = None, fonte: str = None, metrica: str = None) -> list:
+    """Filtra as células; dimensões omitidas (None) não filtram."""
+    return [
+        c for c in celulas
+        if (tipo is None or c["tipo"].lower() == tipo.lower())
+        and (fonte is None or c["fonte"].lower() == fonte.lower())
+        and (metrica is None or c["metrica"].lower() == metrica.lower())
+    ]
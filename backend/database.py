@@ -1,37 +1,71 @@
 import os
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey
-from sqlalchemy.orm import declarative_base, sessionmaker, relationship
+import threading
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, ForeignKey, Index, Text
+from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy.sql import func
 from datetime import datetime, timezone
-from dotenv import load_dotenv
-
-# Carrega variáveis do arquivo .env
-load_dotenv()
-
-# --- Configuração do Banco de Dados ---
-DB_TYPE = os.getenv('DB_TYPE', 'sqlite') # Default para sqlite para evitar erros no deploy
-
-if DB_TYPE == 'postgresql':
-    POSTGRES_HOST = os.getenv('POSTGRES_HOST')
-    POSTGRES_PORT = os.getenv('POSTGRES_PORT')
-    POSTGRES_DB = os.getenv('POSTGRES_DB')
-    POSTGRES_USER = os.getenv('POSTGRES_USER')
-    POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD')
-    
-    # Se faltarem variáveis, tenta usar SQLite em vez de travar o build
-    if not all([POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT, POSTGRES_DB]):
-        print("⚠️ Variáveis PostgreSQL incompletas no .env ou ambiente. Usando SQLite (project.db).")
-        DATABASE_URL = "sqlite:///project.db"
+
+# O .env, a URL do banco e o engine só são resolvidos no primeiro uso
+# (get_engine / get_db / init_db): importar o módulo não abre conexões nem lê
+# arquivos. `engine`, `SessionLocal` e `DATABASE_URL` continuam acessíveis
+# como atributos do módulo (ver __getattr__ no fim do arquivo).
+_estado = {}
+_lock = threading.Lock()
+
+
+def load_environment():
+    """Carrega variáveis do arquivo .env (uma vez por processo)."""
+    if "dotenv" not in _estado:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _estado["dotenv"] = True
+
+
+def database_url() -> str:
+    """URL do banco a partir do ambiente (.env incluído)."""
+    load_environment()
+
+    # --- Configuração do Banco de Dados ---
+    DB_TYPE = os.getenv('DB_TYPE', 'sqlite') # Default para sqlite para evitar erros no deploy
+
+    if DB_TYPE == 'postgresql':
+        POSTGRES_HOST = os.getenv('POSTGRES_HOST')
+        POSTGRES_PORT = os.getenv('POSTGRES_PORT')
+        POSTGRES_DB = os.getenv('POSTGRES_DB')
+        POSTGRES_USER = os.getenv('POSTGRES_USER')
+        POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD')
+
+        # Se faltarem variáveis, tenta usar SQLite em vez de travar o build
+        if not all([POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT, POSTGRES_DB]):
+            print("⚠️ Variáveis PostgreSQL incompletas no .env ou ambiente. Usando SQLite (project.db).")
+            DATABASE_URL = "sqlite:///project.db"
+        else:
+            # Desativa SSL para conexões localhost/Docker
+            is_localhost = POSTGRES_HOST in ['localhost', '127.0.0.1', '0.0.0.0']
+            ssl_mode = 'disable' if is_localhost else 'require'
+            DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}?sslmode={ssl_mode}"
     else:
-        # Desativa SSL para conexões localhost/Docker
-        is_localhost = POSTGRES_HOST in ['localhost', '127.0.0.1', '0.0.0.0']
-        ssl_mode = 'disable' if is_localhost else 'require'
-        DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}?sslmode={ssl_mode}"
-else:
-    DATABASE_URL = "sqlite:///project.db"
-
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        DATABASE_URL = "sqlite:///project.db"
+
+    # DATABASE_URL no ambiente tem precedência (ex.: banco temporário do build_static.py --verify)
+    return os.getenv('DATABASE_URL') or DATABASE_URL
+
+
+def get_engine():
+    """Engine e fábrica de sessões, criados no primeiro uso."""
+    if "engine" not in _estado:
+        with _lock:
+            if "engine" not in _estado:
+                from sqlalchemy import create_engine
+                from sqlalchemy.orm import sessionmaker
+                url = database_url()
+                engine = create_engine(url)
+                _estado["url"] = url
+                _estado["SessionLocal"] = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+                _estado["engine"] = engine
+    return _estado["engine"]
+
+
 Base = declarative_base()
 
 # --- Definição das Tabelas ---
@@ -41,10 +75,35 @@ class Modelo(Base):
     nome_normalizado = Column(String, unique=True, nullable=False)
     fonte = Column(String, nullable=True)
     url_origem = Column(String, nullable=True)
+    tipo = Column(String, nullable=True)  # proprietary, instruct, base...
+    rank = Column(Integer, nullable=True)  # posição no leaderboard de origem
+    average = Column(Float, nullable=True)  # média informada pela fonte
+    co2_cost = Column(Float, nullable=True)
     data_coleta = Column(DateTime, server_default=func.now())
     resultados = relationship("Resultado", back_populates="modelo")
     eshmias = relationship("Eshmia", back_populates="modelo")
 
+class AliasModelo(Base):
+    """Grafia alternativa de um modelo, fundida pela resolução de duplicados (ver resolution.py)."""
+    __tablename__ = 'modelos_aliases'
+    id = Column(Integer, primary_key=True, index=True)
+    alias = Column(String, unique=True, nullable=False)
+    modelo_id = Column(Integer, ForeignKey('modelos.id'), nullable=False, index=True)
+    fonte = Column(String, nullable=True)
+    similaridade = Column(Float, nullable=False)
+    data_registro = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    modelo = relationship("Modelo")
+
+class Quarentena(Base):
+    """Linha coletada reprovada na validação (ver validation.py), com os motivos."""
+    __tablename__ = 'quarentena'
+    id = Column(Integer, primary_key=True, index=True)
+    data_registro = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+    fonte = Column(String, nullable=True)
+    nome = Column(String, nullable=True)
+    motivos = Column(String, nullable=False)  # separados por "; "
+    dados = Column(Text, nullable=True)  # métricas originais em JSON
+
 class Metrica(Base):
     __tablename__ = 'metricas'
     id = Column(Integer, primary_key=True, index=True)
@@ -69,20 +128,189 @@ class Eshmia(Base):
     __tablename__ = 'eshmia'
     id = Column(Integer, primary_key=True, index=True)
     modelo_id = Column(Integer, ForeignKey('modelos.id'), nullable=False)
+    lote_id = Column(Integer, ForeignKey('lotes.id'), nullable=True, index=True)
     valor_eshmia = Column(Float, nullable=False)
     data_calculo = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     modelo = relationship("Modelo", back_populates="eshmias")
+    lote = relationship("Lote", back_populates="eshmias")
+    __table_args__ = (Index('ix_eshmia_modelo_data', 'modelo_id', 'data_calculo'),)
+
+class Lote(Base):
+    """Uma execução do cálculo (batch). O id é o batch id publicado aos clientes."""
+    __tablename__ = 'lotes'
+    id = Column(Integer, primary_key=True, index=True)
+    data_calculo = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    modelos_calculados = Column(Integer, default=0)
+    modelos_alterados = Column(Integer, default=0)
+    eshmia_medio = Column(Float, nullable=True)  # série do ecossistema em /api/history
+    eshmias = relationship("Eshmia", back_populates="lote")
+    alteracoes = relationship("Alteracao", back_populates="lote")
+
+class Alteracao(Base):
+    """Registro de mudança de um modelo em um lote (resultados ou ESHMIA diferentes)."""
+    __tablename__ = 'alteracoes'
+    id = Column(Integer, primary_key=True, index=True)
+    lote_id = Column(Integer, ForeignKey('lotes.id'), nullable=False, index=True)
+    modelo_id = Column(Integer, ForeignKey('modelos.id'), nullable=False)
+    valor_anterior = Column(Float, nullable=True)
+    valor_novo = Column(Float, nullable=True)  # None: modelo ainda sem ESHMIA
+    metricas_alteradas = Column(String, nullable=True)  # nomes separados por vírgula
+    lote = relationship("Lote", back_populates="alteracoes")
+    modelo = relationship("Modelo")
+
+class EshmiaDiario(Base):
+    """Rollup diário do histórico de ESHMIA por modelo, gerado pela compactação (ver history.py)."""
+    __tablename__ = 'eshmia_diario'
+    id = Column(Integer, primary_key=True, index=True)
+    modelo_id = Column(Integer, ForeignKey('modelos.id'), nullable=False)
+    dia = Column(DateTime, nullable=False)
+    minimo = Column(Float, nullable=False)
+    maximo = Column(Float, nullable=False)
+    soma = Column(Float, nullable=False)
+    amostras = Column(Integer, nullable=False)
+    __table_args__ = (Index('ix_eshmia_diario_modelo_dia', 'modelo_id', 'dia'),)
+
+class ValorIndice(Base):
+    """Valor de uma variante do índice (ver indices.py) para um modelo em um lote."""
+    __tablename__ = 'indices_valores'
+    id = Column(Integer, primary_key=True, index=True)
+    lote_id = Column(Integer, ForeignKey('lotes.id'), nullable=False, index=True)
+    modelo_id = Column(Integer, ForeignKey('modelos.id'), nullable=False)
+    indice = Column(String, nullable=False)
+    valor = Column(Float, nullable=False)
+
+class PosicaoRanking(Base):
+    """Mudança de posição de um modelo em um ranking (geral ou por métrica) em um lote."""
+    __tablename__ = 'posicoes_ranking'
+    id = Column(Integer, primary_key=True, index=True)
+    lote_id = Column(Integer, ForeignKey('lotes.id'), nullable=False, index=True)
+    modelo_id = Column(Integer, ForeignKey('modelos.id'), nullable=False)
+    criterio = Column(String, nullable=False)  # ESHMIA ou nome da métrica
+    posicao = Column(Integer, nullable=True)  # None: saiu do ranking
+    posicao_anterior = Column(Integer, nullable=True)  # None: entrou no ranking
+    __table_args__ = (Index('ix_posicoes_modelo_criterio', 'modelo_id', 'criterio'),)
+
+class Analise(Base):
+    """Narrativa automática (ecossistema, segmento ou modelo), indexada pelo hash do snapshot."""
+    __tablename__ = 'analises'
+    id = Column(Integer, primary_key=True, index=True)
+    hash_snapshot = Column(String, nullable=False, index=True)
+    lote_id = Column(Integer, ForeignKey('lotes.id'), nullable=True)  # lote em que foi gerada
+    escopo = Column(String, nullable=False)  # ecossistema, segmento ou modelo
+    chave = Column(String, nullable=True)  # tipo do modelo ou nome normalizado
+    texto = Column(Text, nullable=False)
+
+class IntervaloEshmia(Base):
+    """Intervalo de confiança (bootstrap) do ESHMIA e estabilidade da posição, por lote."""
+    __tablename__ = 'eshmia_intervalos'
+    id = Column(Integer, primary_key=True, index=True)
+    lote_id = Column(Integer, ForeignKey('lotes.id'), nullable=False, index=True)
+    modelo_id = Column(Integer, ForeignKey('modelos.id'), nullable=False)
+    ic_inferior = Column(Float, nullable=False)
+    ic_superior = Column(Float, nullable=False)
+    posicao_media = Column(Float, nullable=False)
+    posicao_ic_inferior = Column(Integer, nullable=False)
+    posicao_ic_superior = Column(Integer, nullable=False)
+    prob_primeiro = Column(Float, nullable=False)
+    prob_top10 = Column(Float, nullable=False)
+    modelo = relationship("Modelo")
+
+class ExecucaoSync(Base):
+    """Uma execução da sincronização, com tempos, linhas e memória por etapa (ver sync_runs.py)."""
+    __tablename__ = 'sync_runs'
+    id = Column(Integer, primary_key=True, index=True)
+    origem = Column(String, nullable=False)  # bridge_sync, run...
+    inicio = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    duracao = Column(Float, nullable=True)  # segundos
+    status = Column(String, nullable=False)  # ok ou erro
+    erro = Column(Text, nullable=True)
+    lote_id = Column(Integer, ForeignKey('lotes.id'), nullable=True)
+    bytes_lidos = Column(BigInteger, nullable=True)
+    memoria_pico_mb = Column(Float, nullable=True)
+    etapas = Column(Text, nullable=False)  # lista de etapas em JSON
+    alertas = Column(Text, nullable=True)  # etapas mais lentas que a mediana, em JSON
+    perfil = Column(Text, nullable=True)  # cProfile/tracemalloc (modo de captura), em JSON
+    __table_args__ = (Index('ix_sync_runs_origem_inicio', 'origem', 'inicio'),)
+
+class CursorLog(Base):
+    """Última seq do log de mudanças do updater já aplicada neste banco (ver collector.collect_changes)."""
+    __tablename__ = 'cursores_log'
+    arquivo = Column(String, primary_key=True)  # caminho absoluto do log
+    seq = Column(Integer, nullable=False)
 
 def get_db():
-    db = SessionLocal()
+    get_engine()
+    db = _estado["SessionLocal"]()
     try:
         yield db
     finally:
         db.close()
 
-def init_db():
+def _rebuild_sqlite_table(conexao, tabela, existentes):
+    """SQLite não altera restrições de colunas: recria a tabela com o schema atual e copia as linhas."""
+    from sqlalchemy import inspect, text
+
+    citar = conexao.dialect.identifier_preparer.quote
+    antiga = f"{tabela.name}__antiga"
+    # Os índices acompanham a tabela renomeada; sem removê-los, os da nova colidem
+    for indice in inspect(conexao).get_indexes(tabela.name):
+        conexao.execute(text(f"DROP INDEX {citar(indice['name'])}"))
+    conexao.execute(text(f"ALTER TABLE {citar(tabela.name)} RENAME TO {citar(antiga)}"))
+    tabela.create(bind=conexao)
+    colunas = ", ".join(citar(c.name) for c in tabela.columns if c.name in existentes)
+    conexao.execute(text(f"INSERT INTO {citar(tabela.name)} ({colunas}) SELECT {colunas} FROM {citar(antiga)}"))
+    conexao.execute(text(f"DROP TABLE {citar(antiga)}"))
+
+def upgrade_db() -> list:
+    """
+    Atualiza um banco criado por uma versão anterior (idempotente), o que
+    create_all não faz com tabelas existentes:
+    - cria as tabelas que faltam;
+    - adiciona as colunas novas com ALTER TABLE ADD COLUMN (anuláveis: as
+      linhas antigas não têm valor);
+    - remove NOT NULL de colunas que passaram a aceitar vazio (ex.:
+      alteracoes.valor_novo); no SQLite, recriando a tabela;
+    - cria os índices que faltam (ex.: ix_eshmia_modelo_data).
+    Retorna a descrição de cada mudança feita.
+    """
+    from sqlalchemy import inspect, text
+
+    engine = get_engine()
     Base.metadata.create_all(bind=engine)
-    db = SessionLocal()
+    citar = engine.dialect.identifier_preparer.quote
+    mudancas = []
+    with engine.begin() as conexao:
+        for tabela in Base.metadata.sorted_tables:
+            existentes = {coluna["name"]: coluna for coluna in inspect(conexao).get_columns(tabela.name)}
+            for coluna in tabela.columns:
+                if coluna.name in existentes:
+                    continue
+                tipo = coluna.type.compile(dialect=engine.dialect)
+                conexao.execute(text(f"ALTER TABLE {citar(tabela.name)} ADD COLUMN {citar(coluna.name)} {tipo}"))
+                mudancas.append(f"{tabela.name}.{coluna.name}")
+
+            relaxadas = [
+                coluna.name for coluna in tabela.columns
+                if coluna.nullable and not coluna.primary_key
+                and coluna.name in existentes and not existentes[coluna.name]["nullable"]
+            ]
+            if relaxadas and engine.dialect.name == 'sqlite':
+                _rebuild_sqlite_table(conexao, tabela, existentes)
+            for nome in relaxadas:
+                if engine.dialect.name != 'sqlite':
+                    conexao.execute(text(f"ALTER TABLE {citar(tabela.name)} ALTER COLUMN {citar(nome)} DROP NOT NULL"))
+                mudancas.append(f"{tabela.name}.{nome} (anulável)")
+
+            indices = {indice["name"] for indice in inspect(conexao).get_indexes(tabela.name)}
+            for indice in tabela.indexes:
+                if indice.name not in indices:
+                    indice.create(bind=conexao)
+                    mudancas.append(f"índice {indice.name}")
+    return mudancas
+
+def init_db():
+    upgrade_db()
+    db = _estado["SessionLocal"]()
     if not db.query(Metrica).first():
         metricas_iniciais = [
             Metrica(nome='IFEval', baseline_humano=100.0, fonte_baseline='Human Baseline'),
@@ -96,5 +324,17 @@ def init_db():
         db.commit()
     db.close()
 
+def __getattr__(nome):
+    """Atributos preguiçosos: `engine`, `SessionLocal` e `DATABASE_URL`."""
+    if nome == "engine":
+        return get_engine()
+    if nome == "SessionLocal":
+        get_engine()
+        return _estado["SessionLocal"]
+    if nome == "DATABASE_URL":
+        get_engine()
+        return _estado["url"]
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+
 if __name__ == '__main__':
     init_db()
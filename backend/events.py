@@ -0,0 +1,157 @@
+"""
+Publicação de eventos de snapshot (Server-Sent Events).
+
+Cada lote de cálculo com modelos alterados gera um evento pequeno
+({"batch_id", "modelos_alterados", "total_alterados"}) entregue a todos os
+dashboards conectados em /api/events. As conexões ociosas ficam bloqueadas em
+uma única Condition, sem consultar o banco: apenas uma thread de observação
+verifica a tabela `lotes` periodicamente, para capturar sincronizações feitas
+por outro processo (ex.: bridge_sync via cron), e publica todos os lotes
+novos desde a última verificação, em ordem.
+
+Com o servidor de threads (run.py, Werkzeug) cada conexão aberta ocupa uma
+thread, mesmo ociosa. Por isso o número de conexões simultâneas por processo
+é limitado (ESHMIA_SSE_MAX_CONNECTIONS, padrão 32): acima do limite o cliente
+recebe só um `retry` longo e o stream é encerrado, e o EventSource do
+navegador tenta de novo depois, sem prender uma thread enquanto espera.
+"""
+
+import os
+import json
+import time
+import threading
+from collections import deque
+
+# Quantos nomes de modelos alterados vão no evento; acima disso o cliente
+# simplesmente recarrega o snapshot completo.
+MAX_MODELOS_EVENTO = 50
+
+# Intervalo (s) entre verificações da tabela `lotes` pela thread de observação
+POLL_INTERVAL = float(os.getenv('ESHMIA_EVENTS_POLL', '5'))
+
+# Conexões SSE simultâneas por processo (cada uma prende uma thread do servidor)
+MAX_CONEXOES = int(os.getenv('ESHMIA_SSE_MAX_CONNECTIONS', '32'))
+
+# Espera (ms) sugerida ao cliente recusado por excesso de conexões
+RETRY_LOTADO_MS = 60000
+
+
+def format_sse(evento: dict) -> str:
+    """Serializa um evento no formato text/event-stream."""
+    return (
+        f"id: {evento['id']}\n"
+        f"event: {evento['evento']}\n"
+        f"data: {json.dumps(evento['dados'], ensure_ascii=False)}\n\n"
+    )
+
+
+class EventBroker:
+    """Mantém os últimos eventos e acorda os assinantes quando chega um novo."""
+
+    def __init__(self, historico: int = 64, max_conexoes: int = MAX_CONEXOES):
+        self._cond = threading.Condition()
+        self._eventos = deque(maxlen=historico)
+        self._ultimo_id = 0
+        self._observador = None
+        self.max_conexoes = max_conexoes
+        self._conexoes = 0
+
+    @property
+    def ultimo_id(self) -> int:
+        return self._ultimo_id
+
+    @property
+    def conexoes(self) -> int:
+        return self._conexoes
+
+    def acquire(self) -> bool:
+        """Reserva uma vaga de assinante; False se as `max_conexoes` estiverem ocupadas."""
+        with self._cond:
+            if self._conexoes >= self.max_conexoes:
+                return False
+            self._conexoes += 1
+            return True
+
+    def release(self):
+        """Libera a vaga reservada por `acquire` (ao fechar a conexão)."""
+        with self._cond:
+            self._conexoes = max(0, self._conexoes - 1)
+
+    def publish(self, lote_id: int, modelos_alterados: list, evento: str = 'snapshot'):
+        """Publica um lote novo. Lotes já publicados (mesmo id) são ignorados."""
+        with self._cond:
+            if lote_id <= self._ultimo_id:
+                return
+            self._ultimo_id = lote_id
+            self._eventos.append({
+                "id": lote_id,
+                "evento": evento,
+                "dados": {
+                    "batch_id": lote_id,
+                    "modelos_alterados": modelos_alterados[:MAX_MODELOS_EVENTO],
+                    "total_alterados": len(modelos_alterados)
+                }
+            })
+            self._cond.notify_all()
+
+    def wait_for(self, ultimo_id: int, timeout: float) -> list:
+        """
+        Bloqueia até existir evento com id > ultimo_id ou até o timeout.
+        Retorna a lista (possivelmente vazia) de eventos pendentes.
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: bool(self._eventos) and self._eventos[-1]["id"] > ultimo_id,
+                timeout=timeout
+            )
+            return [e for e in self._eventos if e["id"] > ultimo_id]
+
+    def ensure_watcher(self):
+        """Inicia (uma vez) a thread que observa lotes gravados por outros processos."""
+        with self._cond:
+            if self._observador is not None:
+                return
+            self._observador = threading.Thread(target=self._observar_lotes, daemon=True)
+            self._observador.start()
+
+    def _observar_lotes(self):
+        visto = None  # último lote verificado por esta thread
+        while True:
+            try:
+                visto = self.check_batches(visto)
+            except Exception as e:
+                print(f"⚠️ Erro ao verificar novos lotes: {e}")
+            time.sleep(POLL_INTERVAL)
+
+    def check_batches(self, visto=None) -> int:
+        """
+        Publica os lotes com id > `visto`, em ordem (vários podem ter sido
+        gravados entre duas verificações). Sem `visto`, só registra o último
+        lote: lotes anteriores ao início do servidor não geram eventos.
+        Retorna o último lote verificado.
+        """
+        from sqlalchemy import func
+        from sqlalchemy.orm import selectinload
+        from . import database as db
+
+        db_session = next(db.get_db())
+        try:
+            if visto is None:
+                visto = db_session.query(func.max(db.Lote.id)).scalar() or 0
+                with self._cond:
+                    self._ultimo_id = max(self._ultimo_id, visto)
+                return visto
+            novos = db_session.query(db.Lote).options(
+                selectinload(db.Lote.alteracoes).selectinload(db.Alteracao.modelo)
+            ).filter(db.Lote.id > visto).order_by(db.Lote.id).all()
+            for lote in novos:
+                if lote.modelos_alterados:
+                    self.publish(lote.id, [a.modelo.nome_normalizado for a in lote.alteracoes])
+                visto = lote.id
+            return visto
+        finally:
+            db_session.close()
+
+
+# Instância única do processo
+broker = EventBroker()
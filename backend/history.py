@@ -0,0 +1,225 @@
+"""
+Histórico do ESHMIA: séries temporais por modelo e do ecossistema.
+
+O downsampling é feito no banco (GROUP BY sobre o intervalo de tempo), então
+um ano de sincronizações horárias volta como algumas centenas de pontos
+(mínimo/máximo/média por intervalo). Para manter o histórico limitado, os
+valores brutos mais antigos que ESHMIA_HISTORY_RAW_DAYS são compactados em
+rollups diários (tabela eshmia_diario) e os rollups mais antigos que
+ESHMIA_HISTORY_RETENTION_DAYS são descartados (0 = manter para sempre).
+
+As tabelas gravadas a cada lote e lidas só no lote mais recente (variantes
+do índice e intervalos do bootstrap) guardam apenas os últimos
+ESHMIA_HISTORY_BATCHES lotes (0 = manter todos); o cache de análises, os
+últimos ESHMIA_HISTORY_BATCHES snapshots.
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from . import database as db
+
+RAW_DAYS = int(os.getenv('ESHMIA_HISTORY_RAW_DAYS', '30'))
+RETENTION_DAYS = int(os.getenv('ESHMIA_HISTORY_RETENTION_DAYS', '730'))
+RETENTION_BATCHES = int(os.getenv('ESHMIA_HISTORY_BATCHES', '50'))
+
+# bucket -> (formato SQLite, unidade date_trunc, formato to_char do PostgreSQL)
+BUCKETS = {
+    'hour': ('%Y-%m-%dT%H:00:00', 'hour', 'YYYY-MM-DD"T"HH24:00:00'),
+    'day': ('%Y-%m-%d', 'day', 'YYYY-MM-DD'),
+    'week': ('%Y-%m-%d', 'week', 'YYYY-MM-DD'),
+    'month': ('%Y-%m', 'month', 'YYYY-MM'),
+}
+
+
+def _bucket_expr(db_session: Session, bucket: str, coluna):
+    """Expressão SQL que rotula cada linha com o início do seu intervalo."""
+    sqlite_fmt, pg_unit, pg_fmt = BUCKETS[bucket]
+    if db_session.get_bind().dialect.name == 'postgresql':
+        return func.to_char(func.date_trunc(pg_unit, coluna), pg_fmt)
+    if bucket == 'week':
+        # Segunda-feira da semana, como o date_trunc('week') do PostgreSQL
+        return func.date(coluna, 'weekday 0', '-6 days')
+    return func.strftime(sqlite_fmt, coluna)
+
+
+def _filtrar_periodo(query, coluna, inicio, fim):
+    if inicio is not None:
+        query = query.filter(coluna >= inicio)
+    if fim is not None:
+        query = query.filter(coluna < fim)
+    return query
+
+
+def _latest_ids_subquery(db_session: Session):
+    """Ids do cálculo mais recente de cada modelo (nunca compactados)."""
+    return db_session.query(func.max(db.Eshmia.id)).group_by(db.Eshmia.modelo_id).scalar_subquery()
+
+
+def _combinar(linhas) -> list:
+    """Junta linhas (rótulo, min, max, soma, contagem) de fontes diferentes por rótulo."""
+    pontos = {}
+    for rotulo, minimo, maximo, soma, amostras in linhas:
+        if rotulo is None or not amostras:
+            continue
+        rotulo = str(rotulo)
+        if rotulo in pontos:
+            p = pontos[rotulo]
+            p[0] = min(p[0], minimo)
+            p[1] = max(p[1], maximo)
+            p[2] += soma
+            p[3] += amostras
+        else:
+            pontos[rotulo] = [minimo, maximo, soma, amostras]
+    return [
+        {"inicio": rotulo, "minimo": p[0], "maximo": p[1], "media": p[2] / p[3], "amostras": p[3]}
+        for rotulo, p in sorted(pontos.items())
+    ]
+
+
+def query_model_history(db_session: Session, modelo_id: int, bucket: str = 'day',
+                        inicio: datetime = None, fim: datetime = None) -> list:
+    """Série do valor_eshmia de um modelo, agregada por intervalo."""
+    rotulo = _bucket_expr(db_session, bucket, db.Eshmia.data_calculo)
+    brutos = _filtrar_periodo(
+        db_session.query(
+            rotulo,
+            func.min(db.Eshmia.valor_eshmia),
+            func.max(db.Eshmia.valor_eshmia),
+            func.sum(db.Eshmia.valor_eshmia),
+            func.count(db.Eshmia.id)
+        ).filter(db.Eshmia.modelo_id == modelo_id),
+        db.Eshmia.data_calculo, inicio, fim
+    ).group_by(rotulo)
+
+    rotulo_diario = _bucket_expr(db_session, bucket, db.EshmiaDiario.dia)
+    compactados = _filtrar_periodo(
+        db_session.query(
+            rotulo_diario,
+            func.min(db.EshmiaDiario.minimo),
+            func.max(db.EshmiaDiario.maximo),
+            func.sum(db.EshmiaDiario.soma),
+            func.sum(db.EshmiaDiario.amostras)
+        ).filter(db.EshmiaDiario.modelo_id == modelo_id),
+        db.EshmiaDiario.dia, inicio, fim
+    ).group_by(rotulo_diario)
+
+    return _combinar(list(compactados) + list(brutos))
+
+
+def query_ecosystem_history(db_session: Session, bucket: str = 'day',
+                            inicio: datetime = None, fim: datetime = None) -> list:
+    """Série do eshmia_medio do ecossistema (um valor por lote), agregada por intervalo."""
+    rotulo = _bucket_expr(db_session, bucket, db.Lote.data_calculo)
+    linhas = _filtrar_periodo(
+        db_session.query(
+            rotulo,
+            func.min(db.Lote.eshmia_medio),
+            func.max(db.Lote.eshmia_medio),
+            func.sum(db.Lote.eshmia_medio),
+            func.count(db.Lote.eshmia_medio)
+        ).filter(db.Lote.eshmia_medio.isnot(None)),
+        db.Lote.data_calculo, inicio, fim
+    ).group_by(rotulo)
+    return _combinar(linhas)
+
+
+def compact_history(db_session: Session, dias_brutos: int = RAW_DAYS, dias_retencao: int = RETENTION_DAYS) -> int:
+    """
+    Compacta os valores brutos anteriores a `dias_brutos` em rollups diários e
+    remove rollups além da retenção. O cálculo mais recente de cada modelo é
+    sempre preservado. Retorna o número de linhas brutas compactadas.
+    """
+    agora = datetime.now(timezone.utc).replace(tzinfo=None)
+    corte = (agora - timedelta(days=dias_brutos)).replace(hour=0, minute=0, second=0, microsecond=0)
+    atuais = _latest_ids_subquery(db_session)
+    antigos = db_session.query(db.Eshmia).filter(
+        db.Eshmia.data_calculo < corte,
+        db.Eshmia.id.notin_(atuais)
+    )
+
+    dia = _bucket_expr(db_session, 'day', db.Eshmia.data_calculo)
+    grupos = antigos.with_entities(
+        db.Eshmia.modelo_id,
+        dia,
+        func.min(db.Eshmia.valor_eshmia),
+        func.max(db.Eshmia.valor_eshmia),
+        func.sum(db.Eshmia.valor_eshmia),
+        func.count(db.Eshmia.id)
+    ).group_by(db.Eshmia.modelo_id, dia).all()
+
+    compactadas = 0
+    if grupos:
+        dias = {datetime.fromisoformat(str(g[1])[:10]) for g in grupos}
+        existentes = {
+            (r.modelo_id, r.dia): r
+            for r in db_session.query(db.EshmiaDiario).filter(db.EshmiaDiario.dia.in_(dias))
+        }
+        for modelo_id, rotulo, minimo, maximo, soma, amostras in grupos:
+            chave = (modelo_id, datetime.fromisoformat(str(rotulo)[:10]))
+            rollup = existentes.get(chave)
+            if rollup is None:
+                db_session.add(db.EshmiaDiario(
+                    modelo_id=modelo_id, dia=chave[1],
+                    minimo=minimo, maximo=maximo, soma=soma, amostras=amostras
+                ))
+            else:
+                # Dia já compactado parcialmente (ex.: o último cálculo de um modelo ficou para trás)
+                rollup.minimo = min(rollup.minimo, minimo)
+                rollup.maximo = max(rollup.maximo, maximo)
+                rollup.soma += soma
+                rollup.amostras += amostras
+            compactadas += amostras
+        antigos.delete(synchronize_session=False)
+
+    if dias_retencao > 0:
+        limite = agora - timedelta(days=dias_retencao)
+        db_session.query(db.EshmiaDiario).filter(db.EshmiaDiario.dia < limite).delete(synchronize_session=False)
+
+    db_session.commit()
+    if compactadas:
+        print(f"🗜️ Histórico compactado: {compactadas} cálculos anteriores a {corte.date()} em rollups diários.")
+    return compactadas
+
+
+def _prune_batch_table(db_session: Session, modelo, manter: int) -> int:
+    """Remove de `modelo` as linhas anteriores aos `manter` lotes mais recentes presentes nele."""
+    corte = db_session.query(modelo.lote_id).distinct().order_by(modelo.lote_id.desc()) \
+        .offset(manter - 1).limit(1).scalar()
+    if corte is None:
+        return 0
+    return db_session.query(modelo).filter(modelo.lote_id < corte).delete(synchronize_session=False)
+
+
+def _prune_analyses(db_session: Session, manter: int) -> int:
+    """
+    Remove as análises fora dos `manter` hashes de snapshot gravados por
+    último. É um cache: um snapshot removido que voltar é analisado de novo.
+    """
+    recentes = select(db.Analise.hash_snapshot).group_by(db.Analise.hash_snapshot) \
+        .order_by(func.max(db.Analise.id).desc()).limit(manter).subquery()
+    return db_session.query(db.Analise).filter(
+        db.Analise.hash_snapshot.notin_(select(recentes.c.hash_snapshot))
+    ).delete(synchronize_session=False)
+
+
+def prune_batches(db_session: Session, manter: int = RETENTION_BATCHES) -> dict:
+    """
+    Mantém só os `manter` lotes mais recentes das tabelas por lote (variantes
+    do índice e intervalos do bootstrap) e as análises dos `manter` snapshots
+    mais recentes. Retorna {tabela: linhas removidas}.
+    """
+    if manter <= 0:
+        return {}
+    removidas = {
+        db.ValorIndice.__tablename__: _prune_batch_table(db_session, db.ValorIndice, manter),
+        db.IntervaloEshmia.__tablename__: _prune_batch_table(db_session, db.IntervaloEshmia, manter),
+        db.Analise.__tablename__: _prune_analyses(db_session, manter),
+    }
+    db_session.commit()
+    total = sum(removidas.values())
+    if total:
+        detalhes = ", ".join(f"{n} de {tabela}" for tabela, n in removidas.items() if n)
+        print(f"🧹 Lotes antigos removidos (mantidos os últimos {manter}): {detalhes}.")
+    return removidas
@@ -0,0 +1,67 @@
+"""
+Registro de índices: cada definição é um vetor de pesos sobre as seis métricas.
+
+O ESHMIA é o índice padrão (pesos iguais). Variantes (ponderadas para
+raciocínio, para conhecimento, sem IFEval...) são avaliadas todas de uma vez
+como um único produto matricial sobre a matriz modelos × métricas, sem
+nenhuma passada extra no banco por índice.
+"""
+
+import numpy as np
+
+# Os seis indicadores, na ordem canônica das colunas da matriz
+METRICAS = ["IFEval", "BBH", "MATH", "GPQA", "MUSR", "MMLU-PRO"]
+
+# Índice gravado na tabela `eshmia` e usado por padrão na API
+INDICE_PADRAO = "eshmia"
+
+# Pesos relativos (são normalizados para somar 1)
+INDICES = {
+    "eshmia": {
+        "descricao": "ESHMIA: média simples dos seis indicadores normalizados.",
+        "pesos": {"IFEval": 1, "BBH": 1, "MATH": 1, "GPQA": 1, "MUSR": 1, "MMLU-PRO": 1}
+    },
+    "raciocinio": {
+        "descricao": "Ponderado para raciocínio: BBH, MATH e MUSR com peso maior.",
+        "pesos": {"IFEval": 1, "BBH": 3, "MATH": 2, "GPQA": 1, "MUSR": 2, "MMLU-PRO": 1}
+    },
+    "conhecimento": {
+        "descricao": "Ponderado para conhecimento: GPQA e MMLU-PRO com peso maior.",
+        "pesos": {"IFEval": 1, "BBH": 1, "MATH": 1, "GPQA": 3, "MUSR": 1, "MMLU-PRO": 3}
+    },
+    "sem_ifeval": {
+        "descricao": "Média simples sem IFEval (desconsidera obediência a instruções).",
+        "pesos": {"IFEval": 0, "BBH": 1, "MATH": 1, "GPQA": 1, "MUSR": 1, "MMLU-PRO": 1}
+    },
+}
+
+
+def weight_matrix() -> tuple:
+    """(nomes dos índices, matriz de pesos índices × métricas com linhas somando 1)."""
+    nomes = list(INDICES)
+    pesos = np.array([[INDICES[nome]["pesos"].get(m, 0) for m in METRICAS] for nome in nomes], dtype=float)
+    return nomes, pesos / pesos.sum(axis=1, keepdims=True)
+
+
+def evaluate(matriz: np.ndarray) -> dict:
+    """
+    Avalia todos os índices para a matriz modelos × métricas (normalizadas,
+    sem valores ausentes). Retorna {nome do índice: vetor de valores}.
+    """
+    nomes, pesos = weight_matrix()
+    valores = matriz @ pesos.T
+    return {nome: valores[:, j] for j, nome in enumerate(nomes)}
+
+
+def describe() -> list:
+    """Definições dos índices com os pesos já normalizados (para a API)."""
+    nomes, pesos = weight_matrix()
+    return [
+        {
+            "nome": nome,
+            "descricao": INDICES[nome]["descricao"],
+            "pesos": {m: float(p) for m, p in zip(METRICAS, pesos[j])},
+            "padrao": nome == INDICE_PADRAO
+        }
+        for j, nome in enumerate(nomes)
+    ]
@@ -0,0 +1,205 @@
+"""
+Instrumentação leve das requisições: consultas SQL, etapas e histogramas.
+
+- Um listener no Engine do SQLAlchemy conta os comandos e soma o tempo no
+  banco de cada requisição (o estado fica em uma ContextVar: o que roda fora
+  de uma requisição, como a sincronização, só entra no total global);
+- `stage("aggregate")` mede uma etapa do endpoint; a serialização JSON é
+  medida pelo provider de JSON do app, em todas as rotas;
+- ao fim da requisição, as medidas vão no cabeçalho `Server-Timing` e em
+  histogramas cumulativos por rota, expostos em /api/metrics no formato de
+  texto do Prometheus.
+
+O custo por comando SQL é um perf_counter e uma soma; por requisição, algumas
+buscas binárias nos baldes sob um lock. ESHMIA_INSTRUMENTATION=0 desliga tudo.
+"""
+
+import os
+import time
+import threading
+import contextlib
+from bisect import bisect_left
+from contextvars import ContextVar
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+ATIVO = os.getenv('ESHMIA_INSTRUMENTATION', '1') != '0'
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Limites superiores dos baldes (o +Inf é implícito)
+BALDES_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BALDES_CONSULTAS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+_medicao = ContextVar("medicao", default=None)
+
+
+class Histogram:
+    """Histograma cumulativo por conjunto de rótulos, no modelo do Prometheus."""
+
+    def __init__(self, nome: str, ajuda: str, baldes: tuple):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.baldes = baldes
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, rotulos: tuple, valor: float):
+        with self._lock:
+            serie = self._series.get(rotulos)
+            if serie is None:
+                serie = self._series[rotulos] = [[0] * (len(self.baldes) + 1), 0.0]
+            serie[0][bisect_left(self.baldes, valor)] += 1
+            serie[1] += valor
+
+    def render(self, nomes_rotulos: tuple) -> list:
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} histogram"]
+        with self._lock:
+            series = [(rotulos, list(contagens), soma) for rotulos, (contagens, soma) in sorted(self._series.items())]
+        for rotulos, contagens, soma in series:
+            base = ",".join(f'{n}="{_escapar(v)}"' for n, v in zip(nomes_rotulos, rotulos))
+            acumulado = 0
+            for limite, contagem in zip(self.baldes + (float("inf"),), contagens):
+                acumulado += contagem
+                le = "+Inf" if limite == float("inf") else repr(limite)
+                linhas.append(f'{self.nome}_bucket{{{base},le="{le}"}} {acumulado}')
+            linhas.append(f"{self.nome}_sum{{{base}}} {soma!r}")
+            linhas.append(f"{self.nome}_count{{{base}}} {acumulado}")
+        return linhas
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+DURACAO = Histogram("eshmia_http_request_duration_seconds", "Duração das requisições por rota.", BALDES_SEGUNDOS)
+ETAPAS = Histogram("eshmia_http_request_stage_seconds", "Duração das etapas das requisições por rota.",
+                   BALDES_SEGUNDOS)
+CONSULTAS = Histogram("eshmia_db_statements_per_request", "Comandos SQL por requisição, por rota.",
+                      BALDES_CONSULTAS)
+
+_contadores = {"requisicoes": {}, "comandos": 0, "segundos_banco": 0.0}
+_lock = threading.Lock()
+
+
+class Medicao:
+    """Medidas de uma requisição em andamento."""
+
+    __slots__ = ("inicio", "comandos", "banco", "etapas", "_inicio_comando")
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.comandos = 0
+        self.banco = 0.0
+        self.etapas = {}
+        self._inicio_comando = None
+
+
+@contextlib.contextmanager
+def stage(nome: str):
+    """Soma o tempo do bloco à etapa `nome` da requisição atual (nada fora de requisições)."""
+    medicao = _medicao.get()
+    if medicao is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        medicao.etapas[nome] = medicao.etapas.get(nome, 0.0) + time.perf_counter() - inicio
+
+
+# --- SQLAlchemy ---
+
+def _antes_do_comando(conn, cursor, statement, parameters, context, executemany):
+    medicao = _medicao.get()
+    if medicao is not None:
+        medicao._inicio_comando = time.perf_counter()
+
+
+def _depois_do_comando(conn, cursor, statement, parameters, context, executemany):
+    medicao = _medicao.get()
+    if medicao is not None and medicao._inicio_comando is not None:
+        duracao = time.perf_counter() - medicao._inicio_comando
+        medicao.comandos += 1
+        medicao.banco += duracao
+        medicao._inicio_comando = None
+        return
+    with _lock:
+        _contadores["comandos"] += 1
+
+
+# --- Flask ---
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Provider padrão do Flask com a serialização medida como etapa `serialize`."""
+
+    def dumps(self, obj, **kwargs):
+        with stage("serialize"):
+            return super().dumps(obj, **kwargs)
+
+
+def _iniciar():
+    _medicao.set(Medicao())
+
+
+def _finalizar(resposta):
+    medicao = _medicao.get()
+    if medicao is None:
+        return resposta
+    _medicao.set(None)
+    total = time.perf_counter() - medicao.inicio
+    rota = request.url_rule.rule if request.url_rule is not None else "<sem rota>"
+
+    DURACAO.observe((rota, request.method), total)
+    CONSULTAS.observe((rota,), medicao.comandos)
+    ETAPAS.observe((rota, "db"), medicao.banco)
+    for nome, segundos in medicao.etapas.items():
+        ETAPAS.observe((rota, nome), segundos)
+    with _lock:
+        chave = (rota, request.method, str(resposta.status_code))
+        _contadores["requisicoes"][chave] = _contadores["requisicoes"].get(chave, 0) + 1
+        _contadores["comandos"] += medicao.comandos
+        _contadores["segundos_banco"] += medicao.banco
+
+    partes = [f'db;dur={medicao.banco * 1000:.2f};desc="{medicao.comandos} consultas"']
+    partes += [f"{nome};dur={segundos * 1000:.2f}" for nome, segundos in medicao.etapas.items()]
+    partes.append(f"total;dur={total * 1000:.2f}")
+    resposta.headers["Server-Timing"] = ", ".join(partes)
+    return resposta
+
+
+def render_metrics() -> str:
+    """Todas as métricas no formato de texto do Prometheus (0.0.4)."""
+    with _lock:
+        requisicoes = sorted(_contadores["requisicoes"].items())
+        comandos = _contadores["comandos"]
+        segundos_banco = _contadores["segundos_banco"]
+
+    linhas = ["# HELP eshmia_http_requests_total Requisições atendidas, por rota, método e status.",
+              "# TYPE eshmia_http_requests_total counter"]
+    for (rota, metodo, status), total in requisicoes:
+        linhas.append(f'eshmia_http_requests_total{{rota="{_escapar(rota)}",metodo="{metodo}",status="{status}"}} {total}')
+    linhas += ["# HELP eshmia_db_statements_total Comandos SQL executados (dentro e fora de requisições).",
+               "# TYPE eshmia_db_statements_total counter",
+               f"eshmia_db_statements_total {comandos}",
+               "# HELP eshmia_db_request_seconds_total Tempo no banco dentro de requisições.",
+               "# TYPE eshmia_db_request_seconds_total counter",
+               f"eshmia_db_request_seconds_total {segundos_banco!r}"]
+    linhas += DURACAO.render(("rota", "metodo"))
+    linhas += ETAPAS.render(("rota", "etapa"))
+    linhas += CONSULTAS.render(("rota",))
+    return "\n".join(linhas) + "\n"
+
+
+def install(app):
+    """Liga a instrumentação no app e em todos os Engines do SQLAlchemy."""
+    if not ATIVO:
+        return
+    app.json = TimedJSONProvider(app)
+    app.before_request(_iniciar)
+    app.after_request(_finalizar)
+    if not event.contains(Engine, "before_cursor_execute", _antes_do_comando):
+        event.listen(Engine, "before_cursor_execute", _antes_do_comando)
+        event.listen(Engine, "after_cursor_execute", _depois_do_comando)
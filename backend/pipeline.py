@@ -0,0 +1,85 @@
+"""
+Pipeline em memória: CSV -> validação -> resolução de nomes -> normalização
+e índices -> Snapshot, sem banco de dados.
+
+Reproduz as regras do coletor e do calculador (mesma validação, mesma fusão
+de grafias, mesma ordem de modelos e o mesmo produto matricial dos índices),
+de modo que o snapshot resultante é idêntico ao lido do banco após uma
+sincronização em um banco vazio. Usado pelo build estático.
+"""
+
+import numpy as np
+from . import collector
+from . import indices
+from . import validation
+from .indices import METRICAS, INDICE_PADRAO
+from .resolution import EntityResolver, normalize_name
+from .snapshot import Snapshot
+
+# Baseline humano de todas as métricas (o mesmo gravado pelo coletor em `metricas`)
+BASELINE_HUMANO = 100.0
+
+
+def load_models(filepath: str = collector.CSV_FILE, limit: int = 150) -> list:
+    """Modelos do CSV (ou mock, se não houver CSV), validados, como no coletor."""
+    model_list = collector.load_csv_data(filepath)[:limit]
+    if not model_list:
+        model_list = collector.get_mock_data()
+    model_list, _, estatisticas = validation.validate_models(model_list)
+    print(validation.format_report(estatisticas))
+    return model_list
+
+
+def resolve_models(model_list: list) -> list:
+    """
+    Funde as grafias do mesmo modelo como o coletor faz no banco: a primeira
+    ocorrência define o nome e a posição; as seguintes sobrescrevem métricas.
+    """
+    resolver = EntityResolver()
+    posicoes = {}  # nome normalizado -> posição (no banco: nome_normalizado e aliases)
+    modelos = []
+    for model_data in model_list:
+        nome = model_data.get("nome", "Unknown")
+        normalizado = normalize_name(nome)
+        posicao = posicoes.get(normalizado)
+        if posicao is None:
+            posicao, _ = resolver.resolve(nome)
+        if posicao is None:
+            posicao = len(modelos)
+            modelos.append({
+                "nome_normalizado": normalizado,
+                "fonte": model_data.get("fonte", "Postgres Docker"),
+                "tipo": model_data.get("tipo"),
+                "metricas": {}
+            })
+        posicoes.setdefault(normalizado, posicao)
+        resolver.add(nome, posicao)  # alias (no banco: modelos_aliases)
+        modelos[posicao]["metricas"].update(model_data.get("metricas", {}))
+        if model_data.get("tipo") is not None:
+            modelos[posicao]["tipo"] = model_data.get("tipo")
+    return modelos
+
+
+def build_snapshot(modelos: list, batch_id=None) -> Snapshot:
+    """Normaliza (valor / baseline) e calcula o ESHMIA de todos os modelos de uma vez."""
+    coluna_metrica = {nome: j for j, nome in enumerate(METRICAS)}
+    matriz = np.full((len(modelos), len(METRICAS)), np.nan)
+    for i, modelo in enumerate(modelos):
+        for metrica, valor in modelo["metricas"].items():
+            j = coluna_metrica.get(metrica)
+            if j is not None:
+                matriz[i, j] = valor
+    matriz = matriz / BASELINE_HUMANO
+
+    completos = np.flatnonzero(~np.isnan(matriz).any(axis=1))
+    eshmia = np.full(len(modelos), np.nan)
+    eshmia[completos] = indices.evaluate(matriz[completos])[INDICE_PADRAO]
+    return Snapshot(
+        batch_id, [m["nome_normalizado"] for m in modelos], matriz, eshmia,
+        tipos=[m["tipo"] for m in modelos], fontes=[m["fonte"] for m in modelos]
+    )
+
+
+def snapshot_from_csv(filepath: str = collector.CSV_FILE, limit: int = 150) -> Snapshot:
+    """CSV -> Snapshot, inteiramente em memória."""
+    return build_snapshot(resolve_models(load_models(filepath, limit)))
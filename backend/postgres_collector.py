@@ -4,9 +4,9 @@ PostgreSQL Data Collector - Fetches benchmark data from PostgreSQL database
 """
 
 import os
-import psycopg2
-from psycopg2.extras import RealDictCursor
-import datetime
+
+# psycopg2 é importado só ao conectar: importar o coletor (ou rodar sem
+# Postgres) não carrega o driver
 
 
 class PostgresCollector:
@@ -23,6 +23,8 @@ class PostgresCollector:
     
     def connect(self):
         """Establish connection to PostgreSQL database"""
+        import psycopg2
+
         try:
             is_localhost = self.host in ['localhost', '127.0.0.1', '0.0.0.0']
             ssl_mode = 'disable' if is_localhost else 'require'
@@ -54,7 +56,10 @@ class PostgresCollector:
         if not self.connection:
             print("❌ Not connected to PostgreSQL")
             return []
-        
+
+        import psycopg2
+        from psycopg2.extras import RealDictCursor
+
         try:
             with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
                 # Busca os últimos N registros, independente do batch, ordenados por data
@@ -76,15 +81,8 @@ def convert_postgres_row_to_model_data(row: dict) -> dict:
     """
     Convert PostgreSQL benchmark_data row to model data format
     """
-    def safe_float(value):
-        try:
-            if value is None or value == '-' or value == 'N/A':
-                return None
-            return float(value)
-        except (ValueError, TypeError):
-            return None
-    
-    metrics = {}
+    # Valores brutos: sentinelas ('-', 'N/A') e faixas são tratados na
+    # validação do lote inteiro (validation.py)
     metric_columns = {
         'if_eval': 'IFEval',
         'bbh': 'BBH',
@@ -93,11 +91,10 @@ def convert_postgres_row_to_model_data(row: dict) -> dict:
         'musr': 'MUSR',
         'mmlu_pro': 'MMLU-PRO'
     }
-    
-    for pg_col, metric_name in metric_columns.items():
-        value = safe_float(row.get(pg_col))
-        if value is not None:
-            metrics[metric_name] = value
+    metrics = {
+        metric_name: row.get(pg_col)
+        for pg_col, metric_name in metric_columns.items() if row.get(pg_col) is not None
+    }
     
     return {
         'nome': row.get('model', 'Unknown'),
@@ -106,6 +103,6 @@ def convert_postgres_row_to_model_data(row: dict) -> dict:
         'fonte': 'PostgreSQL Benchmark Database',
         'metricas': metrics,
         'url_origem': 'postgresql://benchmark_data',
-        'co2_cost': row.get('co2_cost', 'N/A'),
+        'co2_cost': row.get('co2_cost'),
         'average': row.get('average')
     }
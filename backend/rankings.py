@@ -0,0 +1,105 @@
+"""
+Histórico de posições no ranking (geral pelo ESHMIA e por métrica).
+
+A cada lote o calculador atribui postos densos a todos os modelos de uma vez
+(uma ordenação por coluna) e compara, também em vetores, com a última posição
+gravada de cada modelo. Só as mudanças são gravadas, junto com a posição
+anterior; a posição atual de um modelo é o último registro dele.
+"""
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from . import database as db
+
+CRITERIO_GERAL = "ESHMIA"
+
+
+def dense_ranks(matriz: np.ndarray) -> np.ndarray:
+    """
+    Postos densos por coluna (1 = maior valor; empates dividem o posto).
+    Valores ausentes (NaN) recebem 0.
+    """
+    postos = np.zeros(matriz.shape, dtype=np.int64)
+    for j in range(matriz.shape[1]):
+        validos = np.flatnonzero(~np.isnan(matriz[:, j]))
+        if len(validos):
+            postos[validos, j] = np.unique(-matriz[validos, j], return_inverse=True)[1].ravel() + 1
+    return postos
+
+
+def _ultimas_posicoes(db_session: Session, ate_lote=None, modelo_ids=None):
+    """Último registro de cada (modelo, critério), opcionalmente até um lote."""
+    ultimos = db_session.query(func.max(db.PosicaoRanking.id).label('posicao_id'))
+    if ate_lote is not None:
+        ultimos = ultimos.filter(db.PosicaoRanking.lote_id <= ate_lote)
+    if modelo_ids is not None:
+        ultimos = ultimos.filter(db.PosicaoRanking.modelo_id.in_(modelo_ids))
+    ultimos = ultimos.group_by(db.PosicaoRanking.modelo_id, db.PosicaoRanking.criterio).subquery()
+    return db_session.query(
+        db.PosicaoRanking.modelo_id, db.PosicaoRanking.criterio, db.PosicaoRanking.posicao
+    ).join(ultimos, db.PosicaoRanking.id == ultimos.c.posicao_id).all()
+
+
+def store_rank_changes(db_session: Session, lote_id: int, modelo_ids: list, criterios: list,
+                       matriz: np.ndarray) -> int:
+    """
+    Grava as posições que mudaram neste lote. `matriz` é modelos × critérios
+    (NaN = modelo fora daquele ranking). Retorna o número de registros.
+    """
+    ids = np.asarray(modelo_ids, dtype=np.int64)
+    atuais = dense_ranks(matriz)
+
+    # Posições anteriores na mesma forma (0 = sem posição)
+    anteriores = np.zeros_like(atuais)
+    registros = _ultimas_posicoes(db_session)
+    if registros and len(ids):
+        coluna_criterio = {c: j for j, c in enumerate(criterios)}
+        ordem_ids = np.argsort(ids)
+        reg_ids = np.array([r[0] for r in registros], dtype=np.int64)
+        reg_colunas = np.array([coluna_criterio.get(r[1], -1) for r in registros], dtype=np.int64)
+        reg_posicoes = np.array([r[2] or 0 for r in registros], dtype=np.int64)
+        locais = np.minimum(np.searchsorted(ids[ordem_ids], reg_ids), len(ids) - 1)
+        linhas = ordem_ids[locais]
+        conhecidos = (ids[linhas] == reg_ids) & (reg_colunas >= 0)
+        anteriores[linhas[conhecidos], reg_colunas[conhecidos]] = reg_posicoes[conhecidos]
+
+    linhas, colunas = np.nonzero(atuais != anteriores)
+    db_session.bulk_insert_mappings(db.PosicaoRanking, [
+        {
+            "lote_id": lote_id,
+            "modelo_id": int(ids[i]),
+            "criterio": criterios[j],
+            "posicao": int(atuais[i, j]) or None,
+            "posicao_anterior": int(anteriores[i, j]) or None
+        }
+        for i, j in zip(linhas, colunas)
+    ])
+    return len(linhas)
+
+
+def query_movers(db_session: Session, desde_lote: int, criterio: str = CRITERIO_GERAL, limite: int = 10) -> dict:
+    """
+    Compara a posição atual com a posição ao fim do lote `desde_lote`:
+    maiores altas, maiores quedas, novos no ranking e modelos que saíram.
+    """
+    filtro = (db.PosicaoRanking.lote_id > desde_lote, db.PosicaoRanking.criterio == criterio)
+    modelo_ids = select(db.PosicaoRanking.modelo_id).where(*filtro).distinct()
+    atuais = {m: p for m, c, p in _ultimas_posicoes(db_session, modelo_ids=modelo_ids) if c == criterio}
+    antes = {m: p for m, c, p in _ultimas_posicoes(db_session, desde_lote, modelo_ids) if c == criterio}
+    nomes = dict(db_session.query(db.Modelo.id, db.Modelo.nome_normalizado).filter(db.Modelo.id.in_(modelo_ids)))
+
+    def item(modelo_id):
+        anterior, posicao = antes.get(modelo_id), atuais[modelo_id]
+        resultado = {"nome_normalizado": nomes.get(modelo_id), "posicao": posicao, "posicao_anterior": anterior}
+        if anterior and posicao:
+            resultado["variacao"] = anterior - posicao
+        return resultado
+
+    movidos = [item(m) for m in atuais if antes.get(m) and atuais[m] and antes[m] != atuais[m]]
+    return {
+        "subiram": sorted([m for m in movidos if m["variacao"] > 0], key=lambda m: -m["variacao"])[:limite],
+        "cairam": sorted([m for m in movidos if m["variacao"] < 0], key=lambda m: m["variacao"])[:limite],
+        "novos": sorted([item(m) for m in atuais if atuais[m] and not antes.get(m)], key=lambda m: m["posicao"])[:limite],
+        "sairam": [item(m) for m in atuais if not atuais[m] and antes.get(m)][:limite]
+    }
@@ -0,0 +1,176 @@
+"""
+Resolução de modelos duplicados (o mesmo modelo com grafias diferentes nas
+fontes: CSVs e Postgres).
+
+1. Canonicalização: minúsculas, sem acentos, separadores unificados e
+   sufixos que não mudam o modelo removidos (-hf, -latest). A organização
+   fica ("orga/llama-3-8b" e "orgb/llama-3-8b" são fine-tunes diferentes), e
+   as datas também: "gpt-4o-2024-05-13" e "gpt-4o-2024-08-06" são snapshots
+   diferentes, com resultados próprios.
+2. Regras exatas entre grafias que só diferem na organização ou na data:
+   "org/modelo" é o "modelo" sem organização (e vice-versa) e
+   "modelo-2024-04-09" é o "modelo" sem data (e vice-versa), desde que
+   nenhuma outra organização ou data desse modelo tenha sido registrada.
+3. Bloqueio: a chave do bloco é o primeiro termo do nome (sem organização)
+   mais a sequência de números (versão, tamanho, data). Só nomes do mesmo
+   bloco e de organizações compatíveis são comparados, então "llama-2-7b"
+   nunca é confundido com "llama-2-70b", nem um snapshot com outro de data
+   diferente.
+4. Similaridade (difflib) apenas dentro do bloco; blocos grandes são mantidos
+   ordenados e só os vizinhos na ordem alfabética são comparados.
+
+Cada fusão é gravada na tabela de aliases (modelos_aliases).
+"""
+
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+LIMIAR_SIMILARIDADE = 0.92
+JANELA_VIZINHOS = 20  # vizinhos comparados de cada lado em blocos grandes
+
+_SEPARADORES = re.compile(r"[\s_./:]+")
+_SUFIXOS = re.compile(r"(-hf|-latest)+$")
+_DATA = re.compile(r"-((?:19|20)\d{2}(?:-?\d{2}){0,2}|[01]\d[0-3]\d)$")  # 2024, 2024-04-09, 20240409, 0613
+_NUMEROS = re.compile(r"\d+")
+_TERMO = re.compile(r"[a-z]+")
+
+
+def normalize_name(nome: str) -> str:
+    """Nome normalizado gravado em Modelo.nome_normalizado (regra original do coletor)."""
+    return nome.lower().replace(" ", "-").replace("/", "-")
+
+
+def _canonizar(texto: str) -> str:
+    texto = _SEPARADORES.sub("-", texto)
+    texto = re.sub(r"-+", "-", texto).strip("-")
+    return _SUFIXOS.sub("", texto) or texto
+
+
+def canonical_name(nome: str) -> str:
+    """Forma canônica usada para comparar grafias do mesmo modelo ("org/modelo" ou "modelo")."""
+    texto = unicodedata.normalize("NFKD", str(nome)).encode("ascii", "ignore").decode().lower().strip()
+    organizacao, _, modelo = texto.rpartition("/")
+    organizacao, modelo = _canonizar(organizacao), _canonizar(modelo)
+    if organizacao and modelo:
+        return f"{organizacao}/{modelo}"
+    return modelo or organizacao
+
+
+def split_organization(canonico: str) -> tuple:
+    """("org", "modelo") de um nome canônico; organização vazia se não houver."""
+    organizacao, _, modelo = canonico.rpartition("/")
+    return organizacao, modelo
+
+
+def split_date(canonico: str) -> tuple:
+    """(nome sem a data final, data) de um nome canônico; data None se não houver."""
+    data = _DATA.search(split_organization(canonico)[1])
+    if data is None:
+        return canonico, None
+    return canonico[:-len(data.group())], data.group(1)
+
+
+def merge_key(canonico: str) -> str:
+    """Nome sem organização e sem data: grafias com a mesma chave podem ser o mesmo modelo."""
+    return split_date(split_organization(canonico)[1])[0]
+
+
+def blocking_key(canonico: str) -> str:
+    """Chave do bloco: primeiro termo alfabético + todos os números do nome (sem organização)."""
+    termo = _TERMO.search(canonico)
+    return "|".join([termo.group() if termo else ""] + _NUMEROS.findall(canonico))
+
+
+def _similaridade(a: str, b: str) -> float:
+    return SequenceMatcher(a=a, b=b, autojunk=False).ratio()
+
+
+class EntityResolver:
+    """Índice em memória de nomes canônicos -> modelo, com blocos para busca aproximada."""
+
+    def __init__(self, limiar: float = LIMIAR_SIMILARIDADE, janela: int = JANELA_VIZINHOS):
+        self.limiar = limiar
+        self.janela = janela
+        self._exatos = {}
+        self._organizacoes = defaultdict(set)  # nome sem organização -> organizações ("" = nenhuma)
+        self._datas = defaultdict(set)  # nome sem data -> datas registradas
+        self._blocos = defaultdict(list)  # chave -> (nome sem organização, canônico), ordenados
+
+    def add(self, nome: str, modelo_id):
+        canonico = canonical_name(nome)
+        if canonico in self._exatos:
+            return
+        self._exatos[canonico] = modelo_id
+        organizacao, modelo = split_organization(canonico)
+        self._organizacoes[modelo].add(organizacao)
+        sem_data, data = split_date(canonico)
+        if data is not None:
+            self._datas[sem_data].add(data)
+        insort(self._blocos[blocking_key(modelo)], (modelo, canonico))
+
+    def _por_organizacao(self, canonico: str):
+        """"org/modelo" <-> "modelo", se nenhuma outra organização publicou o mesmo nome."""
+        organizacao, modelo = split_organization(canonico)
+        registradas = self._organizacoes.get(modelo, set())
+        if organizacao:
+            if "" in registradas and registradas <= {"", organizacao}:
+                return self._exatos[modelo], 1.0
+        elif len(registradas) == 1:
+            (unica,) = registradas
+            return self._exatos[f"{unica}/{modelo}"], 1.0
+        return None
+
+    def _por_data(self, canonico: str):
+        """"modelo-2024-04-09" <-> "modelo", se nenhum outro snapshot do modelo foi registrado."""
+        sem_data, data = split_date(canonico)
+        if data is not None:
+            if sem_data in self._exatos and self._datas.get(sem_data, set()) <= {data}:
+                return self._exatos[sem_data], _similaridade(sem_data, canonico)
+        else:
+            datas = self._datas.get(canonico, set())
+            if len(datas) == 1:
+                (unica,) = datas
+                datado = f"{canonico}-{unica}"
+                return self._exatos[datado], _similaridade(canonico, datado)
+        return None
+
+    def resolve(self, nome: str, aproximado: bool = True) -> tuple:
+        """
+        (modelo_id, similaridade) do modelo equivalente, ou (None, 0.0). Sem
+        `aproximado`, só as regras exatas (mesma forma canônica, organização, data).
+        """
+        canonico = canonical_name(nome)
+        if canonico in self._exatos:
+            return self._exatos[canonico], 1.0
+        encontrado = self._por_organizacao(canonico) or self._por_data(canonico)
+        if encontrado is not None:
+            return encontrado
+        if not aproximado:
+            return None, 0.0
+
+        organizacao, modelo = split_organization(canonico)
+        bloco = self._blocos.get(blocking_key(modelo), [])
+        if len(bloco) > 2 * self.janela:
+            posicao = bisect_left(bloco, (modelo, ""))
+            bloco = bloco[max(0, posicao - self.janela):posicao + self.janela]
+
+        melhor, melhor_similaridade = None, 0.0
+        comparador = SequenceMatcher(b=modelo, autojunk=False)
+        for modelo_candidato, candidato in bloco:
+            organizacao_candidato = split_organization(candidato)[0]
+            if organizacao and organizacao_candidato and organizacao != organizacao_candidato:
+                continue
+            if modelo_candidato == modelo:
+                continue  # só a organização difere: decidido pelas regras exatas
+            comparador.set_seq1(modelo_candidato)
+            if comparador.real_quick_ratio() < self.limiar or comparador.quick_ratio() < self.limiar:
+                continue
+            similaridade = comparador.ratio()
+            if similaridade > melhor_similaridade:
+                melhor, melhor_similaridade = candidato, similaridade
+        if melhor is not None and melhor_similaridade >= self.limiar:
+            return self._exatos[melhor], melhor_similaridade
+        return None, 0.0
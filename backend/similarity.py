@@ -0,0 +1,74 @@
+"""
+Índice de vizinhos mais próximos ("modelos parecidos") sobre os vetores de
+métricas normalizadas.
+
+A matriz float32 (modelos × 6) e sua versão normalizada em L2 são montadas
+uma vez por snapshot. Uma consulta é um produto matriz-vetor seguido de
+argpartition; consultas em lote são processadas em fatias, de modo que nunca
+se materializa uma matriz n × n. Resultados de modelos consultados com
+frequência ficam em um LRU do próprio índice (descartado junto com o lote).
+"""
+
+from functools import lru_cache
+import numpy as np
+
+METODOS = ("cosine", "euclidean")
+
+# Quantas consultas são avaliadas por vez em top_k_batch (fatia × n floats)
+TAMANHO_FATIA = 64
+
+
+class SimilarityIndex:
+
+    def __init__(self, matriz: np.ndarray, cache_size: int = 1024):
+        self.vetores = np.ascontiguousarray(matriz, dtype=np.float32)
+        normas = np.linalg.norm(self.vetores, axis=1, keepdims=True)
+        normas[normas == 0] = 1.0
+        self.unitarios = self.vetores / normas
+        self.normas_quadrado = (self.vetores ** 2).sum(axis=1)
+        self.query = lru_cache(maxsize=cache_size)(self._query)
+
+    def __len__(self):
+        return len(self.vetores)
+
+    def _scores(self, linhas: np.ndarray, metodo: str) -> np.ndarray:
+        """Pontuação (maior = mais parecido) de cada consulta contra todos os modelos."""
+        if metodo == "cosine":
+            return self.unitarios[linhas] @ self.unitarios.T
+        # -distância² = 2 x·q - |x|² - |q|², sem formar as diferenças
+        produto = self.vetores[linhas] @ self.vetores.T
+        return 2 * produto - self.normas_quadrado[None, :] - self.normas_quadrado[linhas][:, None]
+
+    def top_k_batch(self, linhas, k: int, metodo: str = "cosine"):
+        """
+        Para cada linha consultada, os k vizinhos mais parecidos (excluindo a
+        própria linha). Retorna (índices, pontuações), ambos len(linhas) × k.
+        """
+        linhas = np.asarray(linhas, dtype=np.int64)
+        k = max(0, min(k, len(self) - 1))
+        indices = np.zeros((len(linhas), k), dtype=np.int64)
+        pontuacoes = np.zeros((len(linhas), k), dtype=np.float32)
+        if k == 0:
+            return indices, pontuacoes
+
+        for inicio in range(0, len(linhas), TAMANHO_FATIA):
+            fatia = linhas[inicio:inicio + TAMANHO_FATIA]
+            scores = self._scores(fatia, metodo)
+            scores[np.arange(len(fatia)), fatia] = -np.inf  # o próprio modelo não conta
+            candidatos = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            valores = np.take_along_axis(scores, candidatos, axis=1)
+            ordem = np.argsort(-valores, axis=1, kind='stable')
+            indices[inicio:inicio + len(fatia)] = np.take_along_axis(candidatos, ordem, axis=1)
+            pontuacoes[inicio:inicio + len(fatia)] = np.take_along_axis(valores, ordem, axis=1)
+        return indices, pontuacoes
+
+    def _query(self, linha: int, k: int, metodo: str = "cosine"):
+        indices, pontuacoes = self.top_k_batch([linha], k, metodo)
+        return indices[0], pontuacoes[0]
+
+
+def similarity_value(pontuacao: float, metodo: str) -> dict:
+    """Converte a pontuação interna no valor exposto pela API."""
+    if metodo == "cosine":
+        return {"similaridade": float(pontuacao)}
+    return {"distancia": float(np.sqrt(max(-pontuacao, 0.0)))}
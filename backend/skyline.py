@@ -0,0 +1,134 @@
+"""
+Fronteira de Pareto (skyline) dos modelos nas seis métricas normalizadas.
+
+Um modelo domina outro quando é maior ou igual em todas as métricas e
+estritamente maior em pelo menos uma; uma métrica ausente (NaN) conta como
+pior que qualquer valor. A profundidade de dominância é a camada
+do modelo na ordenação não dominada: 0 é a fronteira, 1 é a fronteira do que
+sobra sem a camada 0, e assim por diante.
+
+Algoritmo (sort-filter com busca binária por camada):
+- as métricas são trocadas pelo posto de cada valor na sua coluna e os
+  modelos são ordenados pela soma dos postos, em ordem decrescente; quem
+  domina um ponto tem soma estritamente maior, logo sempre vem antes dele;
+- se a camada k domina um ponto, a camada k-1 também domina (transitividade),
+  então a camada de cada ponto é encontrada por busca binária nas camadas;
+- os pontos são processados em blocos: as buscas binárias de um bloco andam
+  juntas (uma operação vetorizada por camada consultada) e a dominância
+  dentro do bloco é resolvida com uma matriz bloco × bloco.
+Nenhuma matriz n × n é materializada.
+"""
+
+import numpy as np
+
+TAMANHO_BLOCO = 256
+
+
+def _dominancia(colunas: np.ndarray, pontos: np.ndarray) -> np.ndarray:
+    """
+    Matriz [i, j] = o ponto j (colunas[:, j]) domina pontos[i].
+    `colunas` é d × m (uma linha por métrica): as comparações são feitas uma
+    métrica por vez sobre matrizes 2D, bem mais rápido que reduzir um tensor 3D.
+    """
+    maior_igual = colunas[0][None, :] >= pontos[:, 0][:, None]
+    maior = colunas[0][None, :] > pontos[:, 0][:, None]
+    for k in range(1, colunas.shape[0]):
+        maior_igual &= colunas[k][None, :] >= pontos[:, k][:, None]
+        maior |= colunas[k][None, :] > pontos[:, k][:, None]
+    return maior_igual & maior
+
+
+def _dominados_por(colunas: np.ndarray, pontos: np.ndarray) -> np.ndarray:
+    """Máscara dos pontos dominados por algum ponto da camada."""
+    return _dominancia(colunas, pontos).any(axis=1)
+
+
+def _postos_ordenados(matriz: np.ndarray):
+    """
+    A dominância só depende da ordem em cada métrica: troca os valores pelo
+    posto (rank denso) em inteiros, o que é exato e mais barato de comparar.
+    Retorna os postos e a ordem de processamento (soma dos postos decrescente).
+    """
+    # NaN (métrica ausente) vira o menor valor da coluna: sem isso o np.unique
+    # o colocaria no fim, como o melhor posto
+    matriz = np.where(np.isnan(matriz), -np.inf, matriz)
+    postos = np.empty(matriz.shape, dtype=np.int64)
+    for k in range(matriz.shape[1]):
+        postos[:, k] = np.unique(matriz[:, k], return_inverse=True)[1].ravel()
+    tipo = np.int16 if postos.max(initial=0) < np.iinfo(np.int16).max else np.int32
+    ordem = np.argsort(-postos.sum(axis=1), kind='stable')
+    return np.ascontiguousarray(postos, dtype=tipo), ordem
+
+
+def dominance_depths(matriz: np.ndarray, tamanho_bloco: int = TAMANHO_BLOCO) -> np.ndarray:
+    """
+    Profundidade de dominância de cada linha de `matriz` (n × d, maior é melhor).
+    Retorna um vetor de inteiros; 0 indica a fronteira de Pareto.
+    """
+    n = len(matriz)
+    profundidades = np.zeros(n, dtype=np.int64)
+    if n == 0:
+        return profundidades
+
+    matriz, ordem = _postos_ordenados(matriz)
+    camadas = []  # pontos já classificados, uma matriz d × m por camada
+
+    for inicio in range(0, n, tamanho_bloco):
+        indices = ordem[inicio:inicio + tamanho_bloco]
+        bloco = matriz[indices]
+
+        # 1) Camada em relação aos pontos já classificados: busca binária em
+        #    paralelo. baixo = primeira camada possível, alto = limite superior.
+        baixo = np.zeros(len(bloco), dtype=np.int64)
+        alto = np.full(len(bloco), len(camadas), dtype=np.int64)
+        while True:
+            ativos = np.flatnonzero(baixo < alto)
+            if not len(ativos):
+                break
+            meio = (baixo[ativos] + alto[ativos]) // 2
+            for k in np.unique(meio):
+                selecionados = ativos[meio == k]
+                dominados = _dominados_por(camadas[k], bloco[selecionados])
+                baixo[selecionados[dominados]] = k + 1
+                alto[selecionados[~dominados]] = k
+        profundidade_bloco = baixo
+
+        # 2) Dominância dentro do bloco: só pontos anteriores podem dominar.
+        dominadores = _dominancia(bloco.T, bloco)  # [i, j]: j domina i
+        for i in np.flatnonzero(dominadores.any(axis=1)):
+            anteriores = np.flatnonzero(dominadores[i, :i])
+            if len(anteriores):
+                profundidade_bloco[i] = max(profundidade_bloco[i], profundidade_bloco[anteriores].max() + 1)
+
+        # 3) Acrescenta os pontos do bloco às suas camadas
+        for k in np.unique(profundidade_bloco):
+            novos = bloco[profundidade_bloco == k].T
+            if k < len(camadas):
+                camadas[k] = np.hstack([camadas[k], novos])
+            else:
+                camadas.append(np.ascontiguousarray(novos))
+
+        profundidades[indices] = profundidade_bloco
+
+    return profundidades
+
+
+def pareto_frontier(matriz: np.ndarray, tamanho_bloco: int = TAMANHO_BLOCO) -> np.ndarray:
+    """
+    Índices das linhas que ninguém domina (camada 0), em ordem crescente.
+    Sort-filter simples: cada bloco só é comparado com a fronteira acumulada.
+    """
+    if len(matriz) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    matriz, ordem = _postos_ordenados(matriz)
+    fronteira = matriz[:0].T.copy()
+    indices_fronteira = []
+    for inicio in range(0, len(matriz), tamanho_bloco):
+        indices = ordem[inicio:inicio + tamanho_bloco]
+        bloco = matriz[indices]
+        dominados = _dominados_por(fronteira, bloco) | _dominancia(bloco.T, bloco).any(axis=1)
+        sobreviventes = ~dominados
+        fronteira = np.hstack([fronteira, bloco[sobreviventes].T])
+        indices_fronteira.append(indices[sobreviventes])
+    return np.sort(np.concatenate(indices_fronteira))
@@ -0,0 +1,230 @@
+"""
+Snapshot em memória do estado atual, em colunas NumPy.
+
+É montado uma única vez por lote (batch id) a partir de duas consultas e
+reaproveitado por todas as requisições até o próximo cálculo. Cada coluna
+(uma por métrica normalizada, mais o ESHMIA) é mantida ordenada, de modo que
+máximo, mínimo, top-k e percentis viram acessos por índice e o percentil de
+um valor é uma busca binária.
+
+As variantes do índice (indices.py) entram como colunas extras, calculadas
+a partir da matriz com um único produto matricial.
+"""
+
+import threading
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from . import database as db
+from . import indices
+from .calculator import METRICAS, INDICE_PADRAO, latest_eshmia_values
+
+COLUNA_ESHMIA = "ESHMIA"
+
+
+class Snapshot:
+    """Colunas do lote: nomes dos modelos, matriz modelos × métricas e ESHMIA (NaN = ausente)."""
+
+    def __init__(self, batch_id, nomes: list, matriz: np.ndarray, eshmia: np.ndarray, ids: list = None,
+                 tipos: list = None, fontes: list = None):
+        self.batch_id = batch_id
+        self.ids = ids  # modelo_id de cada linha (None quando montado fora do banco)
+        self.nomes = nomes
+        # Segmentos de cada linha (ver cube.py)
+        self.tipos = tipos if tipos is not None else [None] * len(nomes)
+        self.fontes = fontes if fontes is not None else [None] * len(nomes)
+        self.matriz = matriz
+        self.eshmia = eshmia
+        self.colunas = {nome: matriz[:, j] for j, nome in enumerate(METRICAS)}
+        self.colunas[COLUNA_ESHMIA] = eshmia
+
+        # Variantes do índice: NaN para quem não tem as seis métricas
+        completos = np.flatnonzero(~np.isnan(matriz).any(axis=1))
+        for nome, valores in indices.evaluate(matriz[completos]).items():
+            if nome != INDICE_PADRAO:
+                coluna = np.full(len(nomes), np.nan)
+                coluna[completos] = valores
+                self.colunas[nome] = coluna
+
+        # Por coluna: índices dos modelos em ordem decrescente (empates na
+        # ordem original) e os valores correspondentes em ordem crescente.
+        self._derivados = {}
+        self._ordem = {}
+        self._ordenados = {}
+        self._medias = {}
+        for nome, valores in self.colunas.items():
+            validos = np.flatnonzero(~np.isnan(valores))
+            ordem = validos[np.argsort(-valores[validos], kind='stable')]
+            self._ordem[nome] = ordem
+            self._ordenados[nome] = valores[ordem][::-1].copy()
+            # Soma sequencial na ordem das linhas, como o AVG do banco (np.mean
+            # soma em pares e difere no último dígito)
+            self._medias[nome] = sum(valores[validos].tolist()) / len(validos) if len(validos) else 0.0
+
+    def cached(self, chave: str, fabrica):
+        """Resultado derivado do snapshot, calculado uma única vez por lote."""
+        if chave not in self._derivados:
+            with _lock:
+                if chave not in self._derivados:
+                    self._derivados[chave] = fabrica(self)
+        return self._derivados[chave]
+
+    def complete_rows(self) -> np.ndarray:
+        """Índices dos modelos com as seis métricas (os que têm ESHMIA)."""
+        return self.cached("completos", lambda s: np.flatnonzero(~np.isnan(s.matriz).any(axis=1)))
+
+    def resolve_column(self, nome: str):
+        """Nome da coluna sem diferenciar maiúsculas (ex.: 'mmlu-pro' -> 'MMLU-PRO')."""
+        for coluna in self.colunas:
+            if coluna.lower() == nome.lower():
+                return coluna
+        return None
+
+    def index_column(self, indice: str):
+        """Coluna de um índice do registro ('eshmia' -> ESHMIA), ou None se não existir."""
+        if indice == INDICE_PADRAO:
+            return COLUNA_ESHMIA
+        return indice if indice in indices.INDICES else None
+
+    def count(self, coluna: str) -> int:
+        return len(self._ordem[coluna])
+
+    def mean(self, coluna: str) -> float:
+        return self._medias[coluna]
+
+    def order(self, coluna: str) -> np.ndarray:
+        """Índices dos modelos com valor na coluna, do maior para o menor."""
+        return self._ordem[coluna]
+
+    def top(self, coluna: str, k: int) -> list:
+        return self._modelos(coluna, self._ordem[coluna][:k])
+
+    def bottom(self, coluna: str, k: int) -> list:
+        return self._modelos(coluna, self._ordem[coluna][::-1][:k])
+
+    def percentiles(self, coluna: str, ps: list) -> dict:
+        """Percentis (interpolação linear) lidos direto da coluna ordenada."""
+        ordenados = self._ordenados[coluna]
+        if not len(ordenados):
+            return {}
+        resultado = {}
+        for p in ps:
+            posicao = (len(ordenados) - 1) * p / 100.0
+            abaixo = int(posicao)
+            acima = min(abaixo + 1, len(ordenados) - 1)
+            fracao = posicao - abaixo
+            resultado[p] = float(ordenados[abaixo] + (ordenados[acima] - ordenados[abaixo]) * fracao)
+        return resultado
+
+    def percentile_of(self, coluna: str, valor: float) -> float:
+        """Percentual de modelos com valor menor ou igual (busca binária)."""
+        ordenados = self._ordenados[coluna]
+        if not len(ordenados):
+            return 0.0
+        return 100.0 * np.searchsorted(ordenados, valor, side='right') / len(ordenados)
+
+    def histogram(self, coluna: str, bins: int) -> dict:
+        """Histograma de largura fixa entre o mínimo e o máximo da coluna."""
+        ordenados = self._ordenados[coluna]
+        if not len(ordenados):
+            return {"bordas": [], "contagens": []}
+        bordas = np.linspace(ordenados[0], ordenados[-1], bins + 1)
+        posicoes = np.searchsorted(ordenados, bordas, side='left')
+        posicoes[-1] = len(ordenados)  # o último intervalo inclui o máximo
+        return {"bordas": bordas.tolist(), "contagens": np.diff(posicoes).tolist()}
+
+    def aggregate_metrics(self) -> dict:
+        """Máximo, mínimo e média por métrica (cards do frontend)."""
+        metricas_agregadas = {}
+        for metrica_nome in METRICAS:
+            ordem = self._ordem[metrica_nome]
+            # Empates: o primeiro modelo (na ordem das linhas) com o máximo e com o mínimo
+            minimo = np.nanargmin(self.colunas[metrica_nome]) if len(ordem) else None
+            metricas_agregadas[metrica_nome] = {
+                "maximo": {"modelo": self.nomes[ordem[0]] if len(ordem) else "N/A"},
+                "minimo": {"modelo": self.nomes[minimo] if len(ordem) else "N/A"},
+                "media": self.mean(metrica_nome)
+            }
+        return metricas_agregadas
+
+    def model_info(self, i: int) -> dict:
+        """Modelo na mesma forma de `lista_modelos` do /api/status."""
+        return {
+            "nome_normalizado": self.nomes[i],
+            "valor_eshmia": None if np.isnan(self.eshmia[i]) else float(self.eshmia[i]),
+            "valores_normalizados": {
+                nome: float(v) for nome, v in zip(METRICAS, self.matriz[i]) if not np.isnan(v)
+            }
+        }
+
+    def index_of(self, nome: str):
+        indices = self.cached("indices_por_nome", lambda s: {n: i for i, n in enumerate(s.nomes)})
+        return indices.get(nome)
+
+    def complete_position(self, nome: str):
+        """Posição do modelo em complete_rows(), ou None se ausente ou incompleto."""
+        i = self.index_of(nome)
+        if i is None:
+            return None
+        completos = self.complete_rows()
+        posicao = int(np.searchsorted(completos, i))
+        if posicao < len(completos) and completos[posicao] == i:
+            return posicao
+        return None
+
+    def _modelos(self, coluna: str, indices) -> list:
+        valores = self.colunas[coluna]
+        return [{"nome_normalizado": self.nomes[i], "valor": float(valores[i])} for i in indices]
+
+
+def load_snapshot(db_session: Session, batch_id) -> Snapshot:
+    """Monta o snapshot com uma consulta de resultados e uma de ESHMIA."""
+    linhas = db_session.query(
+        db.Resultado.modelo_id, db.Modelo.nome_normalizado, db.Metrica.nome, db.Resultado.valor_normalizado,
+        db.Modelo.tipo, db.Modelo.fonte
+    ).join(db.Modelo, db.Resultado.modelo_id == db.Modelo.id).join(
+        db.Metrica, db.Resultado.metrica_id == db.Metrica.id
+    ).filter(db.Resultado.valor_normalizado.isnot(None)).order_by(db.Resultado.modelo_id).all()
+
+    posicao = {}
+    nomes = []
+    tipos = []
+    fontes = []
+    for modelo_id, nome, _, _, tipo, fonte in linhas:
+        if modelo_id not in posicao:
+            posicao[modelo_id] = len(nomes)
+            nomes.append(nome)
+            tipos.append(tipo)
+            fontes.append(fonte)
+
+    coluna_metrica = {nome: j for j, nome in enumerate(METRICAS)}
+    matriz = np.full((len(nomes), len(METRICAS)), np.nan)
+    for modelo_id, _, metrica, valor, _, _ in linhas:
+        j = coluna_metrica.get(metrica)
+        if j is not None:
+            matriz[posicao[modelo_id], j] = valor
+
+    eshmia = np.full(len(nomes), np.nan)
+    for modelo_id, valor in latest_eshmia_values(db_session).items():
+        if modelo_id in posicao:
+            eshmia[posicao[modelo_id]] = valor
+
+    return Snapshot(batch_id, nomes, matriz, eshmia, ids=list(posicao), tipos=tipos, fontes=fontes)
+
+
+_cache = {"snapshot": None}
+_lock = threading.RLock()
+
+
+def get_snapshot(db_session: Session) -> Snapshot:
+    """Snapshot do lote mais recente; só é reconstruído quando surge um lote novo."""
+    batch_id = db_session.query(func.max(db.Lote.id)).scalar()
+    atual = _cache["snapshot"]
+    if atual is not None and atual.batch_id == batch_id:
+        return atual
+    with _lock:
+        atual = _cache["snapshot"]
+        if atual is None or atual.batch_id != batch_id:
+            atual = load_snapshot(db_session, batch_id)
+            _cache["snapshot"] = atual
+        return atual
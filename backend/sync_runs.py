@@ -0,0 +1,382 @@
+"""
+Registro das execuções da sincronização (tabela sync_runs).
+
+Cada execução (bridge_sync.run_sync, run.py) grava, por etapa, o tempo, as
+linhas processadas, os bytes lidos pelo processo (/proc/self/io) e a memória
+residente (RSS, de /proc/self/statm) no início e no fim, com a diferença e o
+pico durante a etapa. Etapas aninhadas, como a consulta à fonte dentro da
+coleta, aparecem como "coleta/consulta_fonte".
+
+O pico de cada etapa vem do VmHWM do processo, zerado no início da etapa
+(escrevendo 5 em /proc/self/clear_refs); as etapas abertas acumulam os picos
+das aninhadas. Zerar o VmHWM (e o ru_maxrss) afeta o processo inteiro, por
+isso só é feito com `medir_pico=True`, que os pontos de entrada de linha de
+comando (bridge_sync.py, updater.py --collect) passam; no processo do
+servidor (run.py, app_with_sync.py) a etapa grava só início, fim e
+diferença, e a execução usa o ru_maxrss (pico desde o início do processo).
+O mesmo vale onde o kernel não permite zerar o pico; o heap_pico_mb do modo
+de captura é a medida por etapa que não depende de nenhum dos dois.
+
+Ao terminar, cada etapa é comparada com a mediana das últimas execuções bem
+sucedidas da mesma origem; as que ficaram LIMITE_LENTIDAO vezes mais lentas
+(e ao menos MINIMO_LENTIDAO segundos acima) viram alertas, impressos e
+gravados junto com a execução.
+
+Modo de captura (ESHMIA_SYNC_PROFILE=1 ou `capturar=True`): cProfile da
+execução inteira e tracemalloc, com o pico de heap de cada etapa e as linhas
+que mais alocaram. Deixa a sincronização algumas vezes mais lenta.
+"""
+
+import os
+import json
+import time
+import contextlib
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+CAPTURAR = os.getenv('ESHMIA_SYNC_PROFILE', '0') == '1'
+LIMITE_LENTIDAO = float(os.getenv('ESHMIA_SYNC_SLOWDOWN', '1.5'))
+MINIMO_LENTIDAO = 0.5  # segundos: variações menores são ruído
+EXECUCOES_REFERENCIA = 10
+FUNCOES_PERFIL = 40
+LINHAS_ALOCACAO = 20
+
+_atual = ContextVar("execucao_sync", default=None)
+
+
+def _bytes_lidos():
+    """Bytes lidos pelo processo até agora (arquivos e sockets), ou None fora do Linux."""
+    try:
+        with open('/proc/self/io', encoding='ascii') as f:
+            for linha in f:
+                if linha.startswith('rchar:'):
+                    return int(linha.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _rss_mb():
+    """Memória residente atual do processo (MB), ou None fora do Linux."""
+    try:
+        with open('/proc/self/statm', encoding='ascii') as f:
+            paginas = int(f.read().split()[1])
+        return round(paginas * os.sysconf('SC_PAGE_SIZE') / 2**20, 1)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _pico_desde_reinicio_mb():
+    """VmHWM: pico de memória residente desde o último _reiniciar_pico (MB), ou None."""
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for linha in f:
+                if linha.startswith('VmHWM:'):
+                    return round(int(linha.split()[1]) / 1024, 1)
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _reiniciar_pico() -> bool:
+    """Zera o VmHWM do processo (passa a valer o RSS atual); False se o kernel não permitir."""
+    try:
+        with open('/proc/self/clear_refs', 'w', encoding='ascii') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _rss_pico_mb():
+    """Pico de memória residente desde o início do processo (MB), ou None sem o módulo resource."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB; macOS em bytes
+    return round(pico / (1024 * 1024 if os.uname().sysname == 'Darwin' else 1024), 1)
+
+
+def _diferenca(fim, inicio):
+    return fim - inicio if fim is not None and inicio is not None else None
+
+
+class SyncRun:
+    """
+    Uma execução da sincronização. Uso:
+
+        with SyncRun("bridge_sync") as execucao:
+            with stage("coleta") as etapa:
+                etapa["linhas"] = coletar()
+
+    Uma exceção marca a execução como erro (e é propagada); `fail()` faz o
+    mesmo quando a etapa trata o erro e só devolve False. `medir_pico` zera o
+    pico de RSS do processo a cada etapa: só para processos de linha de comando.
+    """
+
+    def __init__(self, origem: str, capturar: bool = None, medir_pico: bool = False):
+        self.origem = origem
+        self.capturar = CAPTURAR if capturar is None else capturar
+        self.pico_por_etapa = medir_pico
+        self.etapas = []
+        self.erro = None
+        self.lote_id = None
+        self.alertas = []
+        self.id = None
+        self._pilha = []
+        self._picos = []  # pico de RSS da execução e de cada etapa aberta
+        self._medir_pico = False
+        self._perfil = None
+
+    def __enter__(self):
+        self._token = _atual.set(self)
+        self.inicio = datetime.now(timezone.utc)
+        self._relogio = time.perf_counter()
+        self._bytes = _bytes_lidos()
+        self._medir_pico = self.pico_por_etapa and _reiniciar_pico()
+        self._picos = [_rss_mb() or 0.0]
+        if self.capturar:
+            self._iniciar_captura()
+        return self
+
+    def __exit__(self, tipo, excecao, tb):
+        if excecao is not None and self.erro is None:
+            self.erro = f"{tipo.__name__}: {excecao}"
+        self.duracao = time.perf_counter() - self._relogio
+        self.bytes_lidos = _diferenca(_bytes_lidos(), self._bytes)
+        if self._medir_pico:
+            self._acumular_pico()
+            self.memoria_pico_mb = self._picos.pop()
+        else:
+            self.memoria_pico_mb = _rss_pico_mb()
+        perfil = self._finalizar_captura() if self.capturar else None
+        _atual.reset(self._token)
+        self.save(perfil)
+        self.print_summary()
+        return False
+
+    def fail(self, motivo: str):
+        self.erro = self.erro or motivo
+
+    @contextlib.contextmanager
+    def stage(self, nome: str):
+        """Mede o bloco como etapa; o dicionário recebido aceita `linhas` e `lote_id`."""
+        self._pilha.append(nome)
+        etapa = {"nome": "/".join(self._pilha), "linhas": None}
+        self.etapas.append(etapa)  # na ordem de início: a etapa antes das aninhadas
+        bytes_inicio = _bytes_lidos()
+        rss_inicio = _rss_mb()
+        if self._medir_pico:
+            # O pico até aqui pertence às etapas abertas; daqui em diante, também a esta
+            self._acumular_pico()
+            _reiniciar_pico()
+            self._picos.append(rss_inicio or 0.0)
+        if self._perfil is not None:
+            import tracemalloc
+            tracemalloc.reset_peak()
+        inicio = time.perf_counter()
+        try:
+            yield etapa
+        except BaseException as e:
+            etapa["erro"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            etapa["segundos"] = round(time.perf_counter() - inicio, 4)
+            etapa["bytes_lidos"] = _diferenca(_bytes_lidos(), bytes_inicio)
+            rss_fim = _rss_mb()
+            etapa["memoria_inicio_mb"] = rss_inicio
+            etapa["memoria_fim_mb"] = rss_fim
+            etapa["memoria_delta_mb"] = round(rss_fim - rss_inicio, 1) if None not in (rss_fim, rss_inicio) else None
+            if self._medir_pico:
+                self._acumular_pico()
+                etapa["memoria_pico_mb"] = self._picos.pop()
+            else:
+                etapa["memoria_pico_mb"] = None
+            if self._perfil is not None:
+                import tracemalloc
+                etapa["heap_pico_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+            lote_id = etapa.pop("lote_id", None)
+            if lote_id is not None:
+                self.lote_id = lote_id
+            self._pilha.pop()
+
+    def _acumular_pico(self):
+        """Leva o pico de RSS desde o último reinício à execução e a todas as etapas abertas."""
+        pico = _pico_desde_reinicio_mb()
+        if pico is not None:
+            self._picos = [max(atual, pico) for atual in self._picos]
+
+    # --- Modo de captura ---
+
+    def _iniciar_captura(self):
+        import cProfile
+        import tracemalloc
+        perfilador = cProfile.Profile()
+        try:
+            perfilador.enable()
+        except ValueError:
+            # Outro perfilador já ativo no processo (ex.: python -m cProfile)
+            print("⚠️ Captura desativada: já existe um perfilador ativo.")
+            self.capturar = False
+            return
+        tracemalloc.start()
+        self._perfil = perfilador
+
+    def _finalizar_captura(self) -> dict:
+        import io
+        import pstats
+        import tracemalloc
+        self._perfil.disable()
+        texto = io.StringIO()
+        pstats.Stats(self._perfil, stream=texto).sort_stats('cumulative').print_stats(FUNCOES_PERFIL)
+        alocacoes = tracemalloc.take_snapshot().statistics('lineno')[:LINHAS_ALOCACAO]
+        heap_pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self._perfil = None
+        return {
+            "cprofile": texto.getvalue(),
+            "heap_pico_mb": round(heap_pico / 2**20, 1),
+            "alocacoes": [
+                {"linha": str(estatistica.traceback), "kb": round(estatistica.size / 1024, 1), "blocos": estatistica.count}
+                for estatistica in alocacoes
+            ]
+        }
+
+    # --- Persistência ---
+
+    def _medianas(self, db_session) -> dict:
+        """Mediana dos segundos de cada etapa nas últimas execuções ok da mesma origem."""
+        from . import database as db
+        anteriores = db_session.query(db.ExecucaoSync.etapas).filter(
+            db.ExecucaoSync.origem == self.origem,
+            db.ExecucaoSync.status == 'ok',
+            db.ExecucaoSync.perfil.is_(None)  # execuções com captura são mais lentas por natureza
+        ).order_by(db.ExecucaoSync.id.desc()).limit(EXECUCOES_REFERENCIA).all()
+        tempos = {}
+        for (etapas,) in anteriores:
+            for etapa in json.loads(etapas):
+                tempos.setdefault(etapa["nome"], []).append(etapa["segundos"])
+        return {nome: sorted(valores)[len(valores) // 2] for nome, valores in tempos.items()}
+
+    def _detectar_lentidao(self, medianas: dict):
+        for etapa in self.etapas:
+            mediana = medianas.get(etapa["nome"])
+            if mediana is None or etapa["segundos"] - mediana < MINIMO_LENTIDAO:
+                continue
+            if etapa["segundos"] > LIMITE_LENTIDAO * mediana:
+                self.alertas.append({
+                    "etapa": etapa["nome"],
+                    "segundos": etapa["segundos"],
+                    "mediana": mediana,
+                    "razao": round(etapa["segundos"] / mediana, 2) if mediana > 0 else None
+                })
+
+    def save(self, perfil: dict = None):
+        """
+        Grava a execução em sync_runs, em sessão própria. A tabela vem de
+        database.upgrade_db(), que a sincronização roda antes; erros propagam.
+        """
+        from . import database as db
+        db_session = db.SessionLocal()
+        try:
+            if perfil is None:
+                self._detectar_lentidao(self._medianas(db_session))
+            registro = db.ExecucaoSync(
+                origem=self.origem,
+                inicio=self.inicio,
+                duracao=round(self.duracao, 4),
+                status='erro' if self.erro else 'ok',
+                erro=self.erro,
+                lote_id=self.lote_id,
+                bytes_lidos=self.bytes_lidos,
+                memoria_pico_mb=self.memoria_pico_mb,
+                etapas=json.dumps(self.etapas, ensure_ascii=False),
+                alertas=json.dumps(self.alertas, ensure_ascii=False) if self.alertas else None,
+                perfil=json.dumps(perfil, ensure_ascii=False) if perfil else None
+            )
+            db_session.add(registro)
+            db_session.commit()
+            self.id = registro.id
+        finally:
+            db_session.close()
+
+    def print_summary(self):
+        estado = "❌ erro" if self.erro else "✅ ok"
+        print(f"\n⏱️  Execução #{self.id} ({self.origem}, {estado}) em {self.duracao:.2f}s:")
+        for etapa in self.etapas:
+            recuo = "   " * etapa["nome"].count("/")
+            linhas = f", {etapa['linhas']} linhas" if etapa["linhas"] is not None else ""
+            memoria = f", pico {etapa['memoria_pico_mb']:.0f} MB" if etapa.get("memoria_pico_mb") is not None else ""
+            print(f"   {recuo}{etapa['nome'].rsplit('/', 1)[-1]}: {etapa['segundos']:.2f}s{linhas}{memoria}")
+        for alerta in self.alertas:
+            print(f"   🐢 Etapa '{alerta['etapa']}' levou {alerta['segundos']:.2f}s "
+                  f"(mediana das últimas execuções: {alerta['mediana']:.2f}s)")
+
+
+@contextlib.contextmanager
+def stage(nome: str):
+    """Etapa da execução em andamento; fora de uma execução só repassa um dicionário descartável."""
+    execucao = _atual.get()
+    if execucao is None:
+        yield {}
+        return
+    with execucao.stage(nome) as etapa:
+        yield etapa
+
+
+def current():
+    """Execução em andamento neste contexto, ou None."""
+    return _atual.get()
+
+
+def serialize(registro, tem_perfil: bool, com_perfil: bool = False) -> dict:
+    """Linha de sync_runs no formato de /api/sync/runs."""
+    dados = {
+        "id": registro.id,
+        "origem": registro.origem,
+        "inicio": registro.inicio.isoformat() if registro.inicio else None,
+        "duracao": registro.duracao,
+        "status": registro.status,
+        "erro": registro.erro,
+        "lote_id": registro.lote_id,
+        "bytes_lidos": registro.bytes_lidos,
+        "memoria_pico_mb": registro.memoria_pico_mb,
+        "etapas": json.loads(registro.etapas),
+        "alertas": json.loads(registro.alertas) if registro.alertas else [],
+        "tem_perfil": tem_perfil
+    }
+    if com_perfil:
+        dados["perfil"] = json.loads(registro.perfil) if registro.perfil else None
+    return dados
+
+
+def list_runs(db_session, limite: int = 20, origem: str = None) -> list:
+    """Execuções mais recentes primeiro (sem o perfil capturado, que não é lido do banco)."""
+    from sqlalchemy.exc import OperationalError, ProgrammingError
+    from sqlalchemy.orm import defer
+    from . import database as db
+    consulta = db_session.query(db.ExecucaoSync, db.ExecucaoSync.perfil.isnot(None)) \
+        .options(defer(db.ExecucaoSync.perfil))
+    if origem:
+        consulta = consulta.filter(db.ExecucaoSync.origem == origem)
+    try:
+        linhas = consulta.order_by(db.ExecucaoSync.id.desc()).limit(limite).all()
+    except (OperationalError, ProgrammingError):
+        # Banco anterior à tabela e ainda não atualizado por upgrade_db
+        return []
+    return [serialize(registro, tem_perfil) for registro, tem_perfil in linhas]
+
+
+def get_run(db_session, execucao_id: int):
+    """Uma execução com o perfil capturado, ou None."""
+    from sqlalchemy.exc import OperationalError, ProgrammingError
+    from . import database as db
+    try:
+        registro = db_session.get(db.ExecucaoSync, execucao_id)
+    except (OperationalError, ProgrammingError):
+        return None
+    if registro is None:
+        return None
+    return serialize(registro, registro.perfil is not None, com_perfil=True)
@@ -0,0 +1,102 @@
+"""
+Intervalos de confiança do ESHMIA e estabilidade do ranking (bootstrap).
+
+O ESHMIA é a média de seis benchmarks; diferenças pequenas entre modelos
+podem depender de quais benchmarks entraram no índice. Cada réplica sorteia
+seis benchmarks com reposição (o mesmo sorteio para todos os modelos) e
+recalcula o ESHMIA de todos de uma vez: com W (réplicas × 6) com as
+frequências de cada benchmark, as réplicas são W @ X.T (réplicas × modelos).
+Dessas réplicas saem o intervalo de confiança de cada modelo, a posição
+média, o intervalo da posição e a probabilidade de ficar em 1º e no top 10.
+
+As réplicas são geradas em blocos de tamanho fixo, cada um com sua semente
+derivada; assim o resultado é o mesmo com ou sem pool de processos.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sqlalchemy.orm import Session
+from . import database as db
+
+REPLICAS = int(os.getenv('ESHMIA_BOOTSTRAP_REPLICAS', '1000'))
+WORKERS = int(os.getenv('ESHMIA_BOOTSTRAP_WORKERS', '0'))  # 0 = no próprio processo
+NIVEL = 0.95
+SEMENTE = 20240101
+REPLICAS_POR_BLOCO = 250
+
+
+def _bloco_replicas(matriz: np.ndarray, replicas: int, semente) -> tuple:
+    """Réplicas de ESHMIA (replicas × n, float32) e posições (1 = melhor) de um bloco."""
+    rng = np.random.default_rng(semente)
+    n_metricas = matriz.shape[1]
+    sorteios = rng.integers(0, n_metricas, size=(replicas, n_metricas))
+    pesos = np.zeros((replicas, n_metricas), dtype=np.float32)
+    np.add.at(pesos, (np.arange(replicas)[:, None], sorteios), 1.0 / n_metricas)
+
+    valores = pesos @ matriz.T.astype(np.float32)
+    ordem = np.argsort(-valores, axis=1, kind='stable')
+    posicoes = np.empty_like(ordem, dtype=np.int32)
+    np.put_along_axis(posicoes, ordem, np.arange(1, valores.shape[1] + 1, dtype=np.int32)[None, :], axis=1)
+    return valores, posicoes
+
+
+def bootstrap_eshmia(matriz: np.ndarray, replicas: int = REPLICAS, nivel: float = NIVEL,
+                     workers: int = WORKERS, semente: int = SEMENTE) -> dict:
+    """
+    Bootstrap do ESHMIA para a matriz modelos × métricas (sem valores ausentes).
+    Retorna um dict de vetores (um valor por modelo).
+    """
+    n = len(matriz)
+    tamanhos = [min(REPLICAS_POR_BLOCO, replicas - i) for i in range(0, replicas, REPLICAS_POR_BLOCO)]
+    sementes = np.random.SeedSequence(semente).spawn(len(tamanhos))
+
+    if workers and len(tamanhos) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            blocos = list(pool.map(_bloco_replicas, [matriz] * len(tamanhos), tamanhos, sementes))
+    else:
+        blocos = [_bloco_replicas(matriz, t, s) for t, s in zip(tamanhos, sementes)]
+
+    valores = np.concatenate([b[0] for b in blocos])
+    posicoes = np.concatenate([b[1] for b in blocos])
+
+    alfa = (1 - nivel) / 2
+    ic_inferior, ic_superior = np.quantile(valores, [alfa, 1 - alfa], axis=0)
+    posicao_inferior, posicao_superior = np.quantile(posicoes, [alfa, 1 - alfa], axis=0)
+    return {
+        "ic_inferior": ic_inferior,
+        "ic_superior": ic_superior,
+        "posicao_media": posicoes.mean(axis=0),
+        "posicao_ic_inferior": np.floor(posicao_inferior).astype(int),
+        "posicao_ic_superior": np.ceil(posicao_superior).astype(int),
+        "prob_primeiro": (posicoes == 1).mean(axis=0),
+        "prob_top10": (posicoes <= min(10, n)).mean(axis=0),
+    }
+
+
+def calculate_and_store_intervals(db_session: Session, lote) -> int:
+    """
+    Etapa estatística após calculate_and_store_metrics: calcula o bootstrap
+    dos modelos com as seis métricas e grava os resultados no lote.
+    """
+    from .snapshot import load_snapshot
+
+    if lote is None:
+        return 0
+    snapshot = load_snapshot(db_session, lote.id)
+    completos = snapshot.complete_rows()
+    if len(completos) < 2:
+        return 0
+
+    print(f"📊 Bootstrap do ESHMIA: {len(completos)} modelos × {REPLICAS} réplicas...")
+    estatisticas = bootstrap_eshmia(snapshot.matriz[completos])
+    db_session.bulk_insert_mappings(db.IntervaloEshmia, [
+        {
+            "lote_id": lote.id,
+            "modelo_id": snapshot.ids[i],
+            **{campo: valores[j].item() for campo, valores in estatisticas.items()}
+        }
+        for j, i in enumerate(completos)
+    ])
+    db_session.commit()
+    return len(completos)
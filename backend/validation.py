@@ -0,0 +1,128 @@
+"""
+Validação dos dados coletados antes de gravar no banco.
+
+Cada lote coletado (CSV, Postgres ou mock) vira um DataFrame e todas as
+verificações são operações sobre colunas inteiras, sem try/except por valor:
+- valores ausentes ou sentinelas ("-", "N/A", "null"...) contam como ausentes;
+- textos não numéricos e valores fora de 0-100 invalidam a linha;
+- nomes vazios ou repetidos no mesmo lote (mantém a primeira ocorrência);
+- linhas sem nenhuma métrica.
+Linhas reprovadas vão para a quarentena com os motivos.
+"""
+
+import json
+import time
+import numpy as np
+from .indices import METRICAS
+from .resolution import EntityResolver, canonical_name, merge_key
+
+SENTINELAS = ["", "-", "--", "n/a", "na", "nan", "null", "none"]
+FAIXA_VALIDA = (0.0, 100.0)
+
+
+def _marcar(motivos: np.ndarray, mascara, texto: str):
+    """Acrescenta `texto` aos motivos das linhas marcadas."""
+    mascara = np.asarray(mascara, dtype=bool)
+    motivos[mascara] = np.where(motivos[mascara] == "", texto, motivos[mascara] + "; " + texto)
+
+
+def validate_models(model_list: list) -> tuple:
+    """
+    Valida a lista de modelos no formato do coletor ({"nome", "fonte", "metricas"...}).
+    Retorna (modelos válidos com métricas em float, registros de quarentena, estatísticas).
+    """
+    import pandas as pd  # importado só quando há dados a validar (ver benchmarks/startup.py)
+
+    inicio = time.perf_counter()
+    n = len(model_list)
+    nomes = pd.Series([m.get("nome") for m in model_list], dtype=object)
+    brutos = pd.DataFrame.from_records([m.get("metricas") or {} for m in model_list], columns=METRICAS, index=range(n))
+
+    motivos = np.full(n, "", dtype=object)
+    estatisticas = {"total": n}
+
+    # Métricas: ausentes/sentinelas, não numéricas e fora da faixa
+    # (só os valores que não convertem para número passam pelo teste de texto)
+    valores = np.empty((n, len(METRICAS)))
+    ausentes = np.zeros((n, len(METRICAS)), dtype=bool)
+    nao_numericos = np.zeros((n, len(METRICAS)), dtype=bool)
+    for j, metrica in enumerate(METRICAS):
+        coluna = pd.to_numeric(brutos[metrica], errors="coerce").to_numpy(dtype=float)
+        suspeitos = np.isnan(coluna) & brutos[metrica].notna().to_numpy()
+        texto = brutos[metrica][suspeitos].astype(str).str.strip().str.lower()
+        sentinela = np.zeros(n, dtype=bool)
+        sentinela[suspeitos] = texto.isin(SENTINELAS).to_numpy()
+        nao_numericos[:, j] = suspeitos & ~sentinela
+        ausentes[:, j] = np.isnan(coluna) & ~nao_numericos[:, j]
+        valores[:, j] = coluna
+    with np.errstate(invalid="ignore"):
+        fora_da_faixa = ~np.isnan(valores) & ~((valores >= FAIXA_VALIDA[0]) & (valores <= FAIXA_VALIDA[1]))
+    for j, metrica in enumerate(METRICAS):
+        _marcar(motivos, nao_numericos[:, j], f"{metrica} não numérico")
+        _marcar(motivos, fora_da_faixa[:, j], f"{metrica} fora de {FAIXA_VALIDA[0]:g}-{FAIXA_VALIDA[1]:g}")
+    sem_metricas = ausentes.all(axis=1)
+    _marcar(motivos, sem_metricas, "sem métricas")
+
+    # Nomes: vazios e repetidos no lote. A repetição usa a forma canônica da
+    # resolução: duas grafias do mesmo modelo no lote gravariam uma por cima da outra
+    # Nomes sentinela ("N/A", "-"...) são comparados como escritos, sem trocar "/" por "-"
+    normalizados = nomes.fillna("").astype(str).str.strip().str.lower()
+    sem_nome = ((normalizados == "") | normalizados.isin(SENTINELAS)).to_numpy()
+    canonicos = nomes.fillna("").astype(str).map(canonical_name)
+    duplicados = canonicos.duplicated(keep="first").to_numpy() & ~sem_nome
+    # Grafias que só diferem na organização ou na data passam pelas regras
+    # exatas do resolvedor, na ordem do lote (só os grupos com mais de uma)
+    candidatos = canonicos.map(merge_key).duplicated(keep=False).to_numpy() & ~duplicados & ~sem_nome
+    resolvedor = EntityResolver()
+    for i in np.flatnonzero(candidatos):
+        if resolvedor.resolve(canonicos.iat[i], aproximado=False)[0] is not None:
+            duplicados[i] = True
+        else:
+            resolvedor.add(canonicos.iat[i], i)
+    _marcar(motivos, sem_nome, "nome ausente")
+    _marcar(motivos, duplicados, "nome duplicado no lote")
+
+    reprovados = motivos != ""
+    estatisticas.update({
+        "validos": int((~reprovados).sum()),
+        "quarentena": int(reprovados.sum()),
+        "incompletos": int((ausentes.any(axis=1) & ~reprovados).sum()),
+        "nao_numericos": int(nao_numericos.sum()),
+        "fora_da_faixa": int(fora_da_faixa.sum()),
+        "sem_metricas": int(sem_metricas.sum()),
+        "sem_nome": int(sem_nome.sum()),
+        "duplicados": int(duplicados.sum()),
+    })
+
+    # Saída: métricas válidas em float, ausentes omitidas
+    indices_validos = np.flatnonzero(~reprovados)
+    completos = ~ausentes[indices_validos].any(axis=1)
+    validos = [
+        {**model_list[i], "metricas": dict(zip(METRICAS, linha)) if completo else {
+            m: v for m, v in zip(METRICAS, linha) if v == v  # v != v: NaN
+        }}
+        for i, linha, completo in zip(indices_validos, valores[indices_validos].tolist(), completos)
+    ]
+    quarentena = [
+        {
+            "fonte": model_list[i].get("fonte"),
+            "nome": None if sem_nome[i] else str(model_list[i].get("nome")),
+            "motivos": motivos[i],
+            "dados": json.dumps(model_list[i].get("metricas") or {}, default=str, ensure_ascii=False)
+        }
+        for i in np.flatnonzero(reprovados)
+    ]
+    estatisticas["segundos"] = time.perf_counter() - inicio
+    return validos, quarentena, estatisticas
+
+
+def format_report(estatisticas: dict) -> str:
+    """Resumo de uma linha para o log da sincronização."""
+    return (
+        f"🧪 Validação: {estatisticas['validos']}/{estatisticas['total']} linhas válidas, "
+        f"{estatisticas['quarentena']} em quarentena "
+        f"(não numéricos: {estatisticas['nao_numericos']}, fora da faixa: {estatisticas['fora_da_faixa']}, "
+        f"sem métricas: {estatisticas['sem_metricas']}, duplicados: {estatisticas['duplicados']}, "
+        f"sem nome: {estatisticas['sem_nome']}), {estatisticas['incompletos']} incompletas, "
+        f"{estatisticas['segundos'] * 1000:.1f} ms"
+    )
@@ -0,0 +1,89 @@
+"""
+Partida a quente do servidor.
+
+O /api/status padrão de cada lote é salvo em disco (JSON compacto, com o
+batch id) assim que é montado. Na inicialização, run.py carrega esse arquivo
+e o servidor responde com ele imediatamente, enquanto a sincronização e a
+montagem do status novo rodam em segundo plano; quando terminam, o status
+salvo é descartado e as requisições passam a usar o lote atual.
+
+O status salvo também é descartado assim que existir no banco um lote mais
+novo que o dele (gravado por bridge_sync, `updater.py --collect`...), para
+que /api/status não contradiga /api/delta e /api/events, que leem o banco.
+"""
+
+import os
+import json
+import threading
+from datetime import datetime, timezone
+
+ARQUIVO = os.path.join(os.path.dirname(__file__), '..', 'warm_start.json')
+FORMATO = 1
+
+_estado = {"payload": None}
+_lock = threading.Lock()
+
+
+def _arquivo(arquivo: str = None) -> str:
+    """Arquivo do status salvo: o informado, ESHMIA_WARM_START_FILE ou warm_start.json na raiz."""
+    return arquivo or os.getenv('ESHMIA_WARM_START_FILE') or ARQUIVO
+
+
+def save(payload: dict, arquivo: str = None) -> bool:
+    """Grava o status (sem o timestamp da requisição) de forma atômica."""
+    arquivo = _arquivo(arquivo)
+    conteudo = {
+        "formato": FORMATO,
+        "batch_id": payload.get("batch_id"),
+        "salvo_em": datetime.now(timezone.utc).isoformat(),
+        "payload": payload
+    }
+    temporario = f"{arquivo}.{os.getpid()}.tmp"
+    try:
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(conteudo, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temporario, arquivo)
+        return True
+    except (OSError, TypeError, ValueError) as e:
+        print(f"⚠️ Não foi possível salvar o status para a partida a quente: {e}")
+        return False
+
+
+def load(arquivo: str = None):
+    """Status salvo, com o timestamp do momento em que foi salvo, ou None."""
+    try:
+        with open(_arquivo(arquivo), encoding='utf-8') as f:
+            conteudo = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if conteudo.get("formato") != FORMATO or not isinstance(conteudo.get("payload"), dict):
+        return None
+    return {**conteudo["payload"], "timestamp": conteudo.get("salvo_em")}
+
+
+def activate(arquivo: str = None):
+    """Passa a servir o status salvo. Retorna o payload carregado (ou None se não houver)."""
+    payload = load(arquivo)
+    with _lock:
+        _estado["payload"] = payload
+    return payload
+
+
+def current(ultimo_lote: int = None):
+    """
+    Status salvo em uso, ou None fora da partida a quente. Com `ultimo_lote`
+    (o maior id da tabela lotes), encerra a partida a quente se o status
+    salvo for de um lote anterior.
+    """
+    payload = _estado["payload"]
+    if payload is not None and ultimo_lote is not None and ultimo_lote > (payload.get("batch_id") or 0):
+        finish()
+        print(f"♨️  Status salvo (lote {payload.get('batch_id')}) substituído pelo lote {ultimo_lote} do banco")
+        return None
+    return payload
+
+
+def finish():
+    """Encerra a partida a quente: as requisições voltam a usar o lote atual."""
+    with _lock:
+        _estado["payload"] = None
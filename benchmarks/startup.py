@@ -0,0 +1,148 @@
+"""
+Tempo de inicialização dos pontos de entrada (CLI e servidor).
+
+Para cada ponto de entrada, em subprocessos novos:
+- tempo de parede de `import <módulo>` (mediana de N execuções, descontado o
+  interpretador vazio);
+- detalhamento de `python -X importtime` (módulos com maior tempo acumulado);
+- módulos pesados que o caminho não usa e não podem ter sido importados.
+
+Sai com código 1 se algum ponto de entrada estourar o orçamento ou importar
+um módulo proibido, para servir de verificação em CI.
+
+Uso: python benchmarks/startup.py [--repeat 7] [--top 10] [--scale 1.0] [--json resultado.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Orçamento (ms, já descontado o interpretador) e módulos que não podem ser
+# carregados só por importar o ponto de entrada. Os orçamentos têm folga para
+# máquinas lentas (use --scale para ajustar); a regressão típica, um pandas ou
+# psycopg2 importado no topo de um módulo, é pega pela lista de proibidos.
+PONTOS_DE_ENTRADA = {
+    "run.py": {
+        "modulo": "run",
+        "orcamento_ms": 50,
+        "proibidos": ["pandas", "psycopg2", "flask", "sqlalchemy", "numpy", "dotenv"]
+    },
+    "show_table.py": {
+        "modulo": "show_table",
+        "orcamento_ms": 900,
+        "proibidos": ["pandas", "psycopg2", "flask", "dotenv"]
+    },
+    "bridge_sync.py": {
+        "modulo": "backend.bridge_sync",
+        "orcamento_ms": 50,
+        "proibidos": ["pandas", "psycopg2", "flask", "sqlalchemy", "numpy", "dotenv"]
+    },
+    "database.py": {
+        "modulo": "backend.database",
+        "orcamento_ms": 800,
+        "proibidos": ["pandas", "psycopg2", "dotenv", "sqlalchemy.dialects.sqlite"]
+    },
+    "collector.py": {
+        "modulo": "backend.collector",
+        "orcamento_ms": 900,
+        "proibidos": ["pandas", "psycopg2", "flask", "dotenv"]
+    },
+    "app.py (servidor)": {
+        "modulo": "backend.app",
+        "orcamento_ms": 1500,
+        "proibidos": ["pandas", "psycopg2", "dotenv"]
+    },
+}
+
+
+def _executar(*argumentos) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *argumentos], cwd=RAIZ, capture_output=True, text=True, check=True)
+
+
+def wall_time_ms(codigo: str, repeticoes: int) -> float:
+    """Mediana do tempo de parede de `python -c <código>`, em ms."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        _executar("-c", codigo)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def _importtime(codigo: str) -> list:
+    """Linhas de `python -X importtime -c <código>`: (módulo, próprio µs, acumulado µs)."""
+    linhas = []
+    for linha in _executar("-X", "importtime", "-c", codigo).stderr.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        proprio, acumulado, nome = linha[len("import time:"):].split("|")
+        linhas.append((nome.rstrip(), int(proprio), int(acumulado)))
+    return linhas
+
+
+def import_breakdown(modulo: str, top: int, ignorar: set = frozenset()) -> list:
+    """Módulos com maior tempo acumulado ao importar `modulo` (fora os de `ignorar`)."""
+    linhas = [l for l in _importtime(f"import {modulo}") if l[0].strip() not in ignorar]
+    return sorted(linhas, key=lambda l: l[2], reverse=True)[:top]
+
+
+def loaded_modules(modulo: str, candidatos: list) -> list:
+    """Quais dos módulos candidatos ficam carregados após importar `modulo`."""
+    codigo = (f"import sys, {modulo}; "
+              f"print('\\n'.join(m for m in {candidatos!r} if m in sys.modules))")
+    return [m for m in _executar("-c", codigo).stdout.split() if m]
+
+
+def run_benchmark(repeticoes: int = 7, top: int = 10, escala: float = 1.0) -> tuple:
+    base = wall_time_ms("pass", repeticoes)
+    # Módulos que o interpretador já importa sozinho (site, codecs...) ficam fora do detalhamento
+    do_interpretador = {nome.strip() for nome, _, _ in _importtime("pass")}
+    print(f"⏱️  Interpretador vazio: {base:.1f} ms (descontado abaixo)\n")
+
+    resultados = {}
+    ok = True
+    for nome, ponto in PONTOS_DE_ENTRADA.items():
+        tempo = wall_time_ms(f"import {ponto['modulo']}", repeticoes) - base
+        proibidos = loaded_modules(ponto["modulo"], ponto["proibidos"])
+        orcamento = ponto["orcamento_ms"] * escala
+        dentro = tempo <= orcamento and not proibidos
+        ok &= dentro
+
+        print(f"{'✅' if dentro else '❌'} {nome}: {tempo:.1f} ms (orçamento {orcamento:.0f} ms)")
+        if proibidos:
+            print(f"   módulos que não deveriam ser importados: {', '.join(proibidos)}")
+        detalhes = import_breakdown(ponto["modulo"], top, do_interpretador)
+        for modulo, proprio, acumulado in detalhes:
+            print(f"   {acumulado / 1000:8.1f} ms acumulado {proprio / 1000:7.1f} ms próprio  {modulo}")
+        print()
+
+        resultados[nome] = {
+            "modulo": ponto["modulo"],
+            "tempo_ms": round(tempo, 2),
+            "orcamento_ms": orcamento,
+            "proibidos_importados": proibidos,
+            "importtime": [{"modulo": m.strip(), "proprio_us": p, "acumulado_us": a} for m, p, a in detalhes]
+        }
+    return ok, {"interpretador_ms": round(base, 2), "pontos_de_entrada": resultados}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede o tempo de inicialização dos pontos de entrada.")
+    parser.add_argument("--repeat", type=int, default=7, help="execuções por medida (mediana)")
+    parser.add_argument("--top", type=int, default=10, help="linhas do -X importtime por ponto de entrada")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplica os orçamentos (máquinas lentas)")
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    ok, resultados = run_benchmark(args.repeat, args.top, args.scale)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+    print("✅ Dentro do orçamento." if ok else "❌ Orçamento de inicialização estourado.")
+    sys.exit(0 if ok else 1)
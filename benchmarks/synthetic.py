@@ -0,0 +1,124 @@
+"""
+Gerador de leaderboards sintéticos no formato do big_benchmarks_top100.csv.
+
+Os modelos têm uma "qualidade" latente e cada métrica é essa qualidade com
+ruído e viés próprios (GPQA e MUSR mais baixos), então ranking, médias e
+correlações se parecem com os reais. Para exercitar a validação e a
+resolução de nomes, uma fração das linhas repete um modelo com outra grafia
+("Org/Nome", maiúsculas) e outra fração tem valores inválidos ("-", 130.5, "n/d").
+
+A saída é determinística para (modelos, semente).
+
+Uso: python benchmarks/synthetic.py 100k -o leaderboard-100k.csv [--seed 42]
+"""
+
+import os
+import csv
+import argparse
+import numpy as np
+
+COLUNAS = ['rank', 'type', 'model', 'average', 'ifeval', 'bbh', 'math', 'gpqa', 'musr', 'mmlu_pro', 'co2_cost']
+COLUNAS_METRICAS = ['ifeval', 'bbh', 'math', 'gpqa', 'musr', 'mmlu_pro']
+
+FAMILIAS = ["llama", "qwen", "mistral", "gemma", "phi", "falcon", "yi", "deepseek", "internlm", "olmo",
+            "granite", "command", "nemotron", "solar", "starling", "zephyr"]
+TAMANHOS = [1, 2, 3, 7, 8, 9, 13, 14, 27, 32, 34, 70, 72, 110, 405]
+VARIANTES = ["instruct", "chat", "base", "dpo", "sft", "it", "preview"]
+TIPOS = ["open", "instruct", "base", "fine-tuned", "proprietary"]
+ORGANIZACOES = ["meta", "alibaba", "mistralai", "google", "microsoft", "tiiuae", "01-ai", "nvidia"]
+
+# Deslocamento médio de cada métrica em relação à qualidade (0-100)
+VIES = {'ifeval': 8.0, 'bbh': 0.0, 'math': -12.0, 'gpqa': -30.0, 'musr': -22.0, 'mmlu_pro': -5.0}
+VALORES_INVALIDOS = ["-", "130.5", "n/d", "-4"]
+
+TAMANHOS_NOMEADOS = {"k": 1_000, "m": 1_000_000}
+
+
+def parse_size(texto: str) -> int:
+    """'1k' -> 1000, '1m' -> 1000000, '2500' -> 2500."""
+    texto = texto.strip().lower()
+    if texto and texto[-1] in TAMANHOS_NOMEADOS:
+        return int(float(texto[:-1]) * TAMANHOS_NOMEADOS[texto[-1]])
+    return int(texto)
+
+
+def generate_rows(modelos: int, semente: int = 42, duplicados: float = 0.01, invalidos: float = 0.01) -> list:
+    """Linhas do CSV (dicionários com COLUNAS), em ordem de rank."""
+    rng = np.random.default_rng(semente)
+    qualidade = rng.beta(2.5, 2.0, modelos) * 100
+    metricas = {
+        coluna: np.clip(qualidade + vies + rng.normal(0, 9, modelos), 0, 100).round(2)
+        for coluna, vies in VIES.items()
+    }
+    media = np.mean([metricas[c] for c in COLUNAS_METRICAS], axis=0).round(2)
+    co2 = rng.exponential(8.0, modelos).round(4)
+    familia = rng.integers(len(FAMILIAS), size=modelos)
+    tamanho = rng.integers(len(TAMANHOS), size=modelos)
+    variante = rng.integers(len(VARIANTES), size=modelos)
+    tipo = rng.integers(len(TIPOS), size=modelos)
+
+    # O índice i entra no nome: nomes distintos ficam em blocos distintos da resolução
+    nomes = [f"{FAMILIAS[f]}-{TAMANHOS[t]}b-{VARIANTES[v]}-{i}" for i, (f, t, v) in enumerate(zip(familia, tamanho, variante))]
+
+    # Outras grafias de modelos já listados (a resolução deve fundi-las)
+    for i in np.flatnonzero(rng.random(modelos) < duplicados):
+        original = nomes[rng.integers(modelos)]
+        if rng.random() < 0.5:
+            nomes[i] = f"{ORGANIZACOES[rng.integers(len(ORGANIZACOES))]}/{original}"
+        else:
+            nomes[i] = original.upper().replace("-", " ")
+
+    linhas = []
+    for i in np.argsort(-media, kind='stable'):
+        linha = {
+            'type': TIPOS[tipo[i]],
+            'model': nomes[i],
+            'average': f"{media[i]:.2f}",
+            'co2_cost': f"{co2[i]:.4f}"
+        }
+        for coluna in COLUNAS_METRICAS:
+            linha[coluna] = f"{metricas[coluna][i]:.2f}"
+        linhas.append(linha)
+
+    for posicao, linha in enumerate(linhas, start=1):
+        linha['rank'] = posicao
+
+    # Valores inválidos (a validação deve mandar essas linhas para a quarentena)
+    for i in np.flatnonzero(rng.random(modelos) < invalidos):
+        linhas[i][COLUNAS_METRICAS[rng.integers(len(COLUNAS_METRICAS))]] = VALORES_INVALIDOS[rng.integers(len(VALORES_INVALIDOS))]
+    return linhas
+
+
+def write_csv(caminho: str, modelos: int, semente: int = 42, duplicados: float = 0.01,
+              invalidos: float = 0.01) -> str:
+    """Grava o CSV sintético (de forma atômica) e retorna o caminho."""
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, 'w', encoding='utf-8', newline='') as f:
+        escritor = csv.DictWriter(f, fieldnames=COLUNAS, lineterminator='\n')
+        escritor.writeheader()
+        escritor.writerows(generate_rows(modelos, semente, duplicados, invalidos))
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def cached_csv(pasta: str, modelos: int, semente: int = 42) -> str:
+    """CSV sintético de `modelos` linhas em `pasta`, gerado só na primeira vez."""
+    caminho = os.path.join(pasta, f"leaderboard-{modelos}-{semente}.csv")
+    if not os.path.exists(caminho):
+        write_csv(caminho, modelos, semente)
+    return caminho
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera um leaderboard sintético no formato do CSV do projeto.")
+    parser.add_argument("modelos", help="número de modelos (ex.: 1k, 10k, 100k, 1m)")
+    parser.add_argument("-o", "--output", help="arquivo de saída (padrão: leaderboard-<n>.csv)")
+    parser.add_argument("--seed", type=int, default=42, help="semente (a mesma semente gera o mesmo arquivo)")
+    parser.add_argument("--duplicates", type=float, default=0.01, help="fração de linhas com outra grafia de um modelo")
+    parser.add_argument("--invalid", type=float, default=0.01, help="fração de linhas com um valor inválido")
+    args = parser.parse_args()
+
+    modelos = parse_size(args.modelos)
+    caminho = write_csv(args.output or f"leaderboard-{modelos}.csv", modelos, args.seed, args.duplicates, args.invalid)
+    print(f"✅ {modelos} modelos gravados em {caminho} ({os.path.getsize(caminho) / 1024:.0f} KB)")
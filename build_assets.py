@@ -0,0 +1,181 @@
+"""
+Pipeline de assets do frontend: frontend/ -> dist/.
+
+- imagens, CSS e JS ganham o hash do conteúdo no nome (assets/<nome>.<hash>.<ext>)
+  e as referências em index.html e style.css são reescritas: a mesma URL
+  sempre tem o mesmo conteúdo e pode ficar em cache indefinidamente;
+- imagens maiores que LADO_MAXIMO são reduzidas e recomprimidas, e PNGs
+  opacos grandes (fotos) viram JPEG (com Pillow, se instalado; animações são
+  mantidas como estão);
+- arquivos de texto recebem uma versão pré-comprimida (.gz) ao lado;
+- index.html, data.json e data/ (gerados por build_static.py) são copiados
+  com o nome original.
+
+Uso: python3 build_static.py && python3 build_assets.py
+"""
+
+import io
+import os
+import re
+import gzip
+import shutil
+import hashlib
+import argparse
+from urllib.parse import quote
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow é opcional: sem ele as imagens são copiadas como estão
+    Image = None
+
+ORIGEM = "frontend"
+DESTINO = "dist"
+ASSETS_DIR = "assets"
+
+# Arquivos servidos com o nome original (revalidados a cada visita)
+SEM_HASH = {"index.html", "data.json"}
+
+EXTENSOES_IMAGEM = {".png", ".gif", ".jpg", ".jpeg", ".webp"}
+EXTENSOES_TEXTO = {".html", ".css", ".js", ".json", ".svg"}
+
+# Maior lado das imagens, em pixels (o maior uso no layout é o card do livro)
+LADO_MAXIMO = 1200
+# PNG sem transparência acima deste tamanho é convertido para JPEG
+LIMITE_PNG = 200 * 1024
+QUALIDADE_JPEG = 85
+NIVEL_GZIP = 9
+
+
+def _hash(conteudo: bytes) -> str:
+    return hashlib.sha256(conteudo).hexdigest()[:16]
+
+
+def fingerprint(nome: str, conteudo: bytes, extensao: str = None) -> str:
+    """assets/<nome sem espaços>.<hash>.<ext> (a extensão muda se a imagem mudou de formato)"""
+    base, original = os.path.splitext(nome)
+    extensao = extensao or original
+    base = re.sub(r'\s+', '-', base)
+    return f"{ASSETS_DIR}/{base}.{_hash(conteudo)}{extensao}"
+
+
+def optimize_image(caminho: str) -> tuple:
+    """
+    Reduz imagens estáticas maiores que LADO_MAXIMO e recomprime; PNGs opacos
+    acima de LIMITE_PNG viram JPEG. Retorna (conteúdo, extensão). Mantém o
+    original se Pillow não estiver disponível, se a imagem for animada ou se
+    o resultado não for menor.
+    """
+    extensao = os.path.splitext(caminho)[1]
+    with open(caminho, 'rb') as f:
+        original = f.read()
+    if Image is None:
+        return original, extensao
+
+    with Image.open(io.BytesIO(original)) as imagem:
+        if getattr(imagem, "n_frames", 1) > 1:
+            return original, extensao
+        formato, opcoes, nova_extensao = imagem.format, {}, extensao
+        if formato == "PNG" and imagem.mode in ("RGB", "L") and len(original) > LIMITE_PNG:
+            formato, nova_extensao = "JPEG", ".jpg"
+        if formato == "JPEG":
+            opcoes = {"quality": QUALIDADE_JPEG, "progressive": True}
+        if max(imagem.size) > LADO_MAXIMO:
+            imagem.thumbnail((LADO_MAXIMO, LADO_MAXIMO), Image.LANCZOS)
+        saida = io.BytesIO()
+        imagem.save(saida, format=formato, optimize=True, **opcoes)
+    if saida.tell() < len(original):
+        return saida.getvalue(), nova_extensao
+    return original, extensao
+
+
+def rewrite_references(texto: str, mapa: dict) -> str:
+    """Troca referências aos nomes originais (também URL-codificados) pelos com hash."""
+    for original, novo in mapa.items():
+        for variante in {original, quote(original)}:
+            texto = re.sub(r'(?<=["\'(/])' + re.escape(variante) + r'(?=["\')?#])', novo, texto)
+    return texto
+
+
+def precompress(pasta: str) -> int:
+    """Grava <arquivo>.gz para os arquivos de texto (mtime 0: saída determinística)."""
+    total = 0
+    for raiz, _, arquivos in os.walk(pasta):
+        for nome in arquivos:
+            if os.path.splitext(nome)[1] not in EXTENSOES_TEXTO:
+                continue
+            caminho = os.path.join(raiz, nome)
+            with open(caminho, 'rb') as f:
+                conteudo = f.read()
+            comprimido = gzip.compress(conteudo, NIVEL_GZIP, mtime=0)
+            if len(comprimido) < len(conteudo):
+                with open(caminho + ".gz", 'wb') as f:
+                    f.write(comprimido)
+                total += 1
+    return total
+
+
+def _tamanho(pasta: str, sufixo_ignorado: str = None) -> int:
+    return sum(
+        os.path.getsize(os.path.join(raiz, nome))
+        for raiz, _, arquivos in os.walk(pasta) for nome in arquivos
+        if not (sufixo_ignorado and nome.endswith(sufixo_ignorado))
+    )
+
+
+def build_assets(origem: str = ORIGEM, destino: str = DESTINO) -> dict:
+    """Gera dist/ a partir de frontend/. Retorna {nome original: caminho com hash}."""
+    print(f"🎨 Gerando assets: {origem}/ -> {destino}/")
+    if os.path.isdir(destino):
+        shutil.rmtree(destino)
+    os.makedirs(os.path.join(destino, ASSETS_DIR))
+
+    arquivos = sorted(
+        nome for nome in os.listdir(origem)
+        if os.path.isfile(os.path.join(origem, nome)) and nome not in SEM_HASH
+    )
+    # Imagens antes de CSS/JS: o CSS pode referenciar imagens pelo nome
+    arquivos.sort(key=lambda nome: os.path.splitext(nome)[1] not in EXTENSOES_IMAGEM)
+
+    mapa = {}
+    for nome in arquivos:
+        caminho = os.path.join(origem, nome)
+        extensao = os.path.splitext(nome)[1]
+        if extensao in EXTENSOES_IMAGEM:
+            conteudo, extensao = optimize_image(caminho)
+        else:
+            with open(caminho, 'rb') as f:
+                conteudo = f.read()
+            if extensao in EXTENSOES_TEXTO:
+                # Referências relativas a assets/, onde o próprio arquivo fica
+                relativos = {original: os.path.basename(novo) for original, novo in mapa.items()}
+                conteudo = rewrite_references(conteudo.decode('utf-8'), relativos).encode('utf-8')
+        mapa[nome] = fingerprint(nome, conteudo, extensao)
+        with open(os.path.join(destino, mapa[nome]), 'wb') as f:
+            f.write(conteudo)
+
+    with open(os.path.join(origem, "index.html"), encoding='utf-8') as f:
+        html = rewrite_references(f.read(), mapa)
+    with open(os.path.join(destino, "index.html"), 'w', encoding='utf-8') as f:
+        f.write(html)
+
+    # Dados: já têm o hash no nome (exceto o manifest e o data.json legado)
+    if os.path.exists(os.path.join(origem, "data.json")):
+        shutil.copy2(os.path.join(origem, "data.json"), destino)
+    if os.path.isdir(os.path.join(origem, "data")):
+        shutil.copytree(os.path.join(origem, "data"), os.path.join(destino, "data"))
+
+    comprimidos = precompress(destino)
+    if Image is None:
+        print("⚠️ Pillow não instalado: imagens copiadas sem recompressão.")
+    print(f"📦 {len(mapa)} assets com hash, {comprimidos} arquivos pré-comprimidos (.gz)")
+    print(f"✅ {_tamanho(origem) / 1024:.0f} KB em {origem}/ -> "
+          f"{_tamanho(destino, '.gz') / 1024:.0f} KB em {destino}/ (sem contar os .gz)")
+    return mapa
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera dist/ com assets versionados e pré-comprimidos.")
+    parser.add_argument("--source", default=ORIGEM, help="pasta do frontend (padrão: frontend)")
+    parser.add_argument("--output", default=DESTINO, help="pasta de saída (padrão: dist)")
+    args = parser.parse_args()
+    build_assets(args.source, args.output)
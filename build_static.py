@@ -1,119 +1,372 @@
-
+import os
+import sys
+import glob
 import json
+import time
+import hashlib
+import argparse
 import datetime
-from sqlalchemy import func
-from sqlalchemy.orm import joinedload
-from backend import database as db
-from backend.analysis import generate_analysis
+import subprocess
+import tempfile
+
+from backend.analysis import generate_analysis, generate_model_narratives
+from backend.snapshot import COLUNA_ESHMIA
+from backend.columnar import encode_columns
+
+# Configuração do caminho de saída: os dados vão para <saída>/data/ com o hash
+# do conteúdo no nome (URLs imutáveis) e um manifest.json pequeno aponta para eles
+OUTPUT_DIR = "frontend"
+DATA_DIR = "data"
+MANIFEST_FILE = "manifest.json"
+
+# Casas decimais dos floats no JSON e versão do formato (entram no hash das entradas)
+PRECISAO = 6
+FORMATO = 3
+
+# Fragmentos (shards): o resumo tem tamanho fixo e é o único carregado na
+# abertura; páginas do ranking e detalhes dos modelos são buscados sob demanda.
+TOP_RESUMO = 20
+TAMANHO_PAGINA = 100
+MODELOS_POR_SHARD = 64
 
-from backend import collector
-from backend import calculator
+# Código que define o conteúdo gerado: se mudar, o build é refeito
+CODIGO_BUILD = [
+    "build_static.py",
+    "backend/pipeline.py",
+    "backend/snapshot.py",
+    "backend/indices.py",
+    "backend/analysis.py",
+    "backend/columnar.py",
+    "backend/validation.py",
+    "backend/resolution.py",
+    "backend/collector.py",
+]
 
-# Configuração do caminho de saída
-OUTPUT_FILE = "frontend/data.json"
 
-def build_static_data():
+def build_payload(snapshot, timestamp: str) -> dict:
     """
-    Gera um arquivo estático JSON com os dados do dashboard,
-    permitindo deploy como site estático no Netlify.
+    Monta o payload do dashboard a partir de um snapshot (lido do banco ou
+    montado em memória): o mesmo código nos dois modos garante o mesmo JSON.
     """
-    print("🚀 Iniciando build estático...")
-    
+    modelos_list = [snapshot.model_info(i) for i in snapshot.complete_rows()]
+    eshmia_medio = snapshot.mean(COLUNA_ESHMIA)
+    metricas_agregadas = snapshot.aggregate_metrics()
+
+    # --- Geração da Análise ---
+    analise_texto = generate_analysis({
+        "modelos": modelos_list,
+        "eshmia_medio": eshmia_medio,
+        "metricas_agregadas": metricas_agregadas
+    })
+
+    # --- Montagem do Payload Final ---
+    return {
+        "timestamp": timestamp,
+        "lista_modelos": modelos_list,
+        "eshmia_medio": eshmia_medio,
+        "metricas_agregadas": metricas_agregadas,
+        "analise_automatica": analise_texto
+    }
+
+
+def snapshot_from_database():
+    """Caminho completo: CSV -> banco (coletor) -> calculador -> snapshot do lote."""
+    from backend import database as db
+    from backend import collector
+    from backend import calculator
+    from backend.snapshot import load_snapshot
+
     # Inicializa DB (garante que está tudo correto)
     print("📦 Inicializando banco de dados...")
     db.init_db()
-    
+
     db_session = next(db.get_db())
     try:
         # Coleta os dados do CSV para o banco (CRÍTICO para deploy onde o banco começa vazio)
         print("📥 Populando banco de dados a partir do CSV...")
         collector.collect_and_store_data(db_session, use_real_data=True)
-        
+
         # Calcula métricas (ESSENCIAL para gerar os ESHMIAs)
         print("🧮 Calculando métricas e ESHMIA...")
-        calculator.calculate_and_store_metrics(db_session)
-        
+        lote = calculator.calculate_and_store_metrics(db_session)
+
         print("📊 Consultando banco de dados...")
-        
-        # --- Consulta de Dados (Cópia da lógica do app.py) ---
-        
-        # Busca modelos com seus ESHMIA e resultados normalizados
-        models_data = db_session.query(db.Modelo).options(
-            joinedload(db.Modelo.eshmias),
-            joinedload(db.Modelo.resultados).joinedload(db.Resultado.metrica)
-        ).all()
-
-        # Calcula o ESHMIA médio do ecossistema
-        eshmia_medio_result = db_session.query(func.avg(db.Eshmia.valor_eshmia)).scalar()
-        eshmia_medio = eshmia_medio_result if eshmia_medio_result is not None else 0
-
-        # Prepara a lista de modelos para o JSON
-        modelos_list = []
-        for m in models_data:
-            if not m.eshmias:  
-                continue
-            
-            model_info = {
-                "nome_normalizado": m.nome_normalizado,
-                "valor_eshmia": m.eshmias[0].valor_eshmia if m.eshmias else None,
-                "valores_normalizados": {
-                    res.metrica.nome: res.valor_normalizado 
-                    for res in m.resultados if res.valor_normalizado is not None
-                }
-            }
-            modelos_list.append(model_info)
-
-        # --- Métricas Agregadas ---
-        metricas_agregadas = {}
-        for metrica_nome in ["IFEval", "BBH", "MATH", "GPQA", "MUSR", "MMLU-PRO"]:
-            # Subquery para valor máximo
-            max_subquery = db_session.query(func.max(db.Resultado.valor_normalizado)).join(db.Metrica).filter(db.Metrica.nome == metrica_nome).scalar_subquery()
-            max_model_query = db_session.query(db.Modelo.nome_normalizado).join(db.Resultado).join(db.Metrica).filter(
-                db.Metrica.nome == metrica_nome,
-                db.Resultado.valor_normalizado == max_subquery
-            ).first()
-
-            # Subquery para valor mínimo
-            min_subquery = db_session.query(func.min(db.Resultado.valor_normalizado)).join(db.Metrica).filter(db.Metrica.nome == metrica_nome).scalar_subquery()
-            min_model_query = db_session.query(db.Modelo.nome_normalizado).join(db.Resultado).join(db.Metrica).filter(
-                db.Metrica.nome == metrica_nome,
-                db.Resultado.valor_normalizado == min_subquery
-            ).first()
-
-            # Cálculo da média da métrica
-            avg_val = db_session.query(func.avg(db.Resultado.valor_normalizado)).join(db.Metrica).filter(db.Metrica.nome == metrica_nome).scalar()
-
-            metricas_agregadas[metrica_nome] = {
-                "maximo": {"modelo": max_model_query[0] if max_model_query else "N/A"},
-                "minimo": {"modelo": min_model_query[0] if min_model_query else "N/A"},
-                "media": avg_val if avg_val is not None else 0
-            }
-
-        # --- Geração da Análise ---
-        analise_texto = generate_analysis({
-            "modelos": modelos_list,
-            "eshmia_medio": eshmia_medio,
-            "metricas_agregadas": metricas_agregadas
-        })
-
-        # --- Montagem do Payload Final ---
-        response_data = {
-            "timestamp": datetime.datetime.utcnow().isoformat(),
-            "lista_modelos": modelos_list,
-            "eshmia_medio": eshmia_medio,
-            "metricas_agregadas": metricas_agregadas,
-            "analise_automatica": analise_texto
-        }
-        
-        # --- Salvar em JSON ---
-        print(f"💾 Salvando em {OUTPUT_FILE}...")
-        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-            json.dump(response_data, f, ensure_ascii=False, indent=2)
-            
-        print("✅ Build estático concluído com sucesso!")
-        
+        return load_snapshot(db_session, lote.id)
     finally:
         db_session.close()
 
+
+def snapshot_in_memory():
+    """Caminho sem banco: CSV -> pandas/NumPy -> snapshot."""
+    from backend.pipeline import snapshot_from_csv
+
+    print("🧮 Normalizando e calculando ESHMIA em memória (sem banco)...")
+    return snapshot_from_csv()
+
+
+def _arredondar(valor):
+    """Floats com precisão fixa, recursivamente (JSON estável entre builds)."""
+    if isinstance(valor, float):
+        return round(valor, PRECISAO)
+    if isinstance(valor, dict):
+        return {chave: _arredondar(v) for chave, v in valor.items()}
+    if isinstance(valor, list):
+        return [_arredondar(v) for v in valor]
+    return valor
+
+
+def serialize(payload: dict) -> bytes:
+    """JSON compacto, com floats arredondados."""
+    return json.dumps(_arredondar(payload), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _sha256(*partes) -> str:
+    h = hashlib.sha256()
+    for parte in partes:
+        h.update(parte if isinstance(parte, bytes) else str(parte).encode('utf-8'))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def input_hash() -> str:
+    """Hash das entradas do build em memória: CSV, código e formato de saída."""
+    from backend import collector
+
+    partes = [FORMATO, PRECISAO]
+    for caminho in [collector.CSV_FILE] + CODIGO_BUILD:
+        partes.append(caminho)
+        if os.path.exists(caminho):
+            with open(caminho, 'rb') as f:
+                partes.append(f.read())
+    return _sha256(*partes)
+
+
+def data_timestamp() -> str:
+    """
+    Data dos dados: o último commit do CSV (igual em todo clone, então builds
+    limpos dos mesmos dados geram o mesmo arquivo), ou agora se o CSV tiver
+    alterações locais ou não estiver em um repositório git.
+    """
+    from backend import collector
+
+    try:
+        alterado = subprocess.run(["git", "status", "--porcelain", "--", collector.CSV_FILE],
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        data = subprocess.run(["git", "log", "-1", "--format=%cI", "--", collector.CSV_FILE],
+                              capture_output=True, text=True, check=True).stdout.strip()
+        if data and not alterado:
+            instante = datetime.datetime.fromisoformat(data).astimezone(datetime.timezone.utc)
+            return instante.replace(tzinfo=None).isoformat()
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        pass
+    return datetime.datetime.utcnow().isoformat()
+
+
+def read_manifest(output_dir: str) -> dict:
+    caminho = os.path.join(output_dir, DATA_DIR, MANIFEST_FILE)
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _escrever(caminho: str, conteudo: bytes):
+    """Grava de forma atômica (arquivo temporário + rename)."""
+    temporario = caminho + ".tmp"
+    with open(temporario, 'wb') as f:
+        f.write(conteudo)
+    os.replace(temporario, caminho)
+
+
+def fnv1a(texto: str) -> int:
+    """FNV-1a de 32 bits sobre o UTF-8 do texto (o frontend calcula o mesmo hash)."""
+    h = 0x811c9dc5
+    for byte in texto.encode('utf-8'):
+        h = ((h ^ byte) * 0x01000193) & 0xffffffff
+    return h
+
+
+def build_shards(snapshot, payload: dict) -> dict:
+    """
+    Divide o payload em fragmentos: resumo (agregados, análise e top N),
+    páginas do ranking por ESHMIA e detalhes dos modelos agrupados por
+    fnv1a(nome) % número de shards.
+    """
+    ordem = snapshot.order(COLUNA_ESHMIA)
+    ranking = [snapshot.model_info(i) for i in ordem]
+    total = len(ranking)
+
+    resumo = {
+        "timestamp": payload["timestamp"],
+        "total_modelos": total,
+        "tamanho_pagina": TAMANHO_PAGINA,
+        "lista_modelos": ranking[:TOP_RESUMO],
+        "eshmia_medio": payload["eshmia_medio"],
+        "metricas_agregadas": payload["metricas_agregadas"],
+        "analise_automatica": payload["analise_automatica"]
+    }
+    paginas = [
+        {"pagina": k, "inicio": inicio, "lista_modelos": ranking[inicio:inicio + TAMANHO_PAGINA]}
+        for k, inicio in enumerate(range(0, total, TAMANHO_PAGINA))
+    ]
+
+    narrativas = generate_model_narratives(snapshot)
+    n_shards = max(1, -(-total // MODELOS_POR_SHARD))
+    modelos = [{} for _ in range(n_shards)]
+    for posicao, (i, info) in enumerate(zip(ordem, ranking), start=1):
+        nome = snapshot.nomes[i]
+        modelos[fnv1a(nome) % n_shards][nome] = {
+            **info,
+            "posicao": posicao,
+            "tipo": snapshot.tipos[i],
+            "fonte": snapshot.fontes[i],
+            "analise": narrativas.get(nome)
+        }
+    return {"resumo": resumo, "paginas": paginas, "modelos": modelos}
+
+
+def _gravar(pasta: str, prefixo: str, payload, extensao: str = "json") -> str:
+    """
+    Grava data/<prefixo>.<hash>.<extensão> (se ainda não existir) e retorna o
+    caminho relativo. `payload` é serializado em JSON, a menos que já sejam bytes.
+    """
+    conteudo = payload if isinstance(payload, bytes) else serialize(payload)
+    nome = f"{prefixo}.{_sha256(conteudo)[:16]}.{extensao}"
+    if not os.path.exists(os.path.join(pasta, nome)):
+        _escrever(os.path.join(pasta, nome), conteudo)
+    return f"{DATA_DIR}/{nome}"
+
+
+def _arquivos_manifest(manifest: dict) -> set:
+    """Nomes de todos os arquivos de dados referenciados por um manifest."""
+    nomes = set()
+    for valor in manifest.get("arquivos", {}).values():
+        for caminho in (valor if isinstance(valor, list) else [valor]):
+            nomes.add(os.path.basename(caminho))
+    return nomes
+
+
+def write_outputs(output_dir: str, snapshot, payload: dict, anterior: dict, hash_entradas: str = None,
+                  timestamp: str = None) -> dict:
+    """
+    Grava o payload completo em data/data.<hash>.json, os fragmentos em
+    data/<nome>.<hash>.json, as colunas binárias em data/colunas.<hash>.bin
+    e atualiza o manifest. Se os dados (sem o
+    timestamp) forem os mesmos do build anterior, o timestamp anterior é
+    mantido e os arquivos resultantes são idênticos, com as mesmas URLs.
+    """
+    pasta = os.path.join(output_dir, DATA_DIR)
+    os.makedirs(pasta, exist_ok=True)
+
+    hash_dados = _sha256(serialize({**payload, "timestamp": None}))
+    if not timestamp and hash_dados == anterior.get("hash_dados") and anterior.get("timestamp"):
+        timestamp = anterior["timestamp"]
+    timestamp = timestamp or data_timestamp()
+
+    payload = {**payload, "timestamp": timestamp}
+    shards = build_shards(snapshot, payload)
+    arquivos = {
+        "data": _gravar(pasta, "data", payload),
+        "resumo": _gravar(pasta, "resumo", shards["resumo"]),
+        "paginas": [_gravar(pasta, f"pagina-{k}", p) for k, p in enumerate(shards["paginas"])],
+        "modelos": [_gravar(pasta, f"modelos-{k}", m) for k, m in enumerate(shards["modelos"])],
+        # Colunas binárias para os gráficos (ver backend/columnar.py)
+        "colunas": _gravar(pasta, "colunas", encode_columns(snapshot), "bin")
+    }
+
+    manifest = {
+        "formato": FORMATO,
+        "hash_entradas": hash_entradas,
+        "hash_dados": hash_dados,
+        "timestamp": timestamp,
+        "total_modelos": shards["resumo"]["total_modelos"],
+        "tamanho_pagina": TAMANHO_PAGINA,
+        "arquivos": arquivos
+    }
+    _escrever(os.path.join(pasta, MANIFEST_FILE), json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    # Mantém apenas os arquivos atuais e os do build anterior (clientes com o manifest antigo em cache)
+    manter = _arquivos_manifest(manifest) | _arquivos_manifest(anterior) | {MANIFEST_FILE}
+    for caminho in glob.glob(os.path.join(pasta, "*.json")) + glob.glob(os.path.join(pasta, "*.bin")):
+        if os.path.basename(caminho) not in manter:
+            os.remove(caminho)
+    return manifest
+
+
+def build_static_data(output_dir: str = OUTPUT_DIR, use_database: bool = False, timestamp: str = None,
+                      force: bool = False):
+    """
+    Gera os arquivos estáticos JSON com os dados do dashboard,
+    permitindo deploy como site estático no Netlify.
+    No modo em memória, nada é refeito se as entradas não mudaram.
+    """
+    print(f"🚀 Iniciando build estático ({'banco de dados' if use_database else 'em memória'})...")
+    inicio = time.perf_counter()
+
+    anterior = read_manifest(output_dir)
+    # O caminho com banco depende do estado do banco: sempre refaz
+    hash_entradas = None if use_database else input_hash()
+    arquivos_anteriores = _arquivos_manifest(anterior)
+    if (not force and hash_entradas and anterior.get("hash_entradas") == hash_entradas and arquivos_anteriores
+            and all(os.path.isfile(os.path.join(output_dir, DATA_DIR, nome)) for nome in arquivos_anteriores)):
+        print(f"⏩ Entradas inalteradas ({hash_entradas[:12]}): {anterior['arquivos']['data']} reaproveitado.")
+        return anterior
+
+    snapshot = snapshot_from_database() if use_database else snapshot_in_memory()
+    payload = build_payload(snapshot, None)
+    timestamp = timestamp or os.getenv('ESHMIA_BUILD_TIMESTAMP')
+
+    # --- Salvar em JSON ---
+    manifest = write_outputs(output_dir, snapshot, payload, anterior, hash_entradas, timestamp)
+    print(f"💾 Salvo em {os.path.join(output_dir, manifest['arquivos']['data'])}")
+    print(f"🧩 Fragmentos: resumo, {len(manifest['arquivos']['paginas'])} página(s), "
+          f"{len(manifest['arquivos']['modelos'])} shard(s) de modelos")
+
+    print(f"✅ Build estático concluído com sucesso! ({time.perf_counter() - inicio:.2f}s)")
+    return manifest
+
+
+def verify() -> bool:
+    """
+    Gera os dados pelos dois caminhos (o do banco em um SQLite temporário, em
+    outro processo) com o mesmo timestamp e compara byte a byte.
+    """
+    timestamp = datetime.datetime.utcnow().isoformat()
+    with tempfile.TemporaryDirectory() as pasta:
+        saida_banco = os.path.join(pasta, "db")
+        saida_memoria = os.path.join(pasta, "memoria")
+        ambiente = dict(os.environ, DB_TYPE="sqlite", DATABASE_URL=f"sqlite:///{os.path.join(pasta, 'build.db')}")
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--db", "--output", saida_banco, "--timestamp", timestamp],
+            env=ambiente, check=True
+        )
+        build_static_data(saida_memoria, use_database=False, timestamp=timestamp, force=True)
+
+        conteudos = []
+        for saida in (saida_banco, saida_memoria):
+            arquivos = []
+            for nome in sorted(_arquivos_manifest(read_manifest(saida))):
+                with open(os.path.join(saida, DATA_DIR, nome), 'rb') as f:
+                    arquivos.append((nome, f.read()))
+            conteudos.append(arquivos)
+
+    if conteudos[0] == conteudos[1]:
+        total = sum(len(c) for _, c in conteudos[0])
+        print(f"✅ Verificação: os dois caminhos geram os mesmos {len(conteudos[0])} arquivos ({total} bytes).")
+        return True
+    print("❌ Verificação: o JSON em memória difere do gerado pelo banco de dados.")
+    return False
+
+
 if __name__ == "__main__":
-    build_static_data()
+    parser = argparse.ArgumentParser(description="Gera os dados estáticos do dashboard (frontend/data/).")
+    parser.add_argument("--db", action="store_true", help="usa o caminho com banco (coletor + calculador)")
+    parser.add_argument("--verify", action="store_true", help="compara byte a byte os caminhos com e sem banco")
+    parser.add_argument("--force", action="store_true", help="refaz o build mesmo com as entradas inalteradas")
+    parser.add_argument("--output", default=OUTPUT_DIR, help="pasta de saída (padrão: frontend)")
+    parser.add_argument("--timestamp", help="timestamp fixo do payload (padrão: data do último commit do CSV)")
+    args = parser.parse_args()
+
+    if args.verify:
+        sys.exit(0 if verify() else 1)
+    build_static_data(args.output, use_database=args.db, timestamp=args.timestamp, force=args.force)
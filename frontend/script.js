@@ -6,7 +6,11 @@
 // Configuration
 const CONFIG = {
     apiUrl: '/api/status', 
+    eventsUrl: '/api/events', // SSE: avisa quando um novo lote é publicado
+    columnarUrl: '/api/columnar', // Colunas binárias float32 para os gráficos
+    staticManifestUrl: 'data/manifest.json', // Deploy estático: aponta para os dados com hash no nome
     staticDataUrl: 'data.json', // Fallback for static deployment
+    modelsPageSize: 10, // cards acrescentados por clique em "Ver mais modelos"
     refreshInterval: 30000, 
     chartColors: {
         primary: '#667eea',
@@ -27,6 +31,11 @@ const CONFIG = {
 let eshmiaChart = null;
 let metricsChart = null;
 let autoRefreshTimer = null;
+let eventSource = null;
+let currentData = null; // último snapshot renderizado (base para aplicar deltas)
+let staticManifest = null; // manifest do deploy estático (fragmentos sob demanda)
+let shownModels = 0; // cards exibidos no ranking
+const shardCache = new Map(); // URL do fragmento -> Promise com o JSON
 
 // ===================================
 // Initialization
@@ -41,8 +50,9 @@ document.addEventListener('DOMContentLoaded', () => {
     // Load initial data
     loadData();
 
-    // Start auto-refresh
-    // startAutoRefresh(); // Desabilitado pois os dados são estáticos (CSV)
+    // Recarrega apenas quando o servidor publica um novo lote (sem polling).
+    // No deploy estático não há /api/events e o stream é encerrado sem ruído.
+    startEventStream();
 });
 
 // ===================================
@@ -57,6 +67,20 @@ function setupEventListeners() {
             animateRefreshButton();
         });
     }
+
+    // Detalhe do modelo ao clicar em um card do ranking
+    const grid = document.getElementById('modelsGrid');
+    if (grid) {
+        grid.addEventListener('click', (e) => {
+            const card = e.target.closest('.model-card');
+            if (card) openModelDetail(card.dataset.model);
+        });
+    }
+
+    const loadMoreBtn = document.getElementById('loadMoreBtn');
+    if (loadMoreBtn) {
+        loadMoreBtn.addEventListener('click', loadMoreModels);
+    }
 }
 
 function animateRefreshButton() {
@@ -80,28 +104,18 @@ async function loadData(silent = false) {
             const response = await fetch(CONFIG.apiUrl);
             if (!response.ok) throw new Error('API offline');
             data = await response.json();
+            staticManifest = null;
             console.log('📊 Data loaded from API');
         } catch (apiError) {
-            console.log('⚠️ API offline, trying static data.json...');
-            // Fallback para o arquivo estático gerado no build
-            const response = await fetch(CONFIG.staticDataUrl);
-            if (!response.ok) {
-                throw new Error(`Static data not found! status: ${response.status}`);
-            }
-            data = await response.json();
-            console.log('📊 Data loaded from static data.json');
+            console.log('⚠️ API offline, trying static data...');
+            // Fallback para os arquivos estáticos gerados no build
+            data = await loadStaticData();
         }
 
         if (!data) throw new Error('No data available');
 
-        // Update all sections
-        updateHeroStats(data);
-        updateProgressChart(data);
-        updateCharts(data);
-        updateModelsGrid(data);
-        updateLeaderboard(data);
-        updateMetricsExplanation(data);
-        updateAnalysis(data);
+        currentData = data;
+        renderData(data);
 
         updateConnectionStatus('connected');
         showLoading(false);
@@ -114,10 +128,104 @@ async function loadData(silent = false) {
     }
 }
 
+async function loadStaticData() {
+    // O manifest é pequeno e sempre revalidado; os fragmentos têm o hash do
+    // conteúdo no nome e podem ficar em cache indefinidamente. A primeira
+    // renderização usa só o resumo (tamanho fixo); páginas do ranking e
+    // detalhes dos modelos são buscados sob demanda.
+    try {
+        const manifestResponse = await fetch(CONFIG.staticManifestUrl, { cache: 'no-cache' });
+        if (!manifestResponse.ok) throw new Error('Manifest not found');
+        const manifest = await manifestResponse.json();
+        if (manifest.arquivos.resumo) {
+            const resumo = await fetchShard(manifest.arquivos.resumo);
+            staticManifest = manifest;
+            console.log(`📊 Summary loaded from ${manifest.arquivos.resumo}`);
+            return resumo;
+        }
+        // Builds sem fragmentos: um único arquivo com todos os modelos
+        const response = await fetch(manifest.arquivos.data);
+        if (!response.ok) throw new Error(`Static data not found! status: ${response.status}`);
+        console.log(`📊 Data loaded from ${manifest.arquivos.data}`);
+        return await response.json();
+    } catch (manifestError) {
+        // Builds antigos: um único data.json
+        const response = await fetch(CONFIG.staticDataUrl);
+        if (!response.ok) {
+            throw new Error(`Static data not found! status: ${response.status}`);
+        }
+        console.log('📊 Data loaded from static data.json');
+        return await response.json();
+    }
+}
+
+function fetchShard(url) {
+    // Cada fragmento é buscado uma vez; falhas saem do cache para nova tentativa
+    if (!shardCache.has(url)) {
+        const promise = fetch(url).then(response => {
+            if (!response.ok) throw new Error(`Shard not found! status: ${response.status}`);
+            return response.json();
+        });
+        promise.catch(() => shardCache.delete(url));
+        shardCache.set(url, promise);
+    }
+    return shardCache.get(url);
+}
+
+function fnv1a(text) {
+    // Mesmo hash de build_static.fnv1a: escolhe o fragmento de cada modelo
+    let hash = 0x811c9dc5;
+    for (const byte of new TextEncoder().encode(text)) {
+        hash = Math.imul(hash ^ byte, 0x01000193) >>> 0;
+    }
+    return hash;
+}
+
+async function loadDelta(sinceBatchId) {
+    // Sem snapshot base não há o que mesclar: recarrega tudo
+    if (!currentData || currentData.batch_id == null) return loadData(true);
+
+    try {
+        updateConnectionStatus('loading');
+        const response = await fetch(`${CONFIG.apiUrl}?since=${encodeURIComponent(sinceBatchId)}`);
+        if (!response.ok) throw new Error(`Delta request failed! status: ${response.status}`);
+        const delta = await response.json();
+
+        // Substitui apenas os modelos alterados, preservando a ordem original
+        const models = new Map(currentData.lista_modelos.map(m => [m.nome_normalizado, m]));
+        delta.lista_modelos.forEach(m => models.set(m.nome_normalizado, m));
+
+        currentData = {
+            ...currentData,
+            timestamp: delta.timestamp,
+            batch_id: delta.batch_id,
+            eshmia_medio: delta.eshmia_medio,
+            metricas_agregadas: delta.metricas_agregadas,
+            lista_modelos: [...models.values()]
+        };
+        console.log(`📊 Delta aplicado: ${delta.lista_modelos.length} modelos desde o lote #${delta.since}`);
+        renderData(currentData);
+        updateConnectionStatus('connected');
+    } catch (error) {
+        console.warn('⚠️ Delta failed, reloading full data:', error);
+        loadData(true);
+    }
+}
+
 // ===================================
 // UI Updates
 // ===================================
 
+function renderData(data) {
+    updateHeroStats(data);
+    updateProgressChart(data);
+    updateCharts(data);
+    updateModelsGrid(data);
+    updateLeaderboard(data);
+    updateMetricsExplanation(data);
+    updateAnalysis(data);
+}
+
 function updateHeroStats(data) {
     // ESHMIA Average
     const eshmiaAvg = document.getElementById('eshmiaAverage');
@@ -137,7 +245,8 @@ function updateHeroStats(data) {
     // Model Count
     const modelCount = document.getElementById('modelCount');
     if (modelCount && data.lista_modelos) {
-        modelCount.textContent = data.lista_modelos.length;
+        // No deploy estático o resumo traz só o top N e o total à parte
+        modelCount.textContent = data.total_modelos ?? data.lista_modelos.length;
     }
 
     // Last Update
@@ -184,30 +293,87 @@ function updateProgressChart(data) {
     }
 }
 
-function updateCharts(data) {
-    if (!data.lista_modelos || data.lista_modelos.length === 0) {
-        console.warn('⚠️ No model data available for charts');
-        return;
+async function updateCharts(data) {
+    // Prefere a exportação colunar (já ordenada por ESHMIA); sem ela, monta
+    // as mesmas colunas a partir da lista de modelos
+    let columns = null;
+    try {
+        columns = await loadColumns(data);
+    } catch (error) {
+        console.warn('⚠️ Columnar data unavailable, using model list:', error);
+    }
+    if (!columns) {
+        if (!data.lista_modelos || data.lista_modelos.length === 0) {
+            console.warn('⚠️ No model data available for charts');
+            return;
+        }
+        columns = columnsFromModels(data.lista_modelos);
     }
-
-    // Sort models by ESHMIA
-    const sortedModels = [...data.lista_modelos].sort((a, b) =>
-        (b.valor_eshmia || 0) - (a.valor_eshmia || 0)
-    );
 
     // Filter top 20 for charts
-    const topModels = sortedModels.slice(0, 20);
+    const topModels = sliceColumns(columns, 20);
 
     updateEshmiaChart(topModels);
     updateMetricsChart(topModels);
 }
 
+async function loadColumns(data) {
+    // API (payload com batch_id) ou deploy estático com fragmentos
+    const url = staticManifest ? staticManifest.arquivos.colunas
+        : (data.batch_id != null ? CONFIG.columnarUrl : null);
+    if (!url) return null;
+    const response = await fetch(url);
+    if (!response.ok) throw new Error(`Columnar data not found! status: ${response.status}`);
+    return decodeColumns(await response.arrayBuffer());
+}
+
+function decodeColumns(buffer) {
+    // Formato de backend/columnar.py: uint32 com o tamanho do cabeçalho JSON,
+    // o cabeçalho, os nomes e as colunas float32 little-endian (alinhadas em 4)
+    const headerSize = new DataView(buffer).getUint32(0, true);
+    const decoder = new TextDecoder();
+    const header = JSON.parse(decoder.decode(new Uint8Array(buffer, 4, headerSize)));
+    const base = 4 + headerSize;
+    const nomes = header.modelos
+        ? decoder.decode(new Uint8Array(buffer, base + header.nomes.offset, header.nomes.bytes)).split('\n')
+        : [];
+    const colunas = {};
+    Object.entries(header.colunas).forEach(([name, section]) => {
+        colunas[name] = new Float32Array(buffer, base + section.offset, header.modelos);
+    });
+    return { nomes, colunas };
+}
+
+function columnsFromModels(models) {
+    const sortedModels = [...models].sort((a, b) =>
+        (b.valor_eshmia || 0) - (a.valor_eshmia || 0)
+    );
+    const colunas = { ESHMIA: Float32Array.from(sortedModels, m => m.valor_eshmia ?? NaN) };
+    ['IFEval', 'BBH', 'MATH', 'GPQA', 'MUSR', 'MMLU-PRO'].forEach(metric => {
+        colunas[metric] = Float32Array.from(sortedModels, m => m.valores_normalizados?.[metric] ?? NaN);
+    });
+    return { nomes: sortedModels.map(m => m.nome_normalizado), colunas };
+}
+
+function sliceColumns(columns, count) {
+    const colunas = {};
+    Object.entries(columns.colunas).forEach(([name, values]) => {
+        colunas[name] = values.subarray(0, count);
+    });
+    return { nomes: columns.nomes.slice(0, count), colunas };
+}
+
+function columnValues(columns, name) {
+    // Ausentes (NaN) entram como 0 nos gráficos
+    return Array.from(columns.colunas[name] || [], v => v || 0);
+}
+
 function updateEshmiaChart(models) {
     const ctx = document.getElementById('eshmiaChart');
     if (!ctx) return;
 
-    const labels = models.map(m => formatModelName(m.nome_normalizado));
-    const values = models.map(m => m.valor_eshmia || 0);
+    const labels = models.nomes.map(formatModelName);
+    const values = columnValues(models, 'ESHMIA');
 
     // Destroy existing chart
     if (eshmiaChart) {
@@ -288,15 +454,15 @@ function updateMetricsChart(models) {
     const ctx = document.getElementById('metricsChart');
     if (!ctx) return;
 
-    const labels = models.map(m => formatModelName(m.nome_normalizado));
+    const labels = models.nomes.map(formatModelName);
 
     // Extract metrics data
-    const ifevalData = models.map(m => m.valores_normalizados?.['IFEval'] || 0);
-    const bbhData = models.map(m => m.valores_normalizados?.['BBH'] || 0);
-    const mathData = models.map(m => m.valores_normalizados?.['MATH'] || 0);
-    const gpqaData = models.map(m => m.valores_normalizados?.['GPQA'] || 0);
-    const musrData = models.map(m => m.valores_normalizados?.['MUSR'] || 0);
-    const mmluProData = models.map(m => m.valores_normalizados?.['MMLU-PRO'] || 0);
+    const ifevalData = columnValues(models, 'IFEval');
+    const bbhData = columnValues(models, 'BBH');
+    const mathData = columnValues(models, 'MATH');
+    const gpqaData = columnValues(models, 'GPQA');
+    const musrData = columnValues(models, 'MUSR');
+    const mmluProData = columnValues(models, 'MMLU-PRO');
 
     // Destroy existing chart
     if (metricsChart) {
@@ -425,29 +591,129 @@ function updateModelsGrid(data) {
     );
 
     // Limit to top 10
-    const topModels = sortedModels.slice(0, 10);
+    const topModels = sortedModels.slice(0, CONFIG.modelsPageSize);
 
-    grid.innerHTML = topModels.map((model, index) => {
-        const metrics = model.valores_normalizados || {};
-        return `
-            <div class="model-card fade-in" style="animation-delay: ${index * 0.1}s">
-                <div class="model-rank">#${index + 1}</div>
-                <h4 class="model-name">${formatModelName(model.nome_normalizado)}</h4>
-                <div class="model-eshmia">${(model.valor_eshmia || 0).toFixed(4)}</div>
-                <div class="model-metrics">
-                    ${Object.entries(metrics).map(([name, value]) => `
-                        <div class="metric-row">
-                            <span class="metric-name">${name}</span>
-                            <span class="metric-value">${value.toFixed(4)}</span>
-                        </div>
-                        <div class="metric-bar">
-                            <div class="metric-fill" style="width: ${Math.min(value * 100, 100)}%"></div>
-                        </div>
-                    `).join('')}
-                </div>
+    grid.innerHTML = topModels.map((model, index) => modelCardHtml(model, index + 1, index)).join('');
+    shownModels = topModels.length;
+    updateLoadMoreButton();
+}
+
+function modelCardHtml(model, rank, delayIndex) {
+    const metrics = model.valores_normalizados || {};
+    return `
+        <div class="model-card fade-in" style="animation-delay: ${delayIndex * 0.1}s" data-model="${model.nome_normalizado}">
+            <div class="model-rank">#${rank}</div>
+            <h4 class="model-name">${formatModelName(model.nome_normalizado)}</h4>
+            <div class="model-eshmia">${(model.valor_eshmia || 0).toFixed(4)}</div>
+            <div class="model-metrics">
+                ${Object.entries(metrics).map(([name, value]) => `
+                    <div class="metric-row">
+                        <span class="metric-name">${name}</span>
+                        <span class="metric-value">${value.toFixed(4)}</span>
+                    </div>
+                    <div class="metric-bar">
+                        <div class="metric-fill" style="width: ${Math.min(value * 100, 100)}%"></div>
+                    </div>
+                `).join('')}
             </div>
+        </div>
+    `;
+}
+
+function totalModels() {
+    if (!currentData || !currentData.lista_modelos) return 0;
+    return currentData.total_modelos ?? currentData.lista_modelos.length;
+}
+
+function updateLoadMoreButton() {
+    const btn = document.getElementById('loadMoreBtn');
+    if (btn) btn.hidden = shownModels >= totalModels();
+}
+
+async function rankedModels(start, end) {
+    // Modelos nas posições [start, end) do ranking por ESHMIA
+    if (!staticManifest) {
+        return [...currentData.lista_modelos]
+            .sort((a, b) => (b.valor_eshmia || 0) - (a.valor_eshmia || 0))
+            .slice(start, end);
+    }
+    const pageSize = staticManifest.tamanho_pagina;
+    const pages = staticManifest.arquivos.paginas.slice(
+        Math.floor(start / pageSize), Math.ceil(end / pageSize)
+    );
+    const shards = await Promise.all(pages.map(fetchShard));
+    const models = shards.flatMap(page => page.lista_modelos);
+    const offset = shards.length ? shards[0].inicio : start;
+    return models.slice(start - offset, end - offset);
+}
+
+async function loadMoreModels() {
+    const grid = document.getElementById('modelsGrid');
+    if (!grid || !currentData) return;
+
+    try {
+        const start = shownModels;
+        const models = await rankedModels(start, start + CONFIG.modelsPageSize);
+        grid.insertAdjacentHTML('beforeend',
+            models.map((model, index) => modelCardHtml(model, start + index + 1, index)).join(''));
+        shownModels = start + models.length;
+        updateLoadMoreButton();
+    } catch (error) {
+        console.error('❌ Error loading more models:', error);
+    }
+}
+
+async function loadModelDetail(name) {
+    if (staticManifest && staticManifest.arquivos.modelos) {
+        const shards = staticManifest.arquivos.modelos;
+        const shard = await fetchShard(shards[fnv1a(name) % shards.length]);
+        return shard[name] || null;
+    }
+
+    // API: métricas já estão no snapshot; a análise do modelo vem pronta do servidor
+    const model = (currentData?.lista_modelos || []).find(m => m.nome_normalizado === name);
+    if (!model) return null;
+    let analise = null;
+    try {
+        const response = await fetch(`/api/analysis?model=${encodeURIComponent(name)}`);
+        if (response.ok) analise = ((await response.json()).modelos || {})[name] || null;
+    } catch (error) {
+        console.warn('⚠️ Model analysis unavailable:', error);
+    }
+    return { ...model, analise };
+}
+
+async function openModelDetail(name) {
+    const modal = document.getElementById('readingModal');
+    const modalTitle = document.getElementById('modalTitle');
+    const modalBody = document.getElementById('modalBody');
+    if (!modal || !name) return;
+
+    modalTitle.textContent = formatModelName(name);
+    modalBody.innerHTML = '<p class="loading">Carregando...</p>';
+    modal.classList.add('open');
+
+    try {
+        const detail = await loadModelDetail(name);
+        if (!detail) {
+            modalBody.innerHTML = '<p>Detalhes não disponíveis para este modelo.</p>';
+            return;
+        }
+        const metrics = detail.valores_normalizados || {};
+        const info = [
+            detail.posicao ? `Posição: #${detail.posicao}` : null,
+            detail.tipo ? `Tipo: ${detail.tipo}` : null,
+            detail.fonte ? `Fonte: ${detail.fonte}` : null
+        ].filter(Boolean).join(' · ');
+        modalBody.innerHTML = `
+            <p><strong>ESHMIA:</strong> ${(detail.valor_eshmia || 0).toFixed(4)}${info ? ` — ${info}` : ''}</p>
+            ${detail.analise ? `<p>${detail.analise.replace(/\*\*(.+?)\*\*/g, '<strong>$1</strong>')}</p>` : ''}
+            <p>${Object.entries(metrics).map(([metric, value]) => `${metric}: ${value.toFixed(4)}`).join('<br>')}</p>
         `;
-    }).join('');
+    } catch (error) {
+        console.error('❌ Error loading model detail:', error);
+        modalBody.innerHTML = '<p>Não foi possível carregar os detalhes do modelo.</p>';
+    }
 }
 
 function updateLeaderboard(data) {
@@ -596,6 +862,37 @@ function stopAutoRefresh() {
     }
 }
 
+// ===================================
+// Server-Sent Events
+// ===================================
+
+function startEventStream() {
+    if (!window.EventSource) return;
+
+    stopEventStream();
+    eventSource = new EventSource(CONFIG.eventsUrl);
+
+    eventSource.addEventListener('snapshot', (event) => {
+        const payload = JSON.parse(event.data);
+        console.log(`🔔 Novo lote #${payload.batch_id}: ${payload.total_alterados} modelos alterados`);
+        loadDelta(currentData ? currentData.batch_id : null);
+    });
+
+    eventSource.onerror = () => {
+        // O navegador reconecta sozinho; CLOSED significa que o endpoint não existe
+        if (eventSource && eventSource.readyState === EventSource.CLOSED) {
+            stopEventStream();
+        }
+    };
+}
+
+function stopEventStream() {
+    if (eventSource) {
+        eventSource.close();
+        eventSource = null;
+    }
+}
+
 // ===================================
 // Utility Functions
 // ===================================
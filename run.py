@@ -7,10 +7,11 @@ Automates the complete workflow: data collection, calculation, and server startu
 import sys
 import time
 import os
-from backend import database as db
-from backend import collector
-from backend import calculator
-from backend.app import app
+import threading
+
+# Os módulos do backend (Flask, SQLAlchemy, pandas, psycopg2) são importados
+# dentro de cada etapa: --skip-refresh não carrega o coletor, e a partida a
+# quente sobe o servidor sem esperar por eles (ver benchmarks/startup.py)
 
 def print_banner():
     """Print a nice banner"""
@@ -25,9 +26,16 @@ def print_banner():
     print(banner)
 
 def initialize_database():
-    """Initialize the database if needed"""
+    """Initialize the database if needed and upgrade the schema of existing ones"""
     print("\n📊 Step 1: Checking database...")
+    from backend import database as db
+
     try:
+        # Tabelas e colunas novas em bancos criados por versões anteriores (idempotente)
+        mudancas = db.upgrade_db()
+        if mudancas:
+            print(f"   🔧 Schema upgraded: {', '.join(mudancas)}")
+
         # Try to connect to existing database
         db_session = next(db.get_db())
         model_count = db_session.query(db.Modelo).count()
@@ -48,10 +56,16 @@ def initialize_database():
 def collect_data(use_real: bool = True):
     """Collect data from sources (default: CSV to avoid external instability)."""
     print("\n🔍 Step 2: Collecting data...")
+    from backend import database as db
+    from backend import collector
+    from backend.sync_runs import stage
+
     try:
         db_session = next(db.get_db())
         # Por padrão, carregamos do CSV (use_real=True). Use --mock para usar dados mock.
-        collector.collect_and_store_data(db_session, use_real_data=use_real, limit=100)
+        with stage("coleta") as etapa:
+            estatisticas = collector.collect_and_store_data(db_session, use_real_data=use_real, limit=100)
+            etapa["linhas"] = estatisticas["validos"]
         db_session.close()
         print("   ✅ Data collection completed")
     except Exception as e:
@@ -62,9 +76,25 @@ def collect_data(use_real: bool = True):
 def calculate_metrics():
     """Calculate normalized metrics and ESHMIA scores"""
     print("\n🧮 Step 3: Calculating metrics...")
+    from backend import database as db
+    from backend import calculator
+    from backend import uncertainty
+    from backend import analysis
+    from backend.sync_runs import stage
+
     try:
         db_session = next(db.get_db())
-        calculator.calculate_and_store_metrics(db_session)
+        with stage("calculo") as etapa:
+            lote = calculator.calculate_and_store_metrics(db_session)
+            etapa["linhas"] = lote.modelos_calculados
+            etapa["lote_id"] = lote.id
+        # Etapa estatística: intervalos de confiança e estabilidade do ranking
+        with stage("incerteza") as etapa:
+            etapa["linhas"] = uncertainty.calculate_and_store_intervals(db_session, lote)
+        # Narrativas automáticas (memoizadas pelo hash do snapshot)
+        with stage("analises") as etapa:
+            analises = analysis.generate_and_store_analyses(db_session, lote)
+            etapa["linhas"] = len(analises.get(analysis.ESCOPO_MODELO, {}))
         db_session.close()
         print("   ✅ Metrics calculated successfully")
     except Exception as e:
@@ -72,9 +102,81 @@ def calculate_metrics():
         return False
     return True
 
+def refresh_data(skip_refresh: bool, use_real: bool, profile: bool = None) -> bool:
+    """
+    Steps 1-3 (unless skipped), then builds and saves the status payload.
+    Each refresh is recorded in sync_runs (see /api/sync/runs); `profile` turns
+    on cProfile/tracemalloc capture (default: ESHMIA_SYNC_PROFILE).
+    """
+    if skip_refresh:
+        print("\n⏩ Skipping data refresh (--skip-refresh flag detected)")
+        initialize_database()
+        return prepare_status_payload()
+
+    from backend.sync_runs import SyncRun, stage
+
+    with SyncRun("run", profile) as execucao:
+        # Step 1: Initialize database
+        initialize_database()
+
+        # Step 2: Collect data (default: CSV/real). Use --mock para usar dados mock.
+        if not collect_data(use_real=use_real):
+            print("\n❌ Data collection failed.")
+            execucao.fail("Data collection failed")
+            return False
+
+        # Step 3: Calculate metrics
+        if not calculate_metrics():
+            print("\n❌ Metric calculation failed.")
+            execucao.fail("Metric calculation failed")
+            return False
+
+        with stage("status"):
+            if not prepare_status_payload():
+                execucao.fail("Could not prepare status payload")
+                return False
+    return True
+
+def prepare_status_payload() -> bool:
+    """Builds the current batch status (so the first request doesn't pay for it) and saves it for warm starts."""
+    from backend.app import prepare_status
+
+    try:
+        prepare_status()
+    except Exception as e:
+        print(f"   ⚠️  Could not prepare status payload: {e}")
+        return False
+    return True
+
+def refresh_in_background(skip_refresh: bool, use_real: bool, profile: bool = None):
+    """Partida a quente: sincroniza em segundo plano e troca o status salvo pelo atual."""
+    from backend import warmstart
+
+    inicio = time.perf_counter()
+    if refresh_data(skip_refresh, use_real, profile):
+        warmstart.finish()
+        print(f"\n♨️  Background refresh done in {time.perf_counter() - inicio:.1f}s: serving the current batch")
+    elif _live_status_loaded():
+        warmstart.finish()
+        print("\n⚠️  Background refresh failed: serving the latest batch in the database")
+    else:
+        print("\n⚠️  Background refresh failed: still serving the saved status")
+
+def _live_status_loaded() -> bool:
+    """Whether the database has a batch whose status can replace the saved one."""
+    from backend.app import prepare_status
+
+    try:
+        return prepare_status().get("batch_id") is not None
+    except Exception as e:
+        print(f"   ⚠️  Could not load the current batch: {e}")
+        return False
+
 def start_server():
     """Start the Flask server"""
     print("\n🚀 Step 4: Starting web server...")
+    from backend.app import app
+
     port = int(os.getenv('PORT', 3000))
     print("\n" + "="*60)
     print(f"   Dashboard available at: http://127.0.0.1:{port}")
@@ -91,26 +193,29 @@ def start_server():
 def main():
     """Main orchestration function"""
     print_banner()
-    
+
+    # Variáveis do .env antes de importar os módulos do backend (alguns leem
+    # configurações ao serem importados)
+    from dotenv import load_dotenv
+    load_dotenv()
+    from backend import warmstart
+
     # Check if we should skip data refresh
     skip_refresh = '--skip-refresh' in sys.argv
-    
-    if not skip_refresh:
-        # Step 1: Initialize database
-        initialize_database()
-        
-        # Step 2: Collect data (default: CSV/real). Use --mock para usar dados mock.
-        use_real = '--mock' not in sys.argv  # True by default (carrega CSV)
-        if not collect_data(use_real=use_real):
-            print("\n❌ Data collection failed. Exiting...")
-            sys.exit(1)
-        
-        # Step 3: Calculate metrics
-        if not calculate_metrics():
-            print("\n❌ Metric calculation failed. Exiting...")
-            sys.exit(1)
-    else:
-        print("\n⏩ Skipping data refresh (--skip-refresh flag detected)")
+    use_real = '--mock' not in sys.argv  # True by default (carrega CSV)
+    # --profile-sync: cProfile/tracemalloc da sincronização, gravados em sync_runs
+    profile = True if '--profile-sync' in sys.argv else None
+
+    # Partida a quente: com um status salvo, o servidor sobe na hora e a
+    # sincronização roda em segundo plano (--cold desativa)
+    salvo = None if '--cold' in sys.argv else warmstart.activate()
+    if salvo is not None:
+        print(f"\n♨️  Warm start: serving saved status (batch #{salvo.get('batch_id')}, "
+              f"{salvo.get('timestamp')}) while data refreshes in background")
+        threading.Thread(target=refresh_in_background, args=(skip_refresh, use_real, profile), daemon=True).start()
+    elif not refresh_data(skip_refresh, use_real, profile) and not skip_refresh:
+        print("\n❌ Data refresh failed. Exiting...")
+        sys.exit(1)
     
     # Step 4: Start server
     start_server()
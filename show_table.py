@@ -1,53 +1,234 @@
+"""
+Consulta a tabela de modelos pelo terminal.
 
-from backend.database import get_db, Modelo, Eshmia
-import pandas as pd
+A matriz modelos × métricas vem de uma única consulta (pivô com
+MAX(CASE ...) agrupado por modelo, mais o ESHMIA do cálculo mais recente).
+Ordenação, filtros e top-N são feitos no próprio banco, e as linhas são
+escritas no stdout à medida que chegam, sem montar DataFrame.
 
-def show_table():
-    db = next(get_db())
-    try:
-        modelos = db.query(Modelo).all()
-        data = []
-        for m in modelos:
-            eshmia_val = None
-            if m.eshmias:
-                eshmia_val = m.eshmias[0].valor_eshmia
-            
-            row = {
-                "Model": m.nome_normalizado,
-                "ESHMIA": eshmia_val
-            }
-            # Add specific metrics if needed, but simplistic view for now
-            for res in m.resultados:
-                row[res.metrica.nome] = res.valor_cru
-            
-            data.append(row)
-        
-        if not data:
-            print("Nenhum modelo válido encontrado no banco de dados para o cálculo do ESHMIA.")
-            print("Verifique se o arquivo dados.csv contém valores válidos para: IFEval, BBH, MATH, GPQA, MUSR, MMLU-PRO.")
-            return
-
-        df = pd.DataFrame(data)
-        cols = ["Model", "IFEval", "BBH", "MATH", "GPQA", "MUSR", "MMLU-PRO", "ESHMIA"]
-        # Ensure columns exist
-        for c in cols:
-            if c not in df.columns:
-                df[c] = None
-        
-        print(df[cols].to_string(index=False))
-
-        # Stats
-        if "ESHMIA" in df.columns and not df["ESHMIA"].isnull().all():
-            best = df.loc[df["ESHMIA"].idxmax()]
-            worst = df.loc[df["ESHMIA"].idxmin()]
-            avg = df["ESHMIA"].mean()
-            print("\n----- Estatísticas -----")
-            print(f"Melhor Modelo: {best['Model']} ({best['ESHMIA']:.4f})")
-            print(f"Pior Modelo: {worst['Model']} ({worst['ESHMIA']:.4f})")
-            print(f"Média Geral ESHMIA: {avg:.4f}")
+Uso:
+  python3 show_table.py                                  # tabela completa, por ESHMIA
+  python3 show_table.py --top 20 --sort MATH
+  python3 show_table.py --where "GPQA>=20" --where "ESHMIA>0.5" --format csv
+  python3 show_table.py --model llama --type instruct --format json
+  python3 show_table.py --normalized                      # valores normalizados (0-1)
+"""
+
+import os
+import re
+import sys
+import csv
+import json
+import argparse
+from sqlalchemy import select, func, case, and_
+from backend import database as db
+from backend.indices import METRICAS
+
+COLUNA_ESHMIA = "ESHMIA"
+COLUNAS = METRICAS + [COLUNA_ESHMIA]
+FORMATOS = ("table", "csv", "json")
+
+# Linhas buscadas por vez do cursor
+LOTE_CURSOR = 2000
+LARGURA_NOME = 48
+LARGURA_VALOR = 9
+
+_FILTRO = re.compile(r'^\s*([A-Za-z0-9_-]+?)\s*(>=|<=|!=|=|>|<)\s*(-?\d+(?:\.\d+)?)\s*$')
+_OPERADORES = {
+    ">=": lambda c, v: c >= v,
+    "<=": lambda c, v: c <= v,
+    ">": lambda c, v: c > v,
+    "<": lambda c, v: c < v,
+    "=": lambda c, v: c == v,
+    "!=": lambda c, v: c != v,
+}
+
+
+def resolve_column(nome: str) -> str:
+    """Nome da coluna sem diferenciar maiúsculas (ex.: 'mmlu-pro' -> 'MMLU-PRO')."""
+    for coluna in COLUNAS:
+        if coluna.lower() == nome.lower():
+            return coluna
+    raise ValueError(f"coluna desconhecida: {nome} (use {', '.join(COLUNAS)})")
+
+
+def parse_filter(expressao: str) -> tuple:
+    """'GPQA>=20' -> ('GPQA', '>=', 20.0)"""
+    encontrado = _FILTRO.match(expressao)
+    if not encontrado:
+        raise ValueError(f"filtro inválido: {expressao!r} (ex.: 'MATH>=40', 'ESHMIA<0.5')")
+    coluna, operador, valor = encontrado.groups()
+    return resolve_column(coluna), operador, float(valor)
+
+
+def build_query(ordenar: str = COLUNA_ESHMIA, crescente: bool = False, filtros: list = (),
+                modelo: str = None, tipo: str = None, top: int = None, normalizados: bool = False):
+    """
+    Consulta única: uma linha por modelo com resultados, com as seis métricas
+    e o ESHMIA mais recente. A agregação parte de `resultados` (uma varredura
+    agrupada por modelo_id); modelos e métricas entram por chave primária.
+    """
+    valor = db.Resultado.valor_normalizado if normalizados else db.Resultado.valor_cru
+    colunas = {
+        nome: func.max(case((db.Metrica.nome == nome, valor))).label(nome)
+        for nome in METRICAS
+    }
+
+    # ESHMIA do cálculo mais recente de cada modelo (maior id), como em latest_eshmia_values
+    ultimos = select(db.Eshmia.modelo_id, func.max(db.Eshmia.id).label("eshmia_id")) \
+        .group_by(db.Eshmia.modelo_id).subquery()
+    colunas[COLUNA_ESHMIA] = func.max(db.Eshmia.valor_eshmia).label(COLUNA_ESHMIA)
+
+    consulta = select(db.Modelo.nome_normalizado, *colunas.values()) \
+        .select_from(db.Resultado) \
+        .join(db.Modelo, db.Resultado.modelo_id == db.Modelo.id) \
+        .join(db.Metrica, db.Resultado.metrica_id == db.Metrica.id) \
+        .outerjoin(ultimos, ultimos.c.modelo_id == db.Resultado.modelo_id) \
+        .outerjoin(db.Eshmia, db.Eshmia.id == ultimos.c.eshmia_id) \
+        .group_by(db.Resultado.modelo_id)
+
+    if modelo:
+        consulta = consulta.where(db.Modelo.nome_normalizado.ilike(f"%{modelo}%"))
+    if tipo:
+        consulta = consulta.where(db.Modelo.tipo == tipo)
+    if filtros:
+        consulta = consulta.having(and_(*(
+            _OPERADORES[operador](colunas[coluna], limite) for coluna, operador, limite in filtros
+        )))
+
+    # Vazios por último nos dois sentidos; empate pelo nome (saída estável)
+    chave = colunas[ordenar]
+    consulta = consulta.order_by(chave.is_(None), chave.asc() if crescente else chave.desc(),
+                                 db.Modelo.nome_normalizado)
+    if top:
+        consulta = consulta.limit(top)
+    return consulta
+
+
+def stream_rows(db_session, consulta):
+    """Linhas (nome, valores...) em blocos de LOTE_CURSOR, sem carregar o resultado inteiro."""
+    # Pela conexão (Core): as linhas não passam pela camada de entidades do ORM
+    resultado = db_session.connection().execute(
+        consulta.execution_options(stream_results=True, yield_per=LOTE_CURSOR)
+    )
+    for linha in resultado.tuples():
+        yield linha
+
+
+def _formatar(valor, casas: int) -> str:
+    return "" if valor is None else f"{valor:.{casas}f}"
 
+
+def write_table(linhas, saida, casas: int) -> dict:
+    """
+    Tabela de largura fixa (a largura não depende do conjunto, então sai linha
+    a linha). Métricas com `casas` decimais; ESHMIA sempre com quatro.
+    """
+    saida.write(f"{'Model':<{LARGURA_NOME}} " + " ".join(f"{c:>{LARGURA_VALOR}}" for c in COLUNAS) + "\n")
+    # Linha completa: um único % por linha; com valores vazios, coluna a coluna
+    modelo_linha = f"%-{LARGURA_NOME}s " + " ".join([f"%{LARGURA_VALOR}.{casas}f"] * len(METRICAS)) + \
+        f" %{LARGURA_VALOR}.4f\n"
+    estatisticas = {"linhas": 0, "com_eshmia": 0, "soma": 0.0, "melhor": None, "pior": None}
+    melhor = pior = None
+    for linha in linhas:
+        nome = linha[0]
+        if len(nome) > LARGURA_NOME:
+            linha = (nome[:LARGURA_NOME - 1] + "…",) + linha[1:]
+        if None in linha:
+            saida.write(f"{linha[0]:<{LARGURA_NOME}} " +
+                        " ".join(f"{_formatar(v, casas):>{LARGURA_VALOR}}" for v in linha[1:-1]) +
+                        f" {_formatar(linha[-1], 4):>{LARGURA_VALOR}}\n")
+        else:
+            saida.write(modelo_linha % linha)
+
+        estatisticas["linhas"] += 1
+        eshmia = linha[-1]
+        if eshmia is not None:
+            estatisticas["com_eshmia"] += 1
+            estatisticas["soma"] += eshmia
+            if melhor is None or eshmia > melhor[1]:
+                melhor = (nome, eshmia)
+            if pior is None or eshmia < pior[1]:
+                pior = (nome, eshmia)
+    estatisticas["melhor"], estatisticas["pior"] = melhor, pior
+    return estatisticas
+
+
+def write_csv(linhas, saida):
+    escritor = csv.writer(saida, lineterminator="\n")
+    escritor.writerow(["Model"] + COLUNAS)
+    escritor.writerows(linhas)  # None vira campo vazio
+
+
+def write_json(linhas, saida):
+    """Lista JSON escrita um objeto por linha (pode ser lida em streaming)."""
+    saida.write("[")
+    separador = "\n"
+    for nome, *valores in linhas:
+        registro = {"Model": nome, **dict(zip(COLUNAS, valores))}
+        saida.write(separador + json.dumps(registro, ensure_ascii=False))
+        separador = ",\n"
+    saida.write("\n]\n")
+
+
+def print_statistics(estatisticas: dict):
+    if not estatisticas["linhas"]:
+        print("Nenhum modelo encontrado no banco de dados com esses critérios.")
+        print(f"Verifique se o arquivo dados.csv contém valores válidos para: {', '.join(METRICAS)}.")
+        return
+    print(f"\n----- Estatísticas ({estatisticas['linhas']} modelos exibidos) -----")
+    if estatisticas["com_eshmia"]:
+        print(f"Melhor Modelo: {estatisticas['melhor'][0]} ({estatisticas['melhor'][1]:.4f})")
+        print(f"Pior Modelo: {estatisticas['pior'][0]} ({estatisticas['pior'][1]:.4f})")
+        print(f"Média Geral ESHMIA: {estatisticas['soma'] / estatisticas['com_eshmia']:.4f}")
+
+
+def show_table(ordenar: str = COLUNA_ESHMIA, crescente: bool = False, filtros: list = (), modelo: str = None,
+               tipo: str = None, top: int = None, formato: str = "table", normalizados: bool = False,
+               saida=None):
+    saida = saida or sys.stdout
+    consulta = build_query(ordenar, crescente, filtros, modelo, tipo, top, normalizados)
+    db_session = next(db.get_db())
+    try:
+        linhas = stream_rows(db_session, consulta)
+        if formato == "csv":
+            write_csv(linhas, saida)
+        elif formato == "json":
+            write_json(linhas, saida)
+        else:
+            estatisticas = write_table(linhas, saida, 4 if normalizados else 2)
+            print_statistics(estatisticas)
     finally:
-        db.close()
+        db_session.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Consulta os modelos e o ESHMIA do banco pelo terminal.")
+    parser.add_argument("--sort", default=COLUNA_ESHMIA, help=f"coluna de ordenação ({', '.join(COLUNAS)})")
+    parser.add_argument("--asc", action="store_true", help="ordem crescente (padrão: decrescente)")
+    parser.add_argument("--where", action="append", default=[], metavar="EXPR",
+                        help="filtro numérico, ex.: 'MATH>=40' (pode repetir; todos precisam valer)")
+    parser.add_argument("--model", help="trecho do nome do modelo (sem diferenciar maiúsculas)")
+    parser.add_argument("--type", help="tipo do modelo (proprietary, instruct, base...)")
+    parser.add_argument("--top", type=int, help="número máximo de linhas")
+    parser.add_argument("--format", choices=FORMATOS, default="table", help="formato da saída (padrão: table)")
+    parser.add_argument("--normalized", action="store_true", help="valores normalizados em vez dos crus")
+    args = parser.parse_args(argv)
+
+    try:
+        ordenar = resolve_column(args.sort)
+        filtros = [parse_filter(expressao) for expressao in args.where]
+    except ValueError as e:
+        parser.error(str(e))
+
+    try:
+        show_table(ordenar, args.asc, filtros, args.model, args.type, args.top, args.format, args.normalized)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # Saída cortada (ex.: `| head`): encerra sem traceback
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    return 0
+
 
 if __name__ == "__main__":
-    show_table()
+    sys.exit(main())
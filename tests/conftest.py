@@ -0,0 +1,57 @@
+"""
+Configuração comum dos testes (pytest, executado na raiz do repositório).
+
+Os testes usam bancos SQLite temporários: a fixture `banco` aponta
+DATABASE_URL para um arquivo em tmp_path e descarta o engine preguiçoso de
+backend/database.py (recriado no primeiro uso) e o snapshot em cache. A
+fixture `banco_com_lote` já traz o CSV de tests/fixtures coletado e um lote
+calculado.
+"""
+
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+FIXTURE_CSV = os.path.join(RAIZ, "tests", "fixtures", "leaderboard.csv")
+
+
+def _descartar_engine(db):
+    from backend import snapshot
+    snapshot._cache["snapshot"] = None
+    engine = db._estado.pop("engine", None)
+    if engine is not None:
+        engine.dispose()
+    db._estado.pop("SessionLocal", None)
+    db._estado.pop("url", None)
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    """Módulo backend.database ligado a um banco SQLite vazio em tmp_path."""
+    from backend import database as db
+
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'teste.db'}")
+    monkeypatch.setenv("ESHMIA_WARM_START_FILE", str(tmp_path / "warm_start.json"))
+    _descartar_engine(db)
+    yield db
+    _descartar_engine(db)
+
+
+@pytest.fixture
+def banco_com_lote(banco):
+    """Banco com os modelos de tests/fixtures/leaderboard.csv e um lote calculado."""
+    from backend import calculator, collector
+
+    banco.init_db()
+    db_session = banco.SessionLocal()
+    try:
+        collector.collect_and_store_data(db_session, model_list=collector.load_csv_data(FIXTURE_CSV))
+        calculator.calculate_and_store_metrics(db_session)
+    finally:
+        db_session.close()
+    return banco
@@ -0,0 +1,90 @@
+"""Análises automáticas (analysis.py): memoização pelo hash do snapshot."""
+
+import pytest
+from sqlalchemy import func
+
+from backend import analysis, calculator
+from backend.snapshot import load_snapshot
+
+
+@pytest.fixture
+def geracoes(monkeypatch):
+    """Conta as chamadas a build_analyses (a geração efetiva dos textos)."""
+    chamadas = []
+    original = analysis.build_analyses
+
+    def contar(snapshot):
+        chamadas.append(snapshot.batch_id)
+        return original(snapshot)
+
+    monkeypatch.setattr(analysis, "build_analyses", contar)
+    return chamadas
+
+
+def _linhas_por_hash(db, db_session):
+    """Número de análises gravadas por hash de snapshot."""
+    return dict(db_session.query(db.Analise.hash_snapshot, func.count(db.Analise.id)).group_by(
+        db.Analise.hash_snapshot
+    ).all())
+
+
+def test_unchanged_snapshot_reuses_stored_analyses(banco_com_lote, geracoes):
+    db = banco_com_lote
+    db_session = db.SessionLocal()
+    try:
+        primeiro = db_session.query(db.Lote).one()
+        analises = analysis.generate_and_store_analyses(db_session, primeiro)
+        assert geracoes == [primeiro.id]
+        hash_primeiro = analysis.snapshot_hash(load_snapshot(db_session, primeiro.id))
+        linhas = _linhas_por_hash(db, db_session)
+        assert list(linhas) == [hash_primeiro]
+        assert linhas[hash_primeiro] == 1 + len(analises[analysis.ESCOPO_SEGMENTO]) + len(analises[analysis.ESCOPO_MODELO])
+
+        # Novo lote com os mesmos dados: mesmo hash, textos lidos do banco
+        segundo = calculator.calculate_and_store_metrics(db_session)
+        assert segundo.id != primeiro.id
+        assert analysis.snapshot_hash(load_snapshot(db_session, segundo.id)) == hash_primeiro
+        assert analysis.generate_and_store_analyses(db_session, segundo) == analises
+        assert geracoes == [primeiro.id]
+        assert _linhas_por_hash(db, db_session) == linhas
+
+        # Um resultado diferente muda o hash e as análises são refeitas
+        resultado = db_session.query(db.Resultado).first()
+        alterado = resultado.modelo.nome_normalizado
+        resultado.valor_cru = resultado.valor_cru / 2
+        resultado.valor_normalizado = None
+        db_session.commit()
+        terceiro = calculator.calculate_and_store_metrics(db_session)
+        hash_terceiro = analysis.snapshot_hash(load_snapshot(db_session, terceiro.id))
+        assert hash_terceiro != hash_primeiro
+
+        novas = analysis.generate_and_store_analyses(db_session, terceiro)
+        assert geracoes == [primeiro.id, terceiro.id]
+        assert novas[analysis.ESCOPO_MODELO][alterado] != analises[analysis.ESCOPO_MODELO][alterado]
+        assert set(_linhas_por_hash(db, db_session)) == {hash_primeiro, hash_terceiro}
+        assert {lote for (lote,) in db_session.query(db.Analise.lote_id).filter(
+            db.Analise.hash_snapshot == hash_terceiro
+        ).distinct()} == {terceiro.id}
+    finally:
+        db_session.close()
+
+
+def test_api_reads_the_analyses_once_per_batch(banco_com_lote, geracoes):
+    from backend.app import app
+
+    cliente = app.test_client()
+    status = cliente.get('/api/status').get_json()
+    resposta = cliente.get('/api/analysis').get_json()
+    assert resposta["ecossistema"] == status["analise_automatica"]
+    assert geracoes == [status["batch_id"]]
+
+    # Outra rota no mesmo lote e um lote novo com os mesmos dados não geram de novo
+    nome = status["lista_modelos"][0]["nome_normalizado"]
+    assert cliente.get(f'/api/analysis?model={nome}').get_json()["modelos"][nome]
+    db_session = banco_com_lote.SessionLocal()
+    try:
+        calculator.calculate_and_store_metrics(db_session)
+    finally:
+        db_session.close()
+    assert cliente.get('/api/analysis').get_json()["ecossistema"] == resposta["ecossistema"]
+    assert geracoes == [status["batch_id"]]
@@ -0,0 +1,126 @@
+"""Cubo de agregação por segmento (cube.py) e /api/cube, contra uma referência em Python."""
+
+import math
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from backend.cube import SEM_SEGMENTO, TODOS, build_cube, query_cube
+
+NAN = float("nan")
+
+
+def _cubo_referencia(snapshot):
+    """Agrega linha a linha, em dicionários, nas quatro células de cada modelo."""
+    grupos = {}
+    for coluna, valores in snapshot.colunas.items():
+        for i, valor in enumerate(valores.tolist()):
+            if math.isnan(valor):
+                continue
+            tipo = snapshot.tipos[i] or SEM_SEGMENTO
+            fonte = snapshot.fontes[i] or SEM_SEGMENTO
+            for chave in ((tipo, fonte), (tipo, TODOS), (TODOS, fonte), (TODOS, TODOS)):
+                grupos.setdefault((*chave, coluna), []).append((valor, i))
+    return {
+        chave: {
+            "contagem": len(itens),
+            "media": sum(v for v, _ in itens) / len(itens),
+            "minimo": min(v for v, _ in itens),
+            "maximo": max(v for v, _ in itens),
+            # Empate: a primeira linha
+            "melhor_modelo": snapshot.nomes[min(i for v, i in itens if v == max(v for v, _ in itens))]
+        }
+        for chave, itens in grupos.items()
+    }
+
+
+def _por_chave(celulas):
+    return {(c["tipo"], c["fonte"], c["metrica"]): {k: v for k, v in c.items() if k not in ("tipo", "fonte", "metrica")}
+            for c in celulas}
+
+
+def _comparar(celulas, referencia):
+    obtido = _por_chave(celulas)
+    assert set(obtido) == set(referencia)
+    for chave, esperado in referencia.items():
+        assert obtido[chave] == {**esperado, "media": pytest.approx(esperado["media"])}, chave
+
+
+def test_matches_python_reference_with_empty_segments():
+    snapshot = SimpleNamespace(
+        nomes=["a", "b", "c", "d", "e", "f"],
+        tipos=["open", "open", "proprietary", None, "open", "proprietary"],
+        fontes=["csv", "pg", "csv", "csv", "csv", "pg"],
+        colunas={
+            "MATH": np.array([0.5, 0.7, 0.7, 0.2, 0.7, NAN]),
+            # proprietary/pg só tem NaN nesta coluna e a coluna vazia não gera células
+            "GPQA": np.array([0.1, NAN, 0.3, NAN, 0.9, NAN]),
+            "MUSR": np.full(6, NAN),
+        },
+    )
+    celulas = build_cube(snapshot)
+    referencia = _cubo_referencia(snapshot)
+    _comparar(celulas, referencia)
+
+    chaves = _por_chave(celulas)
+    # Segmentos sem modelos ou só com valores ausentes não têm célula
+    assert ("Unknown", "pg", "MATH") not in chaves
+    assert ("proprietary", "pg", "GPQA") not in chaves
+    assert not any(metrica == "MUSR" for _, _, metrica in chaves)
+    # Tipo ausente vira "Unknown"; empate no máximo fica com a primeira linha
+    assert chaves[("Unknown", "csv", "MATH")]["contagem"] == 1
+    assert chaves[(TODOS, TODOS, "MATH")]["melhor_modelo"] == "b"
+    assert chaves[(TODOS, TODOS, "MATH")]["contagem"] == 5
+
+
+def test_random_snapshot_matches_reference():
+    rng = np.random.default_rng(0)
+    n = 300
+    valores = rng.integers(0, 20, size=(n, 3)) / 20
+    valores[rng.random((n, 3)) < 0.2] = NAN
+    snapshot = SimpleNamespace(
+        nomes=[f"modelo-{i}" for i in range(n)],
+        tipos=rng.choice(["open", "proprietary", "api", None], n).tolist(),
+        fontes=rng.choice(["csv", "pg"], n).tolist(),
+        colunas={"x": valores[:, 0], "y": valores[:, 1], "z": valores[:, 2]},
+    )
+    _comparar(build_cube(snapshot), _cubo_referencia(snapshot))
+
+
+def test_query_filters_case_insensitively():
+    celulas = [
+        {"tipo": "open", "fonte": "csv", "metrica": "MATH"},
+        {"tipo": TODOS, "fonte": "csv", "metrica": "MATH"},
+        {"tipo": "open", "fonte": TODOS, "metrica": "BBH"},
+    ]
+    assert query_cube(celulas, tipo="OPEN") == [celulas[0], celulas[2]]
+    assert query_cube(celulas, tipo=TODOS, metrica="math") == [celulas[1]]
+    assert query_cube(celulas, tipo="api") == []
+    assert query_cube(celulas) == celulas
+
+
+def test_cube_endpoint(banco_com_lote):
+    from backend.app import app
+    from backend.snapshot import get_snapshot
+
+    db_session = banco_com_lote.SessionLocal()
+    try:
+        referencia = _cubo_referencia(get_snapshot(db_session))
+    finally:
+        db_session.close()
+
+    cliente = app.test_client()
+    resposta = cliente.get('/api/cube').get_json()
+    _comparar(resposta["celulas"], referencia)
+
+    status = cliente.get('/api/status').get_json()
+    total = cliente.get('/api/cube?type=*&source=*&metric=eshmia').get_json()["celulas"]
+    assert len(total) == 1
+    assert total[0]["contagem"] == len(status["lista_modelos"])
+    assert total[0]["media"] == pytest.approx(status["eshmia_medio"])
+
+    por_tipo = cliente.get('/api/cube?type=open&source=*').get_json()["celulas"]
+    assert por_tipo and all(c["tipo"] == "open" and c["fonte"] == TODOS for c in por_tipo)
+    assert cliente.get('/api/cube?type=inexistente').get_json()["celulas"] == []
+    assert cliente.get('/api/cube?metric=inexistente').status_code == 404
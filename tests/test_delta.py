@@ -0,0 +1,67 @@
+"""/api/delta: modelos alterados depois de um lote (batch id ou timestamp)."""
+
+from datetime import timedelta
+
+import pytest
+
+from backend import calculator
+
+
+@pytest.fixture
+def lotes(banco_com_lote):
+    """Dois lotes: o segundo altera um resultado de um único modelo."""
+    db = banco_com_lote
+    db_session = db.SessionLocal()
+    try:
+        primeiro = db_session.query(db.Lote).one()
+        resultado = db_session.query(db.Resultado).first()
+        alterado = resultado.modelo.nome_normalizado
+        resultado.valor_cru = resultado.valor_cru / 2
+        resultado.valor_normalizado = None
+        db_session.commit()
+        segundo = calculator.calculate_and_store_metrics(db_session)
+        return {"primeiro": primeiro.id, "segundo": segundo.id, "alterado": alterado,
+                "instante": primeiro.data_calculo}
+    finally:
+        db_session.close()
+
+
+@pytest.fixture
+def cliente(banco_com_lote):
+    from backend.app import app
+    return app.test_client()
+
+
+def test_since_batch_id_returns_only_changed_models(cliente, lotes):
+    status = cliente.get('/api/status').get_json()
+    atuais = {m["nome_normalizado"]: m for m in status["lista_modelos"]}
+
+    delta = cliente.get(f'/api/delta?since={lotes["primeiro"]}').get_json()
+    assert delta["batch_id"] == lotes["segundo"]
+    assert delta["since"] == lotes["primeiro"]
+    assert [m["nome_normalizado"] for m in delta["lista_modelos"]] == [lotes["alterado"]]
+    # Mesmo conteúdo do /api/status, incluindo o ESHMIA mais recente
+    assert delta["lista_modelos"][0] == atuais[lotes["alterado"]]
+    assert delta["eshmia_medio"] == status["eshmia_medio"]
+
+    assert cliente.get(f'/api/delta?since={lotes["segundo"]}').get_json()["lista_modelos"] == []
+    completo = cliente.get('/api/delta?since=0').get_json()["lista_modelos"]
+    assert completo == status["lista_modelos"]
+
+
+def test_since_timestamp_maps_to_the_last_batch_before_it(cliente, lotes):
+    depois_do_primeiro = (lotes["instante"] + timedelta(microseconds=1)).isoformat() + "Z"
+    delta = cliente.get(f'/api/delta?since={depois_do_primeiro}').get_json()
+    assert delta["since"] == lotes["primeiro"]
+    assert [m["nome_normalizado"] for m in delta["lista_modelos"]] == [lotes["alterado"]]
+
+    antes = (lotes["instante"] - timedelta(days=1)).isoformat()
+    assert cliente.get(f'/api/delta?since={antes}').get_json()["since"] == 0
+
+    # ?since= no /api/status é o mesmo delta
+    assert cliente.get(f'/api/status?since={depois_do_primeiro}').get_json()["since"] == lotes["primeiro"]
+
+
+def test_invalid_since_and_index(cliente, lotes):
+    assert cliente.get('/api/delta?since=ontem').status_code == 400
+    assert cliente.get('/api/delta?since=1&index=inexistente').status_code == 400
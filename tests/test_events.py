@@ -0,0 +1,69 @@
+"""Eventos SSE (backend/events.py e /api/events)."""
+
+from backend import events
+
+
+def _lote(db, db_session, modelos):
+    lote = db.Lote(modelos_calculados=len(modelos), modelos_alterados=len(modelos))
+    db_session.add(lote)
+    db_session.flush()
+    for modelo in modelos:
+        db_session.add(db.Alteracao(lote_id=lote.id, modelo_id=modelo.id, valor_novo=50.0))
+    return lote
+
+
+def test_watcher_publishes_every_new_batch_in_order(banco):
+    banco.init_db()
+    db_session = banco.SessionLocal()
+    try:
+        gpt = banco.Modelo(nome_normalizado="gpt-4-turbo")
+        claude = banco.Modelo(nome_normalizado="claude-3-opus")
+        db_session.add_all([gpt, claude])
+        antigo = _lote(banco, db_session, [gpt])
+        db_session.commit()
+
+        broker = events.EventBroker()
+        visto = broker.check_batches()
+        assert visto == antigo.id
+        assert broker.wait_for(0, timeout=0) == []  # lotes anteriores não geram eventos
+
+        # Três lotes entre duas verificações; o do meio não alterou modelos
+        primeiro = _lote(banco, db_session, [gpt, claude])
+        vazio = _lote(banco, db_session, [])
+        terceiro = _lote(banco, db_session, [claude])
+        db_session.commit()
+
+        assert broker.check_batches(visto) == terceiro.id
+        publicados = broker.wait_for(antigo.id, timeout=0)
+        assert [e["id"] for e in publicados] == [primeiro.id, terceiro.id]
+        assert sorted(publicados[0]["dados"]["modelos_alterados"]) == ["claude-3-opus", "gpt-4-turbo"]
+        assert vazio.id not in [e["id"] for e in publicados]
+
+        # Nada novo: nenhuma publicação repetida
+        assert broker.check_batches(terceiro.id) == terceiro.id
+        assert len(broker.wait_for(antigo.id, timeout=0)) == 2
+    finally:
+        db_session.close()
+
+
+def test_event_stream_connections_are_capped(banco, monkeypatch):
+    from backend.app import app
+
+    broker = events.EventBroker(max_conexoes=1)
+    monkeypatch.setattr(events, "broker", broker)
+    monkeypatch.setattr(broker, "ensure_watcher", lambda: None)
+    cliente = app.test_client()
+
+    aberta = cliente.get('/api/events')
+    assert aberta.status_code == 200
+    assert broker.conexoes == 1
+
+    recusada = cliente.get('/api/events')
+    assert recusada.status_code == 200
+    assert recusada.get_data(as_text=True).startswith(f"retry: {events.RETRY_LOTADO_MS}\n")
+    assert broker.conexoes == 1
+
+    aberta.close()
+    assert broker.conexoes == 0
+    assert cliente.get('/api/events').status_code == 200
+    assert broker.conexoes == 1
@@ -0,0 +1,94 @@
+"""Registro de índices (indices.py), /api/indices e ?index= no /api/status."""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from backend import indices
+
+GOLDEN = Path(__file__).resolve().parent / "fixtures" / "golden" / "data.json"
+
+
+def _media_ponderada(valores, pesos):
+    """Média ponderada de referência, métrica a métrica."""
+    return sum(valores[m] * pesos[m] for m in indices.METRICAS) / sum(pesos[m] for m in indices.METRICAS)
+
+
+def test_weights_are_normalized():
+    nomes, pesos = indices.weight_matrix()
+    assert nomes == list(indices.INDICES)
+    assert pesos.sum(axis=1) == pytest.approx(np.ones(len(nomes)))
+    assert pesos[nomes.index(indices.INDICE_PADRAO)] == pytest.approx(np.full(6, 1 / 6))
+
+
+def test_default_index_reproduces_original_eshmia():
+    """O ESHMIA do build anterior à série (ver test_static_build.py) sai igual do índice padrão."""
+    modelos = json.loads(GOLDEN.read_text(encoding="utf-8"))["lista_modelos"]
+    matriz = np.array([[m["valores_normalizados"][metrica] for metrica in indices.METRICAS] for m in modelos])
+
+    valores = indices.evaluate(matriz)
+    assert set(valores) == set(indices.INDICES)
+    assert valores[indices.INDICE_PADRAO] == pytest.approx([m["valor_eshmia"] for m in modelos], abs=1e-12)
+    for nome, definicao in indices.INDICES.items():
+        esperado = [_media_ponderada(m["valores_normalizados"], definicao["pesos"]) for m in modelos]
+        assert valores[nome] == pytest.approx(esperado, abs=1e-12)
+
+
+@pytest.fixture
+def cliente(banco_com_lote):
+    from backend.app import app
+    return app.test_client()
+
+
+def test_indices_endpoint(cliente):
+    resposta = cliente.get('/api/indices').get_json()["indices"]
+    assert [i["nome"] for i in resposta] == list(indices.INDICES)
+    assert [i["nome"] for i in resposta if i["padrao"]] == [indices.INDICE_PADRAO]
+    for item in resposta:
+        assert sum(item["pesos"].values()) == pytest.approx(1.0)
+
+
+def test_status_with_index(cliente, banco_com_lote):
+    padrao = cliente.get('/api/status').get_json()
+    assert padrao["indice"] == indices.INDICE_PADRAO
+    for modelo in padrao["lista_modelos"]:
+        assert modelo["valor_eshmia"] == pytest.approx(np.mean(list(modelo["valores_normalizados"].values())))
+
+    # O índice padrão pedido explicitamente (sem diferenciar maiúsculas) é o mesmo status
+    explicito = cliente.get('/api/status?index=ESHMIA').get_json()
+    assert explicito["lista_modelos"] == padrao["lista_modelos"]
+
+    db = banco_com_lote
+    db_session = db.SessionLocal()
+    try:
+        gravados = {
+            (nome, indice): valor for indice, valor, nome in db_session.query(
+                db.ValorIndice.indice, db.ValorIndice.valor, db.Modelo.nome_normalizado
+            ).join(db.Modelo, db.ValorIndice.modelo_id == db.Modelo.id)
+        }
+    finally:
+        db_session.close()
+
+    for nome, definicao in indices.INDICES.items():
+        if nome == indices.INDICE_PADRAO:
+            continue
+        variante = cliente.get(f'/api/status?index={nome}').get_json()
+        assert variante["indice"] == nome
+        assert [m["nome_normalizado"] for m in variante["lista_modelos"]] == \
+            [m["nome_normalizado"] for m in padrao["lista_modelos"]]
+        valores = []
+        for modelo in variante["lista_modelos"]:
+            esperado = _media_ponderada(modelo["valores_normalizados"], definicao["pesos"])
+            assert modelo["valor_eshmia"] == pytest.approx(esperado)
+            assert gravados[(modelo["nome_normalizado"], nome)] == pytest.approx(esperado)
+            valores.append(esperado)
+        assert variante["eshmia_medio"] == pytest.approx(np.mean(valores))
+
+
+def test_unknown_index_is_rejected(cliente):
+    resposta = cliente.get('/api/status?index=inexistente')
+    assert resposta.status_code == 400
+    assert resposta.get_json()["indices"] == list(indices.INDICES)
+    assert cliente.get('/api/delta?since=0&index=inexistente').status_code == 400
@@ -0,0 +1,122 @@
+"""Histórico de posições (rankings.py) e /api/movers ao longo de vários lotes."""
+
+import numpy as np
+import pytest
+
+from backend import calculator, collector, rankings
+
+
+def _postos_referencia(valores):
+    """Posto denso de cada valor (1 = maior; empates dividem o posto; NaN = 0)."""
+    distintos = sorted({v for v in valores if not np.isnan(v)}, reverse=True)
+    return [0 if np.isnan(v) else distintos.index(v) + 1 for v in valores]
+
+
+def _posicoes_atuais(db, db_session, criterio=rankings.CRITERIO_GERAL):
+    """Última posição gravada de cada modelo, por nome."""
+    nomes = dict(db_session.query(db.Modelo.id, db.Modelo.nome_normalizado))
+    return {nomes[m]: p for m, c, p in rankings._ultimas_posicoes(db_session) if c == criterio}
+
+
+def _eshmia_atual(cliente):
+    return {m["nome_normalizado"]: m["valor_eshmia"] for m in cliente.get('/api/status').get_json()["lista_modelos"]}
+
+
+def test_dense_ranks_ties_and_missing():
+    matriz = np.array([
+        [0.9, np.nan],
+        [0.5, 0.2],
+        [0.9, 0.2],
+        [0.1, 0.7],
+        [0.5, np.nan],
+    ])
+    postos = rankings.dense_ranks(matriz)
+    for j in range(matriz.shape[1]):
+        assert postos[:, j].tolist() == _postos_referencia(matriz[:, j].tolist())
+    assert postos[:, 0].tolist() == [1, 2, 1, 3, 2]
+
+
+@pytest.fixture
+def cliente(banco_com_lote):
+    from backend.app import app
+    return app.test_client()
+
+
+def test_only_changed_positions_are_written(banco_com_lote, cliente):
+    db = banco_com_lote
+    db_session = db.SessionLocal()
+    try:
+        primeiro = db_session.query(db.Lote).one().id
+        antes = _eshmia_atual(cliente)
+        assert _posicoes_atuais(db, db_session) == dict(zip(antes, _postos_referencia(list(antes.values()))))
+
+        # O último colocado copia as notas do primeiro: empata com ele no topo
+        lider, lanterna = max(antes, key=antes.get), min(antes, key=antes.get)
+        ids = dict(db_session.query(db.Modelo.nome_normalizado, db.Modelo.id))
+        notas_lider = {r.metrica_id: r.valor_cru for r in
+                       db_session.query(db.Resultado).filter(db.Resultado.modelo_id == ids[lider])}
+        for resultado in db_session.query(db.Resultado).filter(db.Resultado.modelo_id == ids[lanterna]):
+            resultado.valor_cru = notas_lider[resultado.metrica_id]
+            resultado.valor_normalizado = None
+        db_session.commit()
+        segundo = calculator.calculate_and_store_metrics(db_session).id
+
+        depois = _eshmia_atual(cliente)
+        assert depois[lanterna] == depois[lider]
+        postos_antes = dict(zip(antes, _postos_referencia(list(antes.values()))))
+        postos_depois = dict(zip(depois, _postos_referencia(list(depois.values()))))
+        atuais = _posicoes_atuais(db, db_session)
+        assert atuais == postos_depois
+        assert atuais[lanterna] == atuais[lider] == 1
+
+        # Só quem mudou de posição ganhou registro no segundo lote, com a posição anterior
+        gravados = {
+            (nome, p.posicao, p.posicao_anterior)
+            for p, nome in db_session.query(db.PosicaoRanking, db.Modelo.nome_normalizado).join(db.Modelo).filter(
+                db.PosicaoRanking.lote_id == segundo, db.PosicaoRanking.criterio == rankings.CRITERIO_GERAL
+            )
+        }
+        assert gravados == {
+            (nome, postos_depois[nome], postos_antes[nome])
+            for nome in postos_depois if postos_depois[nome] != postos_antes[nome]
+        }
+        assert 0 < len(gravados) < len(postos_depois)
+
+        # Um lote sem mudanças não grava posições
+        calculator.calculate_and_store_metrics(db_session)
+        assert db_session.query(db.PosicaoRanking).filter(db.PosicaoRanking.lote_id > segundo).count() == 0
+    finally:
+        db_session.close()
+
+    movers = cliente.get(f'/api/movers?since={primeiro}').get_json()
+    assert movers["since"] == primeiro
+    assert movers["subiram"][0] == {"nome_normalizado": lanterna, "posicao": 1,
+                                    "posicao_anterior": postos_antes[lanterna],
+                                    "variacao": postos_antes[lanterna] - 1}
+    assert all(m["variacao"] < 0 for m in movers["cairam"])
+    assert movers["novos"] == [] and movers["sairam"] == []
+
+
+def test_new_models_enter_the_ranking(banco_com_lote, cliente):
+    db = banco_com_lote
+    db_session = db.SessionLocal()
+    try:
+        novo = {"nome": "modelo-novo-70b", "fonte": "teste", "tipo": "open",
+                "metricas": {"IFEval": 99.0, "BBH": 99.0, "MATH": 99.0, "GPQA": 99.0, "MUSR": 99.0, "MMLU-PRO": 99.0}}
+        collector.collect_and_store_data(db_session, model_list=[novo])
+        segundo = calculator.calculate_and_store_metrics(db_session).id
+        assert _posicoes_atuais(db, db_session)["modelo-novo-70b"] == 1
+        assert _posicoes_atuais(db, db_session, "MATH")["modelo-novo-70b"] == 1
+    finally:
+        db_session.close()
+
+    # Sem since: compara com o lote anterior
+    movers = cliente.get('/api/movers').get_json()
+    assert movers["batch_id"] == segundo
+    assert movers["novos"] == [{"nome_normalizado": "modelo-novo-70b", "posicao": 1, "posicao_anterior": None}]
+    # Todos os outros caíram uma posição
+    assert len(movers["cairam"]) == 10 and all(m["variacao"] == -1 for m in movers["cairam"])
+
+    assert cliente.get('/api/movers?criterion=math').get_json()["criterio"] == "MATH"
+    assert cliente.get('/api/movers?criterion=inexistente').status_code == 400
+    assert cliente.get('/api/movers?since=ontem').status_code == 400
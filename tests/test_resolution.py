@@ -0,0 +1,100 @@
+"""Resolução de grafias (resolution.py) e duplicados no lote (validation.py)."""
+
+from backend.resolution import EntityResolver, canonical_name
+from backend.validation import validate_models
+
+
+def _resolver(*nomes):
+    resolver = EntityResolver()
+    for modelo_id, nome in enumerate(nomes):
+        resolver.add(nome, modelo_id)
+    return resolver
+
+
+def test_dated_snapshots_stay_separate():
+    resolver = _resolver("claude-3-5-sonnet-20240620", "gpt-4o-2024-05-13")
+    assert resolver.resolve("claude-3-5-sonnet-20241022") == (None, 0.0)
+    assert resolver.resolve("gpt-4o-2024-08-06") == (None, 0.0)
+    assert canonical_name("gpt-4o-2024-05-13") != canonical_name("gpt-4o-2024-08-06")
+
+
+def test_spelling_variants_merge():
+    resolver = _resolver("claude-3-5-sonnet-20240620", "GPT-4 Turbo", "llama-3-8b-instruct")
+    assert resolver.resolve("CLAUDE 3.5 SONNET 20240620") == (0, 1.0)
+    assert resolver.resolve("gpt-4-turbo") == (1, 1.0)
+    assert resolver.resolve("meta-llama/Llama-3-8B-Instruct-hf") == (2, 1.0)
+
+
+def test_same_batch_spellings_are_quarantined():
+    modelos = [
+        {"nome": "claude-3-5-sonnet-20240620", "metricas": {"IFEval": 50.0}},
+        {"nome": "claude-3-5-sonnet-20241022", "metricas": {"IFEval": 51.0}},
+        {"nome": "Anthropic/Claude 3-5 Sonnet-20240620", "metricas": {"IFEval": 52.0}},
+    ]
+    validos, quarentena, estatisticas = validate_models(modelos)
+    assert [m["nome"] for m in validos] == ["claude-3-5-sonnet-20240620", "claude-3-5-sonnet-20241022"]
+    assert [linha["nome"] for linha in quarentena] == ["Anthropic/Claude 3-5 Sonnet-20240620"]
+    assert estatisticas["duplicados"] == 1
+
+
+def test_same_name_from_different_orgs_stays_separate():
+    resolver = _resolver("orgA/llama-3-8b-instruct")
+    assert resolver.resolve("orgB/llama-3-8b-instruct") == (None, 0.0)
+    assert resolver.resolve("OrgA/Llama 3 8B Instruct") == (0, 1.0)
+    assert canonical_name("orgA/llama-3-8b-instruct") != canonical_name("orgB/llama-3-8b-instruct")
+
+    # Sem organização só casa quando uma única organização publicou o nome
+    assert resolver.resolve("llama-3-8b-instruct") == (0, 1.0)
+    resolver.add("orgB/llama-3-8b-instruct", 1)
+    assert resolver.resolve("llama-3-8b-instruct") == (None, 0.0)
+
+
+def test_org_prefixed_spelling_merges_into_unprefixed_model():
+    resolver = _resolver("llama-3-8b-instruct")
+    assert resolver.resolve("meta-llama/Llama-3-8B-Instruct") == (0, 1.0)
+    resolver.add("meta-llama/Llama-3-8B-Instruct", 0)
+    # Outra organização com o mesmo nome é outro fine-tune
+    assert resolver.resolve("orgB/llama-3-8b-instruct") == (None, 0.0)
+
+
+def test_undated_and_dated_spellings_merge_while_unambiguous():
+    modelo_id, similaridade = _resolver("GPT-4 Turbo").resolve("gpt-4-turbo-2024")
+    assert modelo_id == 0 and similaridade > 0.8
+    assert _resolver("gpt-4-turbo-2024-04-09").resolve("GPT-4 Turbo")[0] == 0
+
+    # Com dois snapshots registrados, o nome sem data e um terceiro snapshot ficam separados
+    resolver = _resolver("gpt-4o", "gpt-4o-2024-05-13")
+    assert resolver.resolve("gpt-4o-2024-08-06") == (None, 0.0)
+    assert _resolver("gpt-4o-2024-05-13", "gpt-4o-2024-08-06").resolve("gpt-4o") == (None, 0.0)
+
+
+def test_two_orgs_are_collected_as_two_models(banco):
+    from backend import collector
+
+    banco.init_db()
+    lote = [
+        {"nome": "orgA/llama-3-8b-instruct", "metricas": {"IFEval": 50.0}},
+        {"nome": "orgB/llama-3-8b-instruct", "metricas": {"IFEval": 70.0}},
+    ]
+    db_session = banco.SessionLocal()
+    try:
+        for _ in range(2):  # a segunda coleta reencontra os dois pelo nome gravado
+            collector.collect_and_store_data(db_session, model_list=lote)
+        modelos = {m.nome_normalizado: m.id for m in db_session.query(banco.Modelo)}
+        assert set(modelos) == {"orga-llama-3-8b-instruct", "orgb-llama-3-8b-instruct"}
+        valores = {r.modelo_id: r.valor_cru for r in db_session.query(banco.Resultado)}
+        assert valores == {modelos["orga-llama-3-8b-instruct"]: 50.0, modelos["orgb-llama-3-8b-instruct"]: 70.0}
+    finally:
+        db_session.close()
+
+
+def test_undated_and_dated_spellings_in_one_batch_are_quarantined():
+    modelos = [
+        {"nome": "GPT-4 Turbo", "metricas": {"IFEval": 50.0}},
+        {"nome": "orgA/llama-3-8b-instruct", "metricas": {"IFEval": 50.0}},
+        {"nome": "orgB/llama-3-8b-instruct", "metricas": {"IFEval": 51.0}},
+        {"nome": "gpt-4-turbo-2024-04-09", "metricas": {"IFEval": 52.0}},
+    ]
+    validos, quarentena, _ = validate_models(modelos)
+    assert [m["nome"] for m in validos] == ["GPT-4 Turbo", "orgA/llama-3-8b-instruct", "orgB/llama-3-8b-instruct"]
+    assert [linha["nome"] for linha in quarentena] == ["gpt-4-turbo-2024-04-09"]
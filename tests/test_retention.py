@@ -0,0 +1,74 @@
+"""Retenção das tabelas gravadas por lote (history.prune_batches)."""
+
+from backend import history
+
+
+def _lotes(db, db_session, quantidade):
+    modelo = db.Modelo(nome_normalizado="gpt-4-turbo")
+    db_session.add(modelo)
+    lotes = [db.Lote() for _ in range(quantidade)]
+    db_session.add_all(lotes)
+    db_session.flush()
+    return modelo, [lote.id for lote in lotes]
+
+
+def test_prune_keeps_latest_index_values(banco):
+    banco.init_db()
+    db_session = banco.SessionLocal()
+    try:
+        modelo, ids = _lotes(banco, db_session, 5)
+        for lote_id in ids:
+            for indice in ("eshmia", "raciocinio"):
+                db_session.add(banco.ValorIndice(lote_id=lote_id, modelo_id=modelo.id, indice=indice, valor=50.0))
+        db_session.commit()
+
+        removidas = history.prune_batches(db_session, manter=2)
+        assert removidas["indices_valores"] == 6
+        restantes = {lote_id for (lote_id,) in db_session.query(banco.ValorIndice.lote_id)}
+        assert restantes == set(ids[-2:])
+
+        # 0 mantém tudo; rodar de novo não remove mais nada
+        assert history.prune_batches(db_session, manter=0) == {}
+        assert history.prune_batches(db_session, manter=2)["indices_valores"] == 0
+    finally:
+        db_session.close()
+
+
+def test_prune_keeps_latest_intervals(banco):
+    banco.init_db()
+    db_session = banco.SessionLocal()
+    try:
+        modelo, ids = _lotes(banco, db_session, 4)
+        # O bootstrap não roda em todo lote: conta os lotes presentes na tabela
+        for lote_id in ids[:3]:
+            db_session.add(banco.IntervaloEshmia(
+                lote_id=lote_id, modelo_id=modelo.id, ic_inferior=40.0, ic_superior=60.0,
+                posicao_media=1.0, posicao_ic_inferior=1, posicao_ic_superior=1,
+                prob_primeiro=1.0, prob_top10=1.0
+            ))
+        db_session.commit()
+
+        assert history.prune_batches(db_session, manter=2)["eshmia_intervalos"] == 1
+        restantes = {lote_id for (lote_id,) in db_session.query(banco.IntervaloEshmia.lote_id)}
+        assert restantes == set(ids[1:3])
+    finally:
+        db_session.close()
+
+
+def test_prune_keeps_analyses_of_latest_snapshots(banco):
+    banco.init_db()
+    db_session = banco.SessionLocal()
+    try:
+        _, ids = _lotes(banco, db_session, 4)
+        # Um lote com os mesmos dados do anterior reaproveita as análises (não grava)
+        for lote_id, hash_snapshot in zip(ids, ["a", "b", "c"]):
+            for escopo in ("ecossistema", "modelo"):
+                db_session.add(banco.Analise(hash_snapshot=hash_snapshot, lote_id=lote_id,
+                                             escopo=escopo, chave=None, texto="..."))
+        db_session.commit()
+
+        assert history.prune_batches(db_session, manter=2)["analises"] == 2
+        restantes = {h for (h,) in db_session.query(banco.Analise.hash_snapshot)}
+        assert restantes == {"b", "c"}
+    finally:
+        db_session.close()
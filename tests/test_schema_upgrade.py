@@ -0,0 +1,99 @@
+"""Atualização de bancos criados por versões anteriores (database.upgrade_db)."""
+
+import os
+import sqlite3
+import subprocess
+import sys
+
+from sqlalchemy import inspect
+
+from conftest import RAIZ
+
+# Schema da versão inicial mais as tabelas de lotes como eram antes de
+# eshmia_medio, metricas_alteradas e valor_novo anulável
+SCHEMA_ANTIGO = """
+CREATE TABLE modelos (
+    id INTEGER NOT NULL PRIMARY KEY, nome_normalizado VARCHAR NOT NULL UNIQUE,
+    fonte VARCHAR, url_origem VARCHAR, data_coleta DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX ix_modelos_id ON modelos (id);
+CREATE TABLE metricas (
+    id INTEGER NOT NULL PRIMARY KEY, nome VARCHAR NOT NULL UNIQUE,
+    baseline_humano FLOAT NOT NULL, fonte_baseline VARCHAR
+);
+CREATE TABLE resultados (
+    id INTEGER NOT NULL PRIMARY KEY, modelo_id INTEGER NOT NULL REFERENCES modelos (id),
+    metrica_id INTEGER NOT NULL REFERENCES metricas (id), valor_cru FLOAT NOT NULL,
+    valor_normalizado FLOAT, data_coleta DATETIME, link_origem VARCHAR
+);
+CREATE TABLE eshmia (
+    id INTEGER NOT NULL PRIMARY KEY, modelo_id INTEGER NOT NULL REFERENCES modelos (id),
+    valor_eshmia FLOAT NOT NULL, data_calculo DATETIME
+);
+CREATE TABLE lotes (
+    id INTEGER NOT NULL PRIMARY KEY, data_calculo DATETIME,
+    modelos_calculados INTEGER, modelos_alterados INTEGER
+);
+CREATE TABLE alteracoes (
+    id INTEGER NOT NULL PRIMARY KEY, lote_id INTEGER NOT NULL REFERENCES lotes (id),
+    modelo_id INTEGER NOT NULL REFERENCES modelos (id), valor_anterior FLOAT,
+    valor_novo FLOAT NOT NULL
+);
+CREATE INDEX ix_alteracoes_lote_id ON alteracoes (lote_id);
+INSERT INTO modelos (id, nome_normalizado, fonte) VALUES (1, 'modelo-antigo', 'CSV');
+INSERT INTO eshmia (id, modelo_id, valor_eshmia) VALUES (1, 1, 0.5);
+INSERT INTO lotes (id, modelos_calculados, modelos_alterados) VALUES (1, 1, 1);
+INSERT INTO alteracoes (id, lote_id, modelo_id, valor_anterior, valor_novo) VALUES (1, 1, 1, NULL, 0.5);
+"""
+
+
+def _banco_antigo(caminho):
+    conexao = sqlite3.connect(caminho)
+    conexao.executescript(SCHEMA_ANTIGO)
+    conexao.commit()
+    conexao.close()
+
+
+def _colunas(engine, tabela):
+    return {coluna["name"]: coluna for coluna in inspect(engine).get_columns(tabela)}
+
+
+def test_upgrade_adds_columns_tables_and_indexes(banco, tmp_path):
+    _banco_antigo(tmp_path / "teste.db")
+
+    mudancas = banco.upgrade_db()
+    engine = banco.get_engine()
+
+    for tabela, coluna in [("modelos", "tipo"), ("modelos", "rank"), ("modelos", "average"),
+                           ("modelos", "co2_cost"), ("eshmia", "lote_id"),
+                           ("lotes", "eshmia_medio"), ("alteracoes", "metricas_alteradas")]:
+        assert coluna in _colunas(engine, tabela), f"{tabela}.{coluna}"
+        assert f"{tabela}.{coluna}" in mudancas
+    assert _colunas(engine, "alteracoes")["valor_novo"]["nullable"]
+    assert "ix_eshmia_modelo_data" in {i["name"] for i in inspect(engine).get_indexes("eshmia")}
+    assert {"posicoes_ranking", "analises", "eshmia_intervalos", "sync_runs"} <= set(inspect(engine).get_table_names())
+
+    # As linhas antigas continuam lá, e uma alteração sem ESHMIA novo pode ser gravada
+    db_session = banco.SessionLocal()
+    try:
+        assert db_session.query(banco.Modelo).one().nome_normalizado == "modelo-antigo"
+        assert db_session.query(banco.Alteracao).one().valor_novo == 0.5
+        db_session.add(banco.Alteracao(lote_id=1, modelo_id=1, valor_anterior=0.5, valor_novo=None))
+        db_session.commit()
+    finally:
+        db_session.close()
+
+    # Idempotente
+    assert banco.upgrade_db() == []
+
+
+def test_refresh_runs_on_an_old_database(tmp_path):
+    caminho = tmp_path / "antigo.db"
+    _banco_antigo(caminho)
+    ambiente = dict(os.environ, DATABASE_URL=f"sqlite:///{caminho}",
+                    ESHMIA_WARM_START_FILE=str(tmp_path / "warm_start.json"))
+    processo = subprocess.run(
+        [sys.executable, "-c", "import sys, run; sys.exit(0 if run.refresh_data(False, True) else 1)"],
+        cwd=RAIZ, env=ambiente, capture_output=True, text=True, timeout=300
+    )
+    assert processo.returncode == 0, processo.stdout[-2000:] + processo.stderr[-2000:]
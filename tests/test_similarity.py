@@ -0,0 +1,88 @@
+"""Vizinhos mais próximos (similarity.py) e /api/similar, contra força bruta."""
+
+import numpy as np
+import pytest
+
+from backend import similarity
+from backend.similarity import SimilarityIndex, similarity_value
+
+
+def _vizinhos_forca_bruta(matriz, linha, k, metodo):
+    """Ordena todos os outros modelos pela similaridade (cosseno) ou distância euclidiana."""
+    outros = [j for j in range(len(matriz)) if j != linha]
+    if metodo == "cosine":
+        def chave(j):
+            return -np.dot(matriz[linha], matriz[j]) / (np.linalg.norm(matriz[linha]) * np.linalg.norm(matriz[j]))
+    else:
+        def chave(j):
+            return np.linalg.norm(matriz[linha] - matriz[j])
+    return sorted(outros, key=chave)[:k]
+
+
+@pytest.fixture
+def matriz():
+    return np.random.default_rng(0).random((200, 6))
+
+
+@pytest.mark.parametrize("metodo", similarity.METODOS)
+def test_neighbours_match_brute_force(matriz, metodo, monkeypatch):
+    # Fatias pequenas para cobrir mais de uma fatia em top_k_batch
+    monkeypatch.setattr(similarity, "TAMANHO_FATIA", 16)
+    indice = SimilarityIndex(matriz)
+    linhas = list(range(0, 200, 3))
+
+    vizinhos, pontuacoes = indice.top_k_batch(linhas, 10, metodo)
+    for linha, obtidos, valores in zip(linhas, vizinhos, pontuacoes):
+        esperados = _vizinhos_forca_bruta(matriz, linha, 10, metodo)
+        assert obtidos.tolist() == esperados
+        assert linha not in obtidos
+        if metodo == "euclidean":
+            distancias = [similarity_value(p, metodo)["distancia"] for p in valores]
+            assert distancias == pytest.approx([np.linalg.norm(matriz[linha] - matriz[j]) for j in esperados],
+                                               abs=1e-4)
+
+    # A consulta individual (com LRU) devolve o mesmo que o lote
+    assert indice.query(linhas[1], 10, metodo)[0].tolist() == vizinhos[1].tolist()
+
+
+def test_excludes_itself_even_with_identical_vectors():
+    matriz = np.array([[0.5, 0.5], [0.5, 0.5], [0.1, 0.9]])
+    vizinhos, pontuacoes = SimilarityIndex(matriz).top_k_batch([0, 1], 2)
+    assert vizinhos.tolist() == [[1, 2], [0, 2]]
+    assert pontuacoes[:, 0] == pytest.approx([1.0, 1.0])
+
+
+def test_k_larger_than_model_count():
+    indice = SimilarityIndex(np.random.default_rng(1).random((5, 6)))
+    vizinhos, pontuacoes = indice.top_k_batch([0, 4], 50)
+    assert vizinhos.shape == pontuacoes.shape == (2, 4)
+    assert sorted(vizinhos[0].tolist()) == [1, 2, 3, 4]
+
+    # Um único modelo não tem vizinhos
+    assert SimilarityIndex(np.ones((1, 6))).top_k_batch([0], 10)[0].shape == (1, 0)
+
+
+def test_similar_endpoint(banco_com_lote):
+    from backend.app import app
+
+    cliente = app.test_client()
+    modelos = cliente.get('/api/status').get_json()["lista_modelos"]
+    nomes = [m["nome_normalizado"] for m in modelos]
+    matriz = np.array([list(m["valores_normalizados"].values()) for m in modelos])
+
+    resposta = cliente.get(f'/api/similar?model={nomes[0]}&model={nomes[5]}&k=5').get_json()
+    assert resposta["metodo"] == "cosine"
+    for resultado, linha in zip(resposta["resultados"], [0, 5]):
+        assert resultado["modelo"]["nome_normalizado"] == nomes[linha]
+        assert [s["nome_normalizado"] for s in resultado["similares"]] == [
+            nomes[j] for j in _vizinhos_forca_bruta(matriz, linha, 5, "cosine")
+        ]
+
+    # k maior que o número de modelos: todos os outros
+    todos = cliente.get(f'/api/similar?model={nomes[0]}&k=100&method=euclidean').get_json()
+    similares = [s["nome_normalizado"] for s in todos["resultados"][0]["similares"]]
+    assert len(similares) == len(nomes) - 1 and nomes[0] not in similares
+
+    assert cliente.get('/api/similar?model=modelo-inexistente').status_code == 404
+    assert cliente.get(f'/api/similar?model={nomes[0]}&method=manhattan').status_code == 400
+    assert cliente.get('/api/similar').status_code == 400
@@ -0,0 +1,119 @@
+"""Fronteira de Pareto e profundidade de dominância (skyline.py) contra força bruta."""
+
+import numpy as np
+import pytest
+
+from backend import calculator
+from backend.skyline import dominance_depths, pareto_frontier
+
+
+def _domina(a, b):
+    """a domina b: maior ou igual em tudo e maior em algo (NaN é pior que qualquer valor)."""
+    a = np.where(np.isnan(a), -np.inf, a)
+    b = np.where(np.isnan(b), -np.inf, b)
+    return bool(np.all(a >= b) and np.any(a > b))
+
+
+def _profundidades_forca_bruta(matriz):
+    """Remove a fronteira camada por camada, comparando todos os pares."""
+    restantes = set(range(len(matriz)))
+    profundidades = np.zeros(len(matriz), dtype=np.int64)
+    camada = 0
+    while restantes:
+        fronteira = {i for i in restantes if not any(_domina(matriz[j], matriz[i]) for j in restantes)}
+        for i in fronteira:
+            profundidades[i] = camada
+        restantes -= fronteira
+        camada += 1
+    return profundidades
+
+
+def _matriz(semente, n, d=6, valores=None):
+    """Matriz aleatória; com `valores`, notas inteiras em poucos níveis (muitos empates)."""
+    rng = np.random.default_rng(semente)
+    if valores:
+        return rng.integers(0, valores, size=(n, d)).astype(float)
+    return rng.random((n, d))
+
+
+@pytest.mark.parametrize("tamanho_bloco", [1, 7, 256])
+@pytest.mark.parametrize("semente, n, d, valores", [
+    (0, 150, 6, None),
+    (1, 150, 6, 3),  # empates em todas as métricas
+    (2, 120, 2, 5),  # poucas dimensões: muitas camadas
+])
+def test_matches_brute_force(semente, n, d, valores, tamanho_bloco):
+    matriz = _matriz(semente, n, d, valores)
+    esperado = _profundidades_forca_bruta(matriz)
+
+    assert dominance_depths(matriz, tamanho_bloco).tolist() == esperado.tolist()
+    assert pareto_frontier(matriz, tamanho_bloco).tolist() == np.flatnonzero(esperado == 0).tolist()
+
+
+def test_identical_rows_do_not_dominate_each_other():
+    matriz = np.array([[0.5, 0.5], [0.5, 0.5], [0.4, 0.5]])
+    assert dominance_depths(matriz).tolist() == [0, 0, 1]
+    assert pareto_frontier(matriz).tolist() == [0, 1]
+
+
+@pytest.mark.parametrize("tamanho_bloco", [2, 256])
+def test_missing_metrics_count_as_worst(tamanho_bloco):
+    matriz = _matriz(3, 60, valores=4)
+    matriz[::5, 1] = np.nan
+    matriz[7] = np.nan
+    esperado = _profundidades_forca_bruta(matriz)
+
+    profundidades = dominance_depths(matriz, tamanho_bloco)
+    assert profundidades.tolist() == esperado.tolist()
+    assert pareto_frontier(matriz, tamanho_bloco).tolist() == np.flatnonzero(esperado == 0).tolist()
+    # Sem nenhuma nota, o modelo fica na última camada
+    assert profundidades[7] == profundidades.max()
+
+    # NaN não pode fazer um modelo sem nota superar quem tem
+    assert dominance_depths(np.array([[np.nan, 0.5], [0.2, 0.5]])).tolist() == [1, 0]
+
+
+def test_single_and_empty():
+    assert dominance_depths(np.array([[0.3, 0.7, 0.1]])).tolist() == [0]
+    assert pareto_frontier(np.array([[0.3, 0.7, 0.1]])).tolist() == [0]
+    assert dominance_depths(np.zeros((0, 6))).tolist() == []
+    assert pareto_frontier(np.zeros((0, 6))).tolist() == []
+
+
+def test_pareto_endpoint(banco_com_lote):
+    from backend.app import app
+
+    db = banco_com_lote
+    db_session = db.SessionLocal()
+    try:
+        # Um modelo sem uma das métricas fica fora da avaliação
+        resultado = db_session.query(db.Resultado).first()
+        incompleto = resultado.modelo.nome_normalizado
+        db_session.delete(resultado)
+        db_session.commit()
+        calculator.calculate_and_store_metrics(db_session)
+    finally:
+        db_session.close()
+
+    cliente = app.test_client()
+    status = cliente.get('/api/status').get_json()["lista_modelos"]
+    completos = [m for m in status if len(m["valores_normalizados"]) == 6]
+    matriz = np.array([list(m["valores_normalizados"].values()) for m in completos])
+    esperado = _profundidades_forca_bruta(matriz)
+
+    fronteira = cliente.get('/api/pareto').get_json()
+    assert fronteira["modelos_avaliados"] == len(completos)
+    assert sorted(m["nome_normalizado"] for m in fronteira["modelos"]) == sorted(
+        m["nome_normalizado"] for m, p in zip(completos, esperado) if p == 0
+    )
+
+    camada = cliente.get('/api/pareto?depth=1').get_json()
+    assert camada["camadas"] == np.bincount(esperado).tolist()
+    assert sorted(m["nome_normalizado"] for m in camada["modelos"]) == sorted(
+        m["nome_normalizado"] for m, p in zip(completos, esperado) if p == 1
+    )
+
+    nome = completos[-1]["nome_normalizado"]
+    assert cliente.get(f'/api/pareto?model={nome}').get_json()["profundidade"] == esperado[-1]
+    assert cliente.get(f'/api/pareto?model={incompleto}').status_code == 404
+    assert cliente.get('/api/pareto?depth=x').status_code == 400
@@ -0,0 +1,36 @@
+"""
+Orçamento de inicialização dos pontos de entrada (benchmarks/startup.py).
+
+Cada ponto de entrada é importado em subprocessos novos: o tempo (mediana,
+descontado o interpretador vazio) tem de caber no `orcamento_ms` e nenhum
+dos módulos `proibidos` pode ficar carregado. ESHMIA_STARTUP_SCALE
+multiplica os orçamentos em máquinas lentas.
+"""
+
+import os
+
+import pytest
+
+from benchmarks import startup
+
+REPETICOES = 5
+ESCALA = float(os.getenv("ESHMIA_STARTUP_SCALE", "1.0"))
+
+
+@pytest.fixture(scope="module")
+def interpretador_ms():
+    return startup.wall_time_ms("pass", REPETICOES)
+
+
+@pytest.mark.parametrize("nome", list(startup.PONTOS_DE_ENTRADA))
+def test_entry_point_imports_no_forbidden_modules(nome):
+    ponto = startup.PONTOS_DE_ENTRADA[nome]
+    assert startup.loaded_modules(ponto["modulo"], ponto["proibidos"]) == []
+
+
+@pytest.mark.parametrize("nome", list(startup.PONTOS_DE_ENTRADA))
+def test_entry_point_fits_startup_budget(nome, interpretador_ms):
+    ponto = startup.PONTOS_DE_ENTRADA[nome]
+    tempo = startup.wall_time_ms(f"import {ponto['modulo']}", REPETICOES) - interpretador_ms
+    orcamento = ponto["orcamento_ms"] * ESCALA
+    assert tempo <= orcamento, f"{nome}: {tempo:.1f} ms (orçamento {orcamento:.0f} ms)"
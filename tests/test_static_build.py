@@ -0,0 +1,76 @@
+"""
+Build estático: os dois caminhos (em memória e --db) geram os mesmos bytes, e
+o build em memória reproduz o data.json da versão original do build_static.py.
+
+tests/fixtures/golden/data.json é a saída de `python build_static.py` (o
+único modo da época, com banco) da versão anterior à série, rodada sobre
+tests/fixtures/golden/leaderboard.csv (as linhas sem grafias duplicadas nem
+notas ausentes do CSV de fixture, que aquela versão não tratava).
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import build_static
+
+RAIZ = Path(__file__).resolve().parent.parent
+FIXTURES = RAIZ / "tests" / "fixtures"
+TIMESTAMP = "2026-01-01T00:00:00"
+
+
+def _build(pasta, saida, csv, *argumentos):
+    """Roda build_static.py com `csv` no lugar do CSV do repositório."""
+    # O coletor lê o CSV relativo ao diretório atual
+    shutil.copy(csv, pasta / "big_benchmarks_top100.csv")
+    ambiente = dict(os.environ, DB_TYPE="sqlite",
+                    DATABASE_URL=f"sqlite:///{pasta / 'build.db'}",
+                    ESHMIA_WARM_START_FILE=str(pasta / "warm_start.json"))
+    subprocess.run(
+        [sys.executable, str(RAIZ / "build_static.py"), "--output", str(saida),
+         "--timestamp", TIMESTAMP, "--force", *argumentos],
+        cwd=pasta, env=ambiente, check=True, capture_output=True, timeout=300
+    )
+
+
+def _conteudos(saida):
+    manifest = build_static.read_manifest(str(saida))
+    arquivos = {}
+    for nome in sorted(build_static._arquivos_manifest(manifest)):
+        arquivos[nome] = (saida / build_static.DATA_DIR / nome).read_bytes()
+    return arquivos
+
+
+def test_memory_and_database_builds_are_byte_identical(tmp_path):
+    saida_memoria = tmp_path / "memoria"
+    saida_banco = tmp_path / "banco"
+
+    _build(tmp_path, saida_memoria, FIXTURES / "leaderboard.csv")
+    _build(tmp_path, saida_banco, FIXTURES / "leaderboard.csv", "--db")
+
+    memoria = _conteudos(saida_memoria)
+    banco = _conteudos(saida_banco)
+    assert memoria, "o manifest do build em memória não lista arquivos"
+    assert sorted(memoria) == sorted(banco)
+    for nome in memoria:
+        assert memoria[nome] == banco[nome], f"{nome} difere entre os caminhos"
+
+
+def test_memory_build_matches_original_database_build(tmp_path):
+    saida = tmp_path / "memoria"
+    _build(tmp_path, saida, FIXTURES / "golden" / "leaderboard.csv")
+
+    manifest = build_static.read_manifest(str(saida))
+    payload = json.loads((saida / manifest["arquivos"]["data"]).read_text(encoding="utf-8"))
+    # O build atual arredonda os floats (PRECISAO casas); o timestamp é o de cada build
+    golden = build_static._arredondar(
+        json.loads((FIXTURES / "golden" / "data.json").read_text(encoding="utf-8"))
+    )
+    assert payload["timestamp"] == TIMESTAMP
+    assert set(payload) == set(golden)
+    for chave in golden:
+        if chave != "timestamp":
+            assert payload[chave] == golden[chave], f"{chave} difere do build original"
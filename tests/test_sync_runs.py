@@ -0,0 +1,80 @@
+"""Registro das execuções da sincronização (backend/sync_runs.py)."""
+
+import pytest
+
+from backend import sync_runs
+from backend.sync_runs import SyncRun, stage
+
+MB = 2**20
+
+pico_por_etapa = pytest.mark.skipif(not sync_runs._reiniciar_pico() or sync_runs._rss_mb() is None,
+                                    reason="o kernel não permite medir o pico de RSS por etapa")
+
+
+def _tocar(tamanho: int) -> bytearray:
+    """Aloca e escreve em `tamanho` bytes, para que entrem no RSS."""
+    bloco = bytearray(tamanho)
+    for i in range(0, tamanho, 4096):
+        bloco[i] = 1
+    return bloco
+
+
+@pico_por_etapa
+def test_stage_memory_is_per_stage_not_process_wide(banco):
+    banco.upgrade_db()
+    with SyncRun("teste", medir_pico=True) as execucao:
+        with stage("pesada"):
+            with stage("alocacao"):
+                bloco = _tocar(200 * MB)
+                del bloco
+        with stage("leve"):
+            _tocar(1 * MB)
+
+    etapas = {etapa["nome"]: etapa for etapa in execucao.etapas}
+    pesada, alocacao, leve = etapas["pesada"], etapas["pesada/alocacao"], etapas["leve"]
+
+    assert alocacao["memoria_pico_mb"] - alocacao["memoria_inicio_mb"] >= 150
+    # A etapa aberta recebe o pico da aninhada; a memória liberada sai do delta
+    assert pesada["memoria_pico_mb"] >= alocacao["memoria_pico_mb"]
+    assert pesada["memoria_delta_mb"] < 50
+    # O pico da etapa seguinte não herda o da anterior (ao contrário do ru_maxrss)
+    assert leve["memoria_pico_mb"] < alocacao["memoria_pico_mb"] - 150
+    assert execucao.memoria_pico_mb >= alocacao["memoria_pico_mb"]
+
+    db_session = banco.SessionLocal()
+    try:
+        gravada = sync_runs.get_run(db_session, execucao.id)
+    finally:
+        db_session.close()
+    assert gravada["memoria_pico_mb"] == execucao.memoria_pico_mb
+    assert [e["nome"] for e in gravada["etapas"]] == ["pesada", "pesada/alocacao", "leve"]
+    assert gravada["etapas"][2]["memoria_delta_mb"] is not None
+
+
+def test_default_run_does_not_reset_the_process_peak(banco, monkeypatch):
+    """Fora da linha de comando (ex.: no servidor) o VmHWM do processo não é zerado."""
+    reinicios = []
+    monkeypatch.setattr(sync_runs, "_reiniciar_pico", lambda: reinicios.append(1) or True)
+    banco.upgrade_db()
+
+    with SyncRun("servidor") as execucao:
+        with stage("coleta") as etapa:
+            etapa["linhas"] = 3
+
+    assert reinicios == []
+    assert execucao.etapas[0]["memoria_pico_mb"] is None
+    assert execucao.etapas[0]["linhas"] == 3
+    if sync_runs._rss_pico_mb() is not None:
+        assert execucao.memoria_pico_mb is not None
+    assert execucao.id is not None
+
+
+def test_save_errors_propagate(banco):
+    """Sem upgrade_db a tabela não existe: o erro não é engolido nem a tabela criada aqui."""
+    from sqlalchemy import inspect
+    from sqlalchemy.exc import OperationalError
+
+    with pytest.raises(OperationalError):
+        with SyncRun("teste"):
+            pass
+    assert "sync_runs" not in inspect(banco.get_engine()).get_table_names()
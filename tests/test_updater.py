@@ -0,0 +1,218 @@
+"""Atualizador do CSV (updater.py) e coleta incremental do log de mudanças."""
+
+import csv
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import create_engine, text
+
+import updater
+from backend import collector
+
+CABECALHO = ",".join(updater.COLUNAS)
+CSV_INICIAL = f"""{CABECALHO}
+1,proprietary,gpt-4-turbo,87.81,54.66,46.25,34.88,67.91,63.02,47.18,13.3675
+2,proprietary,claude-3-opus,80.93,54.82,80.83,55.89,67.94,79.02,52.41,23.1629
+3,open,llama-2-70b-chat,80.74,72.1,41.52,44.4,42.35,51.65,59.07,27.5587
+"""
+
+# Resposta do "serviço": gpt-4-turbo inalterado (outra grafia), claude com
+# bbh novo e um modelo novo; o llama não veio e deve continuar no CSV
+RESPOSTA = [
+    {"rank": 1, "type": "proprietary", "model": "GPT-4-Turbo", "average": 87.81, "ifeval": 54.66,
+     "bbh": 46.25, "math": 34.88, "gpqa": 67.91, "musr": 63.02, "MMLU-Pro": 47.18, "co2_cost": 13.3675},
+    {"rank": 2, "type": "proprietary", "model": "claude-3-opus", "bbh": 82.5},
+    {"rank": 3, "type": "open", "model": "qwen-2-72b", "average": 85.1, "ifeval": 70.2, "bbh": 60.3,
+     "math": 45.0, "gpqa": 40.1, "musr": 55.5, "mmlu_pro": 62.0, "co2_cost": 9.5},
+]
+
+
+@pytest.fixture
+def arquivos(tmp_path):
+    caminho_csv = tmp_path / "leaderboard.csv"
+    caminho_csv.write_text(CSV_INICIAL, encoding="utf-8")
+    respostas = tmp_path / "respostas.json"
+    respostas.write_text(json.dumps(RESPOSTA), encoding="utf-8")
+    return {"csv": str(caminho_csv), "respostas": str(respostas),
+            "log": str(tmp_path / "mudancas.jsonl"), "cache": str(tmp_path / "cache")}
+
+
+class CountingClient(updater.StubClient):
+    """StubClient que conta as chamadas ao "serviço"."""
+
+    def __init__(self, arquivo):
+        super().__init__(arquivo)
+        self.chamadas = 0
+
+    def generate(self, prompt, faixa):
+        self.chamadas += 1
+        return super().generate(prompt, faixa)
+
+
+class FlakyClient(CountingClient):
+    """Falha nas `falhas` primeiras chamadas, depois responde como o StubClient."""
+
+    def __init__(self, arquivo, falhas):
+        super().__init__(arquivo)
+        self.falhas = falhas
+
+    def generate(self, prompt, faixa):
+        if self.chamadas < self.falhas:
+            self.chamadas += 1
+            raise ConnectionError("serviço indisponível")
+        return super().generate(prompt, faixa)
+
+
+@pytest.fixture
+def esperas(monkeypatch):
+    """Substitui o time.sleep do updater, guardando as esperas pedidas."""
+    pedidas = []
+    monkeypatch.setattr(updater.time, "sleep", pedidas.append)
+    return pedidas
+
+
+def _cursor(banco, db_session, log):
+    return db_session.get(banco.CursorLog, os.path.abspath(log)).seq
+
+
+def test_merge_rows_new_changed_and_unchanged(arquivos):
+    existentes = updater.read_csv(arquivos["csv"])
+    linhas, mudancas = updater.merge_rows(existentes, RESPOSTA)
+
+    assert [m["acao"] for m in mudancas] == ["alterado", "novo"]
+    alterado, novo = mudancas
+    assert alterado["model"] == "claude-3-opus"
+    assert alterado["campos"] == {"bbh": ["80.83", "82.5"]}
+    assert novo["model"] == "qwen-2-72b"
+
+    assert [linha["model"] for linha in linhas] == ["gpt-4-turbo", "claude-3-opus", "llama-2-70b-chat", "qwen-2-72b"]
+    # Campos ausentes na resposta são mantidos; as linhas de entrada não são alteradas
+    assert linhas[1]["ifeval"] == "54.82"
+    assert existentes[1]["bbh"] == "80.83"
+
+
+def test_append_changes_numbers_sequences(arquivos):
+    assert updater.last_sequence(arquivos["log"]) == 0
+    _, mudancas = updater.merge_rows(updater.read_csv(arquivos["csv"]), RESPOSTA)
+
+    assert updater.append_changes(mudancas, arquivos["log"]) == 2
+    assert updater.append_changes(mudancas[:1], arquivos["log"]) == 3
+    with open(arquivos["log"], encoding="utf-8") as f:
+        registros = [json.loads(linha) for linha in f]
+    assert [r["seq"] for r in registros] == [1, 2, 3]
+    assert updater.last_sequence(arquivos["log"]) == 3
+
+
+def test_second_run_is_served_from_cache(arquivos):
+    client = CountingClient(arquivos["respostas"])
+    primeira = updater.fetch_live_data(client, total=3, tamanho_lote=2, workers=2,
+                                       data="2026-01-01", cache_dir=arquivos["cache"])
+    assert client.chamadas == 2
+
+    segunda = updater.fetch_live_data(client, total=3, tamanho_lote=2, workers=2,
+                                      data="2026-01-01", cache_dir=arquivos["cache"])
+    assert client.chamadas == 2
+    assert segunda == primeira == RESPOSTA
+
+    # Outro dia é outra chave de cache
+    updater.fetch_live_data(client, total=3, tamanho_lote=2, workers=2,
+                            data="2026-01-02", cache_dir=arquivos["cache"])
+    assert client.chamadas == 4
+
+
+def test_retries_with_exponential_backoff(arquivos, esperas):
+    client = FlakyClient(arquivos["respostas"], falhas=2)
+    registros = updater.fetch_batch(client, 1, 3, "2026-01-01", cache_dir=None)
+
+    assert registros == RESPOSTA
+    assert client.chamadas == 3
+    assert len(esperas) == 2
+    # Espera inicial dobrando a cada tentativa, com até 50% de variação
+    for tentativa, espera in enumerate(esperas):
+        base = updater.ESPERA_INICIAL * 2 ** tentativa
+        assert base <= espera <= base * 1.5
+
+
+def test_gives_up_after_all_attempts(arquivos, esperas):
+    client = FlakyClient(arquivos["respostas"], falhas=updater.TENTATIVAS)
+    with pytest.raises(ConnectionError):
+        updater.fetch_batch(client, 1, 3, "2026-01-01", cache_dir=arquivos["cache"])
+    assert client.chamadas == updater.TENTATIVAS
+    assert len(esperas) == updater.TENTATIVAS - 1
+
+    # Um lote que falhou fica de fora sem derrubar os outros
+    client = FlakyClient(arquivos["respostas"], falhas=updater.TENTATIVAS)
+    registros = updater.fetch_live_data(client, total=3, tamanho_lote=2, workers=1,
+                                        data="2026-01-01", cache_dir=None)
+    assert registros == RESPOSTA[2:]
+
+
+def test_update_csv_writes_csv_and_log(arquivos):
+    mudancas = updater.update_csv(RESPOSTA, arquivos["csv"], arquivos["log"])
+    assert len(mudancas) == 2
+    with open(arquivos["csv"], encoding="utf-8", newline="") as f:
+        linhas = list(csv.DictReader(f))
+    assert len(linhas) == 4
+    assert updater.last_sequence(arquivos["log"]) == 2
+
+    # Rodar de novo com os mesmos dados não muda nada
+    assert updater.update_csv(RESPOSTA, arquivos["csv"], arquivos["log"]) == []
+    assert updater.last_sequence(arquivos["log"]) == 2
+
+
+def test_collect_changes_applies_pending_entries_once(banco, arquivos):
+    banco.init_db()
+    updater.update_csv(RESPOSTA, arquivos["csv"], arquivos["log"])
+
+    db_session = banco.SessionLocal()
+    try:
+        assert collector.collect_changes(db_session, arquivos["log"]) == 2
+        assert _cursor(banco, db_session, arquivos["log"]) == 2
+        modelos = {m.nome_normalizado: m for m in db_session.query(banco.Modelo).all()}
+        assert set(modelos) == {"claude-3-opus", "qwen-2-72b"}
+        bbh = db_session.query(banco.Resultado).join(banco.Metrica).filter(
+            banco.Resultado.modelo_id == modelos["claude-3-opus"].id,
+            banco.Metrica.nome == "BBH"
+        ).one()
+        assert bbh.valor_cru == pytest.approx(82.5)
+
+        # Nada pendente: o cursor já está no fim do log
+        assert collector.collect_changes(db_session, arquivos["log"]) == 0
+
+        # Uma nova mudança é aplicada a partir do cursor
+        novo_lote = [{"model": "qwen-2-72b", "math": 50.0}]
+        updater.update_csv(novo_lote, arquivos["csv"], arquivos["log"])
+        assert collector.collect_changes(db_session, arquivos["log"]) == 1
+        assert _cursor(banco, db_session, arquivos["log"]) == 3
+    finally:
+        db_session.close()
+
+    # O cursor é do banco: o log não ganha arquivo ao lado
+    assert not os.path.exists(arquivos["log"] + ".cursor")
+
+
+def test_collect_flag_upgrades_the_database_first(tmp_path, arquivos):
+    """--collect num banco novo (sem tabelas) cria o schema antes de aplicar o log."""
+    url = f"sqlite:///{tmp_path / 'novo.db'}"
+    ambiente = dict(os.environ, DB_TYPE="sqlite", DATABASE_URL=url,
+                    ESHMIA_WARM_START_FILE=str(tmp_path / "warm_start.json"))
+    subprocess.run(
+        [sys.executable, os.path.abspath(updater.__file__), "--client", "stub", "--stub-file", arquivos["respostas"],
+         "--csv", arquivos["csv"], "--changes", arquivos["log"], "--no-cache", "--collect"],
+        cwd=tmp_path, env=ambiente, check=True, capture_output=True, timeout=300
+    )
+
+    engine = create_engine(url)
+    try:
+        with engine.connect() as conexao:
+            nomes = set(conexao.execute(text("SELECT nome_normalizado FROM modelos")).scalars())
+            cursor = conexao.execute(text("SELECT seq FROM cursores_log")).scalar_one()
+            lotes = conexao.execute(text("SELECT COUNT(*) FROM lotes")).scalar_one()
+    finally:
+        engine.dispose()
+    assert nomes == {"claude-3-opus", "qwen-2-72b"}
+    assert cursor == 2
+    assert lotes == 1
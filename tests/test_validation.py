@@ -0,0 +1,101 @@
+"""Validação dos dados coletados (validation.py) e quarentena no banco."""
+
+import json
+import math
+
+import pytest
+
+from backend import collector
+from backend.indices import METRICAS
+from backend.validation import format_report, validate_models
+
+
+def _modelo(nome, **metricas):
+    """Modelo no formato do coletor, com todas as métricas em 50 salvo as indicadas."""
+    return {"nome": nome, "fonte": "teste", "metricas": {**{m: 50.0 for m in METRICAS}, **metricas}}
+
+
+def test_range_limits_are_inclusive():
+    validos, quarentena, estatisticas = validate_models([
+        _modelo("limites", IFEval=0, BBH=100, MATH="0.0", GPQA="100"),
+        _modelo("negativo", IFEval=-0.01),
+        _modelo("acima", BBH=100.5, MATH=250),
+    ])
+    assert [m["nome"] for m in validos] == ["limites"]
+    assert validos[0]["metricas"] == {**{m: 50.0 for m in METRICAS}, "IFEval": 0.0, "BBH": 100.0, "MATH": 0.0, "GPQA": 100.0}
+
+    motivos = {linha["nome"]: linha["motivos"] for linha in quarentena}
+    assert motivos == {"negativo": "IFEval fora de 0-100", "acima": "BBH fora de 0-100; MATH fora de 0-100"}
+    assert estatisticas["fora_da_faixa"] == 3
+    assert estatisticas["quarentena"] == 2
+
+
+@pytest.mark.parametrize("sentinela", [None, float("nan"), "", "-", "--", "N/A", " null ", "None", "NaN"])
+def test_sentinels_count_as_missing(sentinela):
+    validos, quarentena, estatisticas = validate_models([_modelo("incompleto", GPQA=sentinela)])
+    assert quarentena == []
+    assert validos[0]["metricas"] == {m: 50.0 for m in METRICAS if m != "GPQA"}
+    assert estatisticas["incompletos"] == 1
+    assert estatisticas["nao_numericos"] == 0
+
+
+def test_bad_rows_are_quarantined_with_reasons():
+    modelos = [
+        _modelo("bom"),
+        _modelo("texto", MUSR="alto"),
+        {"nome": "vazio", "fonte": "teste", "metricas": {m: "N/A" for m in METRICAS}},
+        {"nome": "sem-metricas", "fonte": "teste"},
+        _modelo(None),
+        _modelo("n/a"),
+        _modelo("varios", IFEval="x", BBH=-5),
+        _modelo("BOM"),  # mesma forma canônica de "bom"
+    ]
+    validos, quarentena, estatisticas = validate_models(modelos)
+
+    assert [m["nome"] for m in validos] == ["bom"]
+    assert [(linha["nome"], linha["motivos"]) for linha in quarentena] == [
+        ("texto", "MUSR não numérico"),
+        ("vazio", "sem métricas"),
+        ("sem-metricas", "sem métricas"),
+        (None, "nome ausente"),
+        (None, "nome ausente"),
+        ("varios", "IFEval não numérico; BBH fora de 0-100"),
+        ("BOM", "nome duplicado no lote"),
+    ]
+    # Os dados originais vão junto para a quarentena
+    assert json.loads(quarentena[0]["dados"])["MUSR"] == "alto"
+    assert all(linha["fonte"] == "teste" for linha in quarentena)
+
+    assert {chave: estatisticas[chave] for chave in (
+        "total", "validos", "quarentena", "nao_numericos", "fora_da_faixa", "sem_metricas", "sem_nome", "duplicados"
+    )} == {"total": 8, "validos": 1, "quarentena": 7, "nao_numericos": 2, "fora_da_faixa": 1,
+           "sem_metricas": 2, "sem_nome": 2, "duplicados": 1}
+    assert "1/8 linhas válidas" in format_report(estatisticas)
+
+
+def test_empty_batch():
+    validos, quarentena, estatisticas = validate_models([])
+    assert validos == [] and quarentena == []
+    assert estatisticas["total"] == 0
+
+
+def test_collector_stores_quarantine(banco):
+    banco.init_db()
+    db_session = banco.SessionLocal()
+    try:
+        collector.collect_and_store_data(db_session, model_list=[
+            _modelo("modelo-valido", MATH=72.5),
+            _modelo("modelo-invalido", MATH=172.5),
+        ])
+        modelos = {m.nome_normalizado for m in db_session.query(banco.Modelo).all()}
+        assert modelos == {"modelo-valido"}
+        math_valido = db_session.query(banco.Resultado).join(banco.Metrica).filter(
+            banco.Metrica.nome == "MATH"
+        ).one()
+        assert math.isclose(math_valido.valor_cru, 72.5)
+
+        registro = db_session.query(banco.Quarentena).one()
+        assert (registro.nome, registro.fonte, registro.motivos) == ("modelo-invalido", "teste", "MATH fora de 0-100")
+        assert json.loads(registro.dados)["MATH"] == 172.5
+    finally:
+        db_session.close()
@@ -0,0 +1,74 @@
+"""Partida a quente: status salvo em disco e troca pelo lote atual."""
+
+import pytest
+
+import run
+from backend import calculator, warmstart
+
+
+@pytest.fixture
+def cliente(banco_com_lote):
+    from backend.app import app
+    yield app.test_client()
+    warmstart.finish()
+
+
+def _novo_lote(db):
+    """Altera um resultado e calcula outro lote (como um bridge_sync em outro processo)."""
+    db_session = db.SessionLocal()
+    try:
+        resultado = db_session.query(db.Resultado).first()
+        resultado.valor_cru = resultado.valor_cru / 2
+        resultado.valor_normalizado = None
+        db_session.commit()
+        return calculator.calculate_and_store_metrics(db_session).id
+    finally:
+        db_session.close()
+
+
+def test_save_and_load_round_trip(tmp_path):
+    arquivo = str(tmp_path / "status.json")
+    assert warmstart.load(arquivo) is None
+    assert warmstart.save({"batch_id": 3, "total_modelos": 10}, arquivo)
+
+    carregado = warmstart.load(arquivo)
+    assert carregado["batch_id"] == 3
+    assert carregado["total_modelos"] == 10
+    assert carregado["timestamp"]
+
+
+def test_saved_status_is_served_until_a_newer_batch_exists(cliente, banco_com_lote):
+    lote_atual = cliente.get('/api/status').get_json()["batch_id"]
+    # O status do lote foi salvo ao ser montado
+    assert warmstart.load()["batch_id"] == lote_atual
+
+    warmstart.activate()
+    warmstart._estado["payload"]["marca"] = "salvo"
+    assert cliente.get('/api/status').get_json()["marca"] == "salvo"
+
+    novo = _novo_lote(banco_com_lote)
+    resposta = cliente.get('/api/status').get_json()
+    assert resposta["batch_id"] == novo
+    assert "marca" not in resposta
+    assert warmstart.current() is None
+
+
+def test_failed_refresh_hands_off_to_the_database(cliente, monkeypatch):
+    cliente.get('/api/status')
+    warmstart.activate()
+    monkeypatch.setattr(run, "refresh_data", lambda *argumentos: False)
+
+    run.refresh_in_background(False, True)
+    assert warmstart.current() is None
+
+
+def test_failed_refresh_without_batches_keeps_the_saved_status(banco, monkeypatch):
+    banco.init_db()
+    warmstart.save({"batch_id": 1, "marca": "salvo"})
+    warmstart.activate()
+    monkeypatch.setattr(run, "refresh_data", lambda *argumentos: False)
+    try:
+        run.refresh_in_background(False, True)
+        assert warmstart.current()["marca"] == "salvo"
+    finally:
+        warmstart.finish()